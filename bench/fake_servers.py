@@ -0,0 +1,545 @@
+"""벤치마크용 로컬 가짜 서버
+
+FakeUpstream 은 봇이 호출하는 모든 업스트림(Naver, Robinhood, Upbit, Daum CDN,
+CNN, tradestie, KRX)을, FakeTelegram 은 Bot API 를 흉내 냅니다. 업스트림 요청은
+[http] upstream_override 로 http://127.0.0.1:<port>/<원래 호스트>/<원래 경로> 로
+들어옵니다.
+
+응답은 실제 응답과 같은 구조의 합성 데이터를 쓰고, recordings 디렉터리에
+<호스트>/<경로> 파일이 있으면 녹화해 둔 응답을 그대로 돌려줍니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from commands.stock.robinhood import RobinhoodConfig
+from commands.stock.symbol_index import CODE_COLUMN, NAME_COLUMN
+
+Response = Tuple[int, Dict[str, str], bytes]
+Handler = Callable[[str, str, Dict[str, str], bytes], Awaitable[Response]]
+
+KOREAN_STOCKS: List[Tuple[str, str]] = [
+    ("삼성전자", "005930"),
+    ("SK하이닉스", "000660"),
+    ("LG에너지솔루션", "373220"),
+    ("삼성바이오로직스", "207940"),
+    ("현대차", "005380"),
+    ("기아", "000270"),
+    ("셀트리온", "068270"),
+    ("NAVER", "035420"),
+    ("카카오", "035720"),
+    ("POSCO홀딩스", "005490"),
+    ("KODEX 200", "069500"),
+    ("KODEX 200선물인버스2X", "252670"),
+]
+US_TICKERS = ["AAPL", "NVDA", "TSLA", "MSFT", "AMZN", "GOOGL", "META", "AMD"]
+CRYPTO_MARKETS = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL", "KRW-DOGE", "BTC-ETH"]
+BENCH_TOKEN = "bench-access-token"
+
+
+@dataclass
+class FaultProfile:
+    """응답마다 넣을 지연과 오류 비율"""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    async def apply(self) -> bool:
+        """지연을 기다리고, 이번 요청을 실패시켜야 하면 True 를 반환합니다."""
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return random.random() < self.error_rate
+
+
+class FakeHTTPServer:
+    """keep-alive 를 지원하는 최소한의 HTTP/1.1 서버"""
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer) -> None:
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    key, value = line.decode("latin-1").split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                body = await self._read_body(reader, headers)
+
+                status, response_headers, content = await self.handler(
+                    method, target, headers, body
+                )
+                head = [f"HTTP/1.1 {status} X", f"Content-Length: {len(content)}"]
+                head += [f"{key}: {value}" for key, value in response_headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + content)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict) -> bytes:
+        if headers.get("transfer-encoding", "").lower() != "chunked":
+            return await reader.readexactly(int(headers.get("content-length", 0)))
+
+        chunks = []
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        await reader.readline()
+        return b"".join(chunks)
+
+
+def _json(data, status: int = 200, headers: Dict[str, str] = None) -> Response:
+    return (
+        status,
+        {"Content-Type": "application/json", **(headers or {})},
+        json.dumps(data, ensure_ascii=False).encode(),
+    )
+
+
+def _seed(*values) -> random.Random:
+    """같은 입력에 같은 값을 내도록 입력으로 시드를 정한 난수 생성기"""
+    return random.Random(hashlib.md5("|".join(map(str, values)).encode()).digest())
+
+
+def crypto_ticker(market: str) -> Dict:
+    """업비트 ticker 응답과 같은 모양의 시세. 3초마다 값이 바뀝니다."""
+    rng = _seed(market, int(time.time() // 3))
+    rate = rng.uniform(-0.05, 0.05)
+    price = rng.uniform(1e7, 1.5e8)
+    return {
+        "market": market,
+        "trade_price": price,
+        "signed_change_rate": rate,
+        "signed_change_price": price * rate,
+    }
+
+
+class FakeUpstream:
+    """봇이 쓰는 업스트림 엔드포인트를 흉내 내는 서버"""
+
+    def __init__(
+        self,
+        fault: FaultProfile = None,
+        recordings: str = None,
+        host_faults: Dict[str, FaultProfile] = None,
+    ):
+        self.fault = fault or FaultProfile()
+        self.host_faults = host_faults or {}
+        self.recordings = recordings
+        self.requests: Counter = Counter()
+        self.server = FakeHTTPServer(self.handle)
+        self._routes: List[Tuple[str, re.Pattern, Callable[..., Response]]] = [
+            (
+                "polling.finance.naver.com",
+                re.compile(r"/api/realtime/domestic/stock/([\d,]+)"),
+                self._naver_stocks,
+            ),
+            (
+                "m.stock.naver.com",
+                re.compile(r"/api/index/(\w+)/basic"),
+                self._naver_index,
+            ),
+            (
+                "m.stock.naver.com",
+                re.compile(r"/api/stock/(\d+)/basic"),
+                self._naver_mobile_stock,
+            ),
+            ("ac.stock.naver.com", re.compile(r"/ac"), self._naver_world_search),
+            (
+                "api.stock.naver.com",
+                re.compile(r"/stock/([^/]+)/basic"),
+                self._naver_world_stock,
+            ),
+            ("robinhood.com", re.compile(r"/us/en/stocks/([^/]+)/"), self._rh_page),
+            (
+                "bonfire.robinhood.com",
+                re.compile(r"/instruments/([^/]+)/detail-page-live-updating-data/"),
+                self._rh_quote,
+            ),
+            ("t1.daumcdn.net", re.compile(r"/finance/chart/.+\.png"), self._chart),
+            ("api.upbit.com", re.compile(r"/v1/ticker"), self._upbit_ticker),
+            ("api.upbit.com", re.compile(r"/v1/market/all"), self._upbit_markets),
+            ("crix-api-cdn.upbit.com", re.compile(r"/v1/forex/recent"), self._forex),
+            (
+                "production.dataviz.cnn.io",
+                re.compile(r"/index/fearandgreed/graphdata/.*"),
+                self._fear_and_greed,
+            ),
+            ("tradestie.com", re.compile(r"/api/v1/apps/reddit"), self._reddit),
+            ("data.krx.co.kr", re.compile(r"/comm/fileDn/GenerateOTP/.*"), self._otp),
+            (
+                "data.krx.co.kr",
+                re.compile(r"/comm/fileDn/download_csv/.*"),
+                self._krx_csv,
+            ),
+        ]
+
+    @property
+    def url(self) -> str:
+        return self.server.url
+
+    async def handle(self, method, target, headers, body) -> Response:
+        host, _, path = target.lstrip("/").partition("/")
+        parts = urlsplit(f"/{path}")
+        self.requests[host] += 1
+
+        if await self.fault.apply():
+            return 503, {}, b"injected failure"
+        if (fault := self.host_faults.get(host)) and await fault.apply():
+            return 503, {}, b"injected host failure"
+
+        if recorded := self._recorded(host, parts.path):
+            return recorded
+
+        for route_host, pattern, route in self._routes:
+            if route_host == host and (match := pattern.fullmatch(parts.path)):
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                return route(*match.groups(), query=query, headers=headers)
+
+        logging.warning(f"No fake route for {host}{parts.path}")
+        return 404, {}, b"not found"
+
+    def _recorded(self, host: str, path: str) -> Optional[Response]:
+        if not self.recordings:
+            return None
+        file_path = os.path.join(self.recordings, host, unquote(path).strip("/"))
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "rb") as f:
+            return 200, {}, f.read()
+
+    def _naver_stocks(self, codes: str, **_) -> Response:
+        names = {code: name for name, code in KOREAN_STOCKS}
+        datas = []
+        for code in codes.split(","):
+            rng = _seed(code, int(time.time() // 5))
+            datas.append(
+                {
+                    "itemCode": code,
+                    "stockName": names.get(code, code),
+                    "closePrice": f"{rng.randint(5_000, 900_000):,}",
+                    "fluctuationsRatio": f"{rng.uniform(-5, 5):.2f}",
+                }
+            )
+        return _json({"datas": datas})
+
+    def _naver_mobile_stock(self, code: str, **_) -> Response:
+        names = {code: name for name, code in KOREAN_STOCKS}
+        if code not in names:
+            return 404, {}, b"not found"
+        rng = _seed(code, int(time.time() // 5))
+        return _json(
+            {
+                "itemCode": code,
+                "stockName": names[code],
+                "closePrice": f"{rng.randint(5_000, 900_000):,}",
+                "fluctuationsRatio": f"{rng.uniform(-5, 5):.2f}",
+            }
+        )
+
+    def _naver_world_search(self, query: Dict, **_) -> Response:
+        ticker = query.get("q", "").upper()
+        items = []
+        if ticker in US_TICKERS:
+            items.append(
+                {
+                    "code": ticker,
+                    "name": f"Company {ticker}",
+                    "nationCode": "USA",
+                    "reutersCode": f"{ticker}.O",
+                    "category": "stock",
+                }
+            )
+        return _json({"query": ticker, "items": items})
+
+    def _naver_world_stock(self, code: str, **_) -> Response:
+        rng = _seed(code, int(time.time() // 5))
+        price = rng.uniform(50, 900)
+        change = rng.uniform(-3, 3)
+        return _json(
+            {
+                "reutersCode": code,
+                "stockName": f"Company {code.split('.')[0]}",
+                "closePrice": f"{price:,.2f}",
+                "compareToPreviousClosePrice": f"{price * change / 100:.2f}",
+                "fluctuationsRatio": f"{change:.2f}",
+            }
+        )
+
+    def _naver_index(self, market: str, **_) -> Response:
+        rng = _seed(market, int(time.time() // 10))
+        return _json(
+            {
+                "closePrice": f"{rng.uniform(700, 3000):,.2f}",
+                "compareToPreviousClosePrice": f"{rng.uniform(-30, 30):.2f}",
+                "fluctuationsRatio": f"{rng.uniform(-2, 2):.2f}",
+            }
+        )
+
+    def _rh_page(self, ticker: str, **_) -> Response:
+        meta_name = RobinhoodConfig.instrument_meta_name
+        instrument_id = hashlib.md5(ticker.encode()).hexdigest()
+        next_data = {
+            "props": {
+                "pageProps": {
+                    "dehydratedState": {"queries": [{"state": {"data": BENCH_TOKEN}}]}
+                }
+            }
+        }
+        filler = '<div class="css-1"><span>lorem ipsum</span></div>' * 2000
+        page = (
+            "<!DOCTYPE html><html><head>"
+            + "".join(f'<link rel="preload" href="/c{i}.js">' for i in range(80))
+            + f'<meta name="{meta_name}" content="robinhood://instrument?id={instrument_id}">'
+            + "</head><body>"
+            + filler
+            + '<script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps(next_data)
+            + "</script></body></html>"
+        )
+        return 200, {"Content-Type": "text/html"}, page.encode()
+
+    def _rh_quote(self, instrument_id: str, headers: Dict, **_) -> Response:
+        if headers.get("authorization") != f"Bearer {BENCH_TOKEN}":
+            return _json({"detail": "Unauthorized"}, status=401)
+
+        rng = _seed(instrument_id, int(time.time() // 5))
+        price = rng.uniform(50, 900)
+        change = rng.uniform(-3, 3)
+        return _json(
+            {
+                "chart_section": {
+                    "header": [{"text": f"Company {instrument_id[:6]}"}],
+                    "default_display": {
+                        "secondary_value": {
+                            "description": {"value": "Today"},
+                            "main": {
+                                "value": f"+${price * change / 100:.2f} ({change:.2f}%)"
+                            },
+                        }
+                    },
+                    "quote": {
+                        "last_trade_price": f"{price:.2f}",
+                        "last_extended_hours_trade_price": f"{price * 1.001:.2f}",
+                    },
+                }
+            }
+        )
+
+    def _chart(self, headers: Dict, query: Dict, **_) -> Response:
+        bucket = query.get("timestamp", "")
+        etag = f'"{hashlib.md5(bucket.encode()).hexdigest()}"'
+        if headers.get("if-none-match") == etag:
+            return 304, {"ETag": etag}, b""
+
+        content = b"\x89PNG\r\n\x1a\n" + _seed(bucket).randbytes(30 * 1024)
+        return 200, {"Content-Type": "image/png", "ETag": etag}, content
+
+    def _upbit_ticker(self, query: Dict, **_) -> Response:
+        markets = query.get("markets", "KRW-BTC").split(",")
+        if any(market not in CRYPTO_MARKETS for market in markets):
+            return _json({"error": {"name": "404", "message": "Code not found"}}, 404)
+        return _json([crypto_ticker(market) for market in markets])
+
+    def _upbit_markets(self, **_) -> Response:
+        return _json([{"market": market} for market in CRYPTO_MARKETS])
+
+    def _forex(self, query: Dict, **_) -> Response:
+        codes = query.get("codes", "FRX.KRWUSD").split(",")
+        units = {"FRX.KRWJPY": 100, "FRX.KRWVND": 100}
+        names = {"FRX.KRWUSD": "달러", "FRX.KRWJPY": "엔", "FRX.KRWEUR": "유로"}
+        return _json(
+            [
+                {
+                    "code": code,
+                    "basePrice": round(_seed(code).uniform(900, 1400), 2),
+                    "currencyName": names.get(code, code[len("FRX.KRW") :]),
+                    "currencyUnit": units.get(code, 1),
+                }
+                for code in codes
+            ]
+        )
+
+    def _fear_and_greed(self, **_) -> Response:
+        return _json({"fear_and_greed": {"score": 54.3, "rating": "neutral"}})
+
+    def _reddit(self, **_) -> Response:
+        return _json(
+            [
+                {
+                    "ticker": ticker,
+                    "sentiment": random.choice(["Bullish", "Bearish"]),
+                    "sentiment_score": round(random.uniform(-1, 1), 3),
+                }
+                for ticker in US_TICKERS * 2
+            ]
+        )
+
+    def _otp(self, **_) -> Response:
+        return 200, {"Content-Type": "text/plain"}, b"bench-otp"
+
+    def _krx_csv(self, **_) -> Response:
+        rows = [f"{CODE_COLUMN},{NAME_COLUMN}"]
+        rows += [f"{code},{name}" for name, code in KOREAN_STOCKS]
+        rows += [f"{900000 + i:06d},벤치종목{i}" for i in range(2500)]
+        return 200, {"Content-Type": "text/csv"}, "\n".join(rows).encode("euc-kr")
+
+
+class FakeTelegram:
+    """sendMessage/sendPhoto 를 받아 기록하는 가짜 Bot API 서버"""
+
+    CHAT_ID_PATTERN = re.compile(rb'chat_id(?:"\r\n\r\n|=|":\s*)(-?\d+)')
+
+    def __init__(self, fault: FaultProfile = None):
+        self.fault = fault or FaultProfile()
+        self.calls: Counter = Counter()
+        self.server = FakeHTTPServer(self.handle)
+        self._message_id = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.server.url}/bot"
+
+    async def handle(self, method, target, headers, body) -> Response:
+        api_method = target.rsplit("/", 1)[-1].split("?")[0]
+        self.calls[api_method] += 1
+
+        if api_method == "getMe":
+            return _json(
+                {
+                    "ok": True,
+                    "result": {
+                        "id": 1,
+                        "is_bot": True,
+                        "first_name": "bench",
+                        "username": "bench_bot",
+                    },
+                }
+            )
+
+        if await self.fault.apply():
+            return _json(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+
+        if api_method in ("answerInlineQuery", "answerCallbackQuery"):
+            return _json({"ok": True, "result": True})
+
+        match = self.CHAT_ID_PATTERN.search(body)
+        chat_id = int(match.group(1)) if match else 0
+        self._message_id += 1
+        result = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+        }
+        if api_method == "sendPhoto":
+            file_id = f"photo-{hashlib.md5(body).hexdigest()}"
+            result["photo"] = [
+                {
+                    "file_id": file_id,
+                    "file_unique_id": file_id,
+                    "width": 700,
+                    "height": 300,
+                }
+            ]
+        return _json({"ok": True, "result": result})
+
+
+class FakeUpbitStream:
+    """업비트 WebSocket 시세를 흉내 내는 서버. websockets 패키지가 필요합니다.
+
+    구독 요청을 받으면 마켓마다 SNAPSHOT 을 보내고, 이후 interval 마다 무작위
+    마켓의 REALTIME 시세를 보냅니다. drop_after 초가 지나면 연결을 끊어서
+    재연결을 확인할 수 있습니다.
+    """
+
+    def __init__(self, interval: float = 0.05, drop_after: float = None):
+        self.interval = interval
+        self.drop_after = drop_after
+        self.connections = 0
+        self.port: Optional[int] = None
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/websocket/v1"
+
+    async def start(self) -> None:
+        import websockets
+
+        self._server = await websockets.serve(self._serve, "127.0.0.1", 0)
+        self.port = next(iter(self._server.sockets)).getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, websocket) -> None:
+        self.connections += 1
+        codes: List[str] = []
+        started = time.monotonic()
+        try:
+            while (
+                self.drop_after is None or time.monotonic() - started < self.drop_after
+            ):
+                try:
+                    request = await asyncio.wait_for(websocket.recv(), self.interval)
+                except asyncio.TimeoutError:
+                    request = None
+
+                if request is not None:
+                    codes = next(
+                        item["codes"] for item in json.loads(request) if "codes" in item
+                    )
+                    for code in codes:
+                        await websocket.send(self._tick(code, "SNAPSHOT"))
+                elif codes:
+                    await websocket.send(self._tick(random.choice(codes), "REALTIME"))
+        except Exception:
+            pass
+
+    @staticmethod
+    def _tick(code: str, stream_type: str) -> bytes:
+        data = crypto_ticker(code)
+        del data["market"]
+        data.update(type="ticker", code=code, stream_type=stream_type)
+        return json.dumps(data).encode()
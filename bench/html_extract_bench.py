@@ -0,0 +1,134 @@
+"""Robinhood 페이지 추출 방식 비교 벤치마크
+
+BeautifulSoup 전체 파싱과 html_extract 의 부분 추출을 비교합니다. 저장소에는
+페이지를 넣어 두지 않으므로 기본으로는 실제 페이지 구조를 흉내 낸 합성 HTML 을
+쓰고, 직접 저장한 페이지는 --html 로 지정합니다.
+
+    python -m bench.html_extract_bench
+    curl -o nvda.html https://robinhood.com/us/en/stocks/NVDA/
+    python -m bench.html_extract_bench --html nvda.html --number 20
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from commands.stock.html_extract import (
+    MarkerScanner,
+    extract_meta_content,
+    extract_next_data,
+    meta_tag_markers,
+)
+from commands.stock.robinhood import RobinHood, RobinhoodConfig
+
+META_NAME = RobinhoodConfig.instrument_meta_name
+CHUNK_SIZE = 64 * 1024
+
+
+def synthetic_page(filler_kb: int = 600) -> str:
+    """robinhood.com 종목 페이지와 비슷한 구조의 HTML 을 만듭니다."""
+    head = [
+        '<meta charset="utf-8">',
+        *(f'<link rel="preload" href="/_next/static/chunk{i}.js">' for i in range(80)),
+        f'<meta name="{META_NAME}" content="robinhood://instrument?id=a4ecd608">',
+        *(f'<meta property="og:tag{i}" content="value {i}">' for i in range(40)),
+    ]
+    row = '<div class="css-1"><span class="css-2">NVDA</span><p>lorem ipsum</p></div>'
+    body = [row] * (filler_kb * 1024 // len(row))
+    next_data = {
+        "props": {
+            "pageProps": {
+                "dehydratedState": {
+                    "queries": [{"state": {"data": "token"}}]
+                    + [{"state": {"data": list(range(50))}}] * 400
+                }
+            }
+        }
+    }
+    return (
+        "<!DOCTYPE html><html><head>"
+        + "".join(head)
+        + "</head><body>"
+        + "".join(body)
+        + '<script id="__NEXT_DATA__" type="application/json">'
+        + json.dumps(next_data)
+        + "</script></body></html>"
+    )
+
+
+def measure(func: Callable[[], object], number: int) -> Tuple[float, int]:
+    """(호출당 평균 ms, 최대 할당 바이트) 를 반환합니다."""
+    func()
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    elapsed = (time.perf_counter() - start) / number * 1000
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def streamed_bytes(text: str) -> int:
+    """CHUNK_SIZE 단위로 읽을 때 meta 태그를 찾기까지 읽는 바이트 수"""
+    data = text.encode()
+    scanner = MarkerScanner(meta_tag_markers(META_NAME))
+    for start in range(0, len(data), CHUNK_SIZE):
+        if scanner.feed(data[start : start + CHUNK_SIZE]):
+            break
+    return len(scanner.buffer)
+
+
+def run(pages: List[Tuple[str, str]], number: int) -> None:
+    cases = [
+        (
+            "__NEXT_DATA__",
+            lambda text: RobinHood._extract_next_data(text),
+            extract_next_data,
+        ),
+        (
+            "instrument meta",
+            lambda text: RobinHood._extract_meta_content(text, META_NAME),
+            lambda text: extract_meta_content(text, META_NAME),
+        ),
+    ]
+
+    for label, text in pages:
+        print(f"{label}: {len(text.encode()) / 1024:.0f} KiB")
+        for case, bs4_extract, fast_extract in cases:
+            assert bs4_extract(text) == fast_extract(text), case
+            bs4_ms, bs4_peak = measure(lambda: bs4_extract(text), number)
+            fast_ms, fast_peak = measure(lambda: fast_extract(text), number)
+            print(
+                f"  {case:<16} bs4 {bs4_ms:8.2f} ms {bs4_peak / 1024:8.0f} KiB"
+                f" | targeted {fast_ms:6.2f} ms {fast_peak / 1024:6.0f} KiB"
+                f" | {bs4_ms / fast_ms:5.0f}x faster"
+            )
+        print(
+            f"  streaming stops meta lookup after "
+            f"{streamed_bytes(text) / 1024:.0f} KiB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--html", nargs="*", default=[], help="저장된 HTML 파일")
+    parser.add_argument("--number", type=int, default=10, help="반복 횟수")
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.html:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    if not pages:
+        pages.append(("synthetic", synthetic_page()))
+
+    run(pages, args.number)
+
+
+if __name__ == "__main__":
+    main()
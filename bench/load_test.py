@@ -0,0 +1,406 @@
+"""로컬 가짜 업스트림과 가짜 Bot API 로 돌리는 봇 부하 테스트
+
+실제 Application 과 명령어 핸들러를 그대로 쓰고, 외부 요청만 bench.fake_servers
+로 보냅니다. 명령어 비율과 동시성을 정해서 업데이트를 흘려보내고 처리량, 명령어별
+지연 시간 백분위수, 메모리를 출력합니다. 가짜 서버도 같은 이벤트 루프에서 돌기
+때문에 지연 시간에는 가짜 서버의 처리 시간이 조금 포함됩니다.
+
+    python -m bench.load_test
+    python -m bench.load_test --requests 2000 --concurrency 50 --mix kospi=4,us=3,usd=2,btc=1
+    python -m bench.load_test --upstream-latency-ms 80 --upstream-error-rate 0.02 \\
+        --json report.json --max-p99-ms 1500
+    python -m bench.load_test --mix coin=3,btc=1 --upbit-stream
+    python -m bench.load_test --mix inline=1 --concurrency 10
+    python -m bench.load_test --mix us=1 --host-fault bonfire.robinhood.com:0:1
+
+"inline" 은 종목명/티커를 한 글자씩 입력하는 인라인 질의 업데이트를 만듭니다.
+"""
+
+import argparse
+import asyncio
+import configparser
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from bench.fake_servers import (
+    CRYPTO_MARKETS,
+    KOREAN_STOCKS,
+    US_TICKERS,
+    FakeTelegram,
+    FakeUpbitStream,
+    FakeUpstream,
+    FaultProfile,
+)
+from commands.commands import CommandHandler
+from commands.stock import stock
+from commands.stock.upbit_feed import upbit_feed
+from config import build_application
+from create_commands import create_commands
+
+DEFAULT_MIX = "kospi=4,us=3,usd=2,btc=1"
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    """ "kospi=4,us=3" 형식의 명령어 비율을 [(명령어, 가중치)] 로 바꿉니다."""
+    result = []
+    for item in mix.split(","):
+        command, _, weight = item.partition("=")
+        result.append((command.strip(), int(weight or 1)))
+    return result
+
+
+def command_text(command: str, rng: random.Random) -> str:
+    """명령어마다 실제 사용과 비슷한 인자를 붙인 메시지를 만듭니다."""
+    names = [name for name, _ in KOREAN_STOCKS]
+    if command == "kospi":
+        if rng.random() < 0.3:
+            return "/kospi " + " ".join(rng.sample(names[:10], rng.randint(2, 4)))
+        return f"/kospi {rng.choice(names)}"
+    if command == "us":
+        if rng.random() < 0.5:
+            return "/us " + " ".join(rng.sample(US_TICKERS, rng.randint(2, 5)))
+        return f"/us {rng.choice(US_TICKERS)}"
+    if command == "coin":
+        symbols = [market.split("-")[1] for market in CRYPTO_MARKETS[:5]]
+        return "/coin " + " ".join(rng.sample(symbols, rng.randint(1, 4)))
+    if command == "fx":
+        codes = rng.sample(["USD", "JPY", "EUR", "CNY", "GBP"], rng.randint(1, 4))
+        return f"/fx {rng.choice(['', '100 ', '2500 '])}{' '.join(codes)}"
+    if command == "inline":
+        symbol = rng.choice([rng.choice(names), rng.choice(US_TICKERS)])
+        return f"@inline {symbol[: rng.randint(1, len(symbol))]}"
+    if command in ("usd", "jpy"):
+        return f"/{command} {rng.choice(['', '100', '2500'])}".strip()
+    return f"/{command}"
+
+
+def parse_host_fault(value: str) -> Tuple[str, FaultProfile]:
+    """ "호스트:지연ms:오류비율" 을 (호스트, FaultProfile) 로 바꿉니다."""
+    host, latency_ms, error_rate = (value.split(":") + ["0", "0"])[:3]
+    return host, FaultProfile(float(latency_ms), 0.0, float(error_rate))
+
+
+def update_label(update: object) -> str:
+    """지연 시간과 오류를 모을 때 쓰는 이름. 명령어이거나 "@inline" 입니다."""
+    if not isinstance(update, Update):
+        return "?"
+    if update.inline_query:
+        return "@inline"
+    return update.message.text.split()[0]
+
+
+def make_update(app: Application, update_id: int, chat_id: int, text: str) -> Update:
+    command = text.split()[0]
+    user = {"id": chat_id, "is_bot": False, "first_name": "bench"}
+    if command == "@inline":
+        return Update.de_json(
+            {
+                "update_id": update_id,
+                "inline_query": {
+                    "id": str(update_id),
+                    "from": user,
+                    "query": text.partition(" ")[2],
+                    "offset": "",
+                },
+            },
+            app.bot,
+        )
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": user,
+                "text": text,
+                "entities": [
+                    {"type": "bot_command", "offset": 0, "length": len(command)}
+                ],
+            },
+        },
+        app.bot,
+    )
+
+
+def bench_config(
+    args, telegram: FakeTelegram, upstream: FakeUpstream, stream: FakeUpbitStream = None
+):
+    config = configparser.ConfigParser()
+    config.read_dict(
+        {
+            "telegram": {
+                "token": "123456:BENCH",
+                "except_commands": "",
+                "base_url": telegram.base_url,
+            },
+            "http": {"http2": "false", "upstream_override": upstream.url},
+            "retry": {"telegram_base_delay": "0.05", "upstream_base_delay": "0.05"},
+            "cache": {"chart_store_dir": "chart_cache"},
+        }
+    )
+    if not args.real_rate_limits:
+        config.read_dict(
+            {
+                "outbound": {
+                    "global_rate": "1000000",
+                    "chat_rate": "1000000",
+                    "group_rate": "1000000",
+                    "burst": "1000000",
+                }
+            }
+        )
+    if stream is not None:
+        config.read_dict({"upbit": {"stream": "true", "stream_url": stream.url}})
+    if args.cache_ttl is not None:
+        config.read_dict(
+            {
+                "cache": {
+                    f"ttl_{source}": str(args.cache_ttl)
+                    for source in (
+                        "naver_market",
+                        "naver_stock",
+                        "robinhood",
+                        "upbit_forex",
+                        "upbit_ticker",
+                    )
+                }
+            }
+        )
+    return config
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """nearest-rank 방식의 p50/p95/p99 와 최댓값(ms)"""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+    return {
+        "p50": rank(0.5) * 1000,
+        "p95": rank(0.95) * 1000,
+        "p99": rank(0.99) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+async def drive(
+    app: Application, updates: List[Update], concurrency: int
+) -> Tuple[Dict[str, List[float]], float]:
+    """concurrency 개의 작업자로 업데이트를 처리하고 명령어별 지연 시간을 모읍니다."""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    queue = iter(updates)
+
+    async def worker():
+        for update in queue:
+            command = update_label(update)
+            start = time.perf_counter()
+            await app.process_update(update)
+            latencies[command].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def run(args) -> Dict:
+    upstream = FakeUpstream(
+        FaultProfile(
+            args.upstream_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate
+        ),
+        recordings=args.recordings,
+        host_faults=dict(args.host_fault),
+    )
+    telegram = FakeTelegram(
+        FaultProfile(
+            args.telegram_latency_ms, args.telegram_jitter_ms, args.telegram_error_rate
+        )
+    )
+    await upstream.server.start()
+    await telegram.server.start()
+    stream = FakeUpbitStream() if args.upbit_stream else None
+    if stream:
+        await stream.start()
+
+    config = bench_config(args, telegram, upstream, stream)
+    app = build_application(config)
+    create_commands(CommandHandler(app, config))
+
+    errors: Counter = Counter()
+
+    async def count_error(update: object, context: ContextTypes.DEFAULT_TYPE):
+        command = update_label(update)
+        errors[command] += 1
+        logging.debug(f"{command} failed: {context.error!r}")
+
+    app.add_error_handler(count_error)
+
+    await app.initialize()
+    await stock.load_stock_data(None)
+    if stream:
+        upbit_feed.start()
+        while not upbit_feed.get(CRYPTO_MARKETS[0]):
+            await asyncio.sleep(0.05)
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    commands = [command for command, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def updates(count: int, offset: int) -> List[Update]:
+        return [
+            make_update(
+                app,
+                offset + i,
+                rng.randint(1, args.chats),
+                command_text(rng.choices(commands, weights)[0], rng),
+            )
+            for i in range(count)
+        ]
+
+    await drive(app, updates(args.warmup, 0), args.concurrency)
+    errors.clear()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    latencies, elapsed = await drive(
+        app, updates(args.requests, args.warmup), args.concurrency
+    )
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else 0
+    tracemalloc.stop()
+
+    await app.shutdown()
+    await app.post_shutdown(app)
+    await upstream.server.close()
+    await telegram.server.close()
+    if stream:
+        await stream.close()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "duration_s": elapsed,
+        "throughput_rps": args.requests / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "all": percentiles(all_latencies),
+            **{command: percentiles(values) for command, values in latencies.items()},
+        },
+        "count": {command: len(values) for command, values in latencies.items()},
+        "errors": dict(errors),
+        "error_rate": sum(errors.values()) / args.requests if args.requests else 0.0,
+        "upstream_requests": dict(upstream.requests),
+        "telegram_calls": dict(telegram.calls),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "tracemalloc_peak_mb": traced_peak / 1024 / 1024,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"{report['requests']} updates, concurrency {report['concurrency']}:"
+        f" {report['duration_s']:.2f}s, {report['throughput_rps']:.1f} updates/s,"
+        f" error rate {report['error_rate'] * 100:.2f}%"
+    )
+    print(f"  {'command':<10} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for command, values in report["latency_ms"].items():
+        count = report["count"].get(command, report["requests"])
+        print(
+            f"  {command:<10} {count:>6}"
+            + "".join(f" {values[key]:>6.1f}ms" for key in ("p50", "p95", "p99", "max"))
+        )
+    print(f"  upstream requests: {report['upstream_requests']}")
+    print(f"  telegram calls: {report['telegram_calls']}")
+    memory = f"  max RSS {report['max_rss_mb']:.1f} MiB"
+    if report["tracemalloc_peak_mb"]:
+        memory += f", traced peak {report['tracemalloc_peak_mb']:.1f} MiB"
+    print(memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="측정할 업데이트 수")
+    parser.add_argument("--warmup", type=int, default=50, help="측정 전 업데이트 수")
+    parser.add_argument("--concurrency", type=int, default=20, help="동시 처리 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="명령어=가중치 목록")
+    parser.add_argument("--chats", type=int, default=200, help="보내는 채팅 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--upstream-latency-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30.0)
+    parser.add_argument("--telegram-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--telegram-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--host-fault",
+        type=parse_host_fault,
+        action="append",
+        default=[],
+        help="호스트:지연ms:오류비율. 호스트 하나만 느리게 하거나 실패시킴 (반복 가능)",
+    )
+    parser.add_argument("--recordings", help="녹화한 업스트림 응답 디렉터리")
+    parser.add_argument(
+        "--upbit-stream",
+        action="store_true",
+        help="가짜 업비트 WebSocket 스트림으로 암호화폐 시세를 받음",
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, help="모든 시세 캐시 TTL(초)을 이 값으로 고정"
+    )
+    parser.add_argument(
+        "--real-rate-limits",
+        action="store_true",
+        help="전송 스케줄러의 실제 Telegram 한도를 적용",
+    )
+    parser.add_argument("--tracemalloc", action="store_true", help="할당 최대치 측정")
+    parser.add_argument("--json", help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument("--max-p99-ms", type=float, help="전체 p99 상한 (CI 용)")
+    parser.add_argument("--max-error-rate", type=float, help="오류 비율 상한 (CI 용)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if args.recordings:
+        args.recordings = os.path.abspath(args.recordings)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # 봇이 쓰는 스냅샷/DB/차트 파일은 임시 디렉터리에 만듭니다.
+    with tempfile.TemporaryDirectory(prefix="bot-bench-") as directory:
+        os.chdir(directory)
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    p99 = report["latency_ms"]["all"]["p99"]
+    if args.max_p99_ms is not None and p99 > args.max_p99_ms:
+        failures.append(f"p99 {p99:.1f}ms > {args.max_p99_ms}ms")
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failures.append(
+            f"error rate {report['error_rate']:.3f} > {args.max_error_rate}"
+        )
+    if failures:
+        print("FAIL: " + ", ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
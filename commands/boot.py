@@ -0,0 +1,39 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class BootTimer:
+    """봇 기동 시간을 단계별로 기록합니다."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """with 블록 동안 걸린 시간을 name 단계로 기록합니다."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, elapsed: float) -> None:
+        self.phases.append((name, elapsed))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def report(self) -> str:
+        lines = [f"Startup report ({self.elapsed() * 1000:.1f} ms since boot)"]
+        for name, elapsed in self.phases:
+            lines.append(f"  {name:<28} {elapsed * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def log_report(self) -> None:
+        logging.info(self.report())
+
+
+boot_timer = BootTimer()
@@ -7,6 +7,9 @@ from telegram.ext import Application
 from telegram.ext import CommandHandler as _CommandHandler
 from telegram.ext import ContextTypes
 
+from commands import sender
+from commands.metrics import metrics
+
 
 class CommandHandler:
     def __init__(self, app: Application, config):
@@ -24,10 +27,20 @@ class CommandHandler:
     def set_command(self, command: str, func, /, help_text: List[str] = None):
         if command not in self.except_commands:
             logging.info(f"Setting command: {command}")
-            self.app.add_handler(_CommandHandler(command, func))
+            self.app.add_handler(
+                _CommandHandler(command, metrics.instrument(command, func))
+            )
             if help_text:
                 assert isinstance(help_text, list), "helps must be list"
                 self.help_list.extend(help_text)
 
+    def set_handler(self, name: str, handler_class, func, /, **kwargs):
+        """인라인 질의나 버튼 콜백처럼 명령어가 아닌 업데이트의 핸들러를 등록합니다."""
+        if name not in self.except_commands:
+            logging.info(f"Setting handler: {name}")
+            self.app.add_handler(
+                handler_class(metrics.instrument(name, func), **kwargs)
+            )
+
     async def help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("\n".join(self.help_list))
+        await sender.reply_text(update, "\n".join(self.help_list))
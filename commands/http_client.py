@@ -0,0 +1,224 @@
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from commands.metrics import metrics
+
+
+@dataclass
+class HTTPClientConfig:
+    """업스트림 HTTP 커넥션 풀 설정"""
+
+    pool_size: int = 20
+    keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    http2: bool = True
+    upstream_override: str = ""
+
+    @classmethod
+    def from_config(cls, config) -> "HTTPClientConfig":
+        """config.ini 의 [http] 섹션에서 설정을 읽습니다."""
+        if not config.has_section("http"):
+            return cls()
+
+        section = config["http"]
+        default = cls()
+        return cls(
+            pool_size=section.getint("pool_size", default.pool_size),
+            keepalive_connections=section.getint(
+                "keepalive_connections", default.keepalive_connections
+            ),
+            keepalive_expiry=section.getfloat(
+                "keepalive_expiry", default.keepalive_expiry
+            ),
+            timeout=section.getfloat("timeout", default.timeout),
+            connect_timeout=section.getfloat(
+                "connect_timeout", default.connect_timeout
+            ),
+            http2=section.getboolean("http2", default.http2),
+            upstream_override=section.get(
+                "upstream_override", default.upstream_override
+            ),
+        )
+
+
+def _override_upstream(request: httpx.Request, override: str) -> None:
+    """요청을 override 서버의 /<원래 호스트>/<원래 경로> 로 보냅니다.
+
+    벤치마크에서 모든 업스트림을 로컬 가짜 서버 하나로 돌리는 데 씁니다.
+    """
+    base = httpx.URL(override)
+    request.url = request.url.copy_with(
+        scheme=base.scheme,
+        host=base.host,
+        port=base.port,
+        raw_path=f"/{request.url.host}".encode() + request.url.raw_path,
+    )
+    request.headers["Host"] = base.netloc.decode()
+
+
+class _InstrumentedAsyncTransport(httpx.AsyncBaseTransport):
+    """요청마다 호스트별 응답 시간(헤더 수신까지)과 오류를 기록하는 transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, override: str = ""):
+        self._transport = transport
+        self._override = override
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if self._override:
+            _override_upstream(request, self._override)
+
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            metrics.observe_upstream(host, time.perf_counter() - start, True)
+            raise
+        metrics.observe_upstream(
+            host,
+            time.perf_counter() - start,
+            response.status_code >= 400,
+        )
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _InstrumentedTransport(httpx.BaseTransport):
+    """_InstrumentedAsyncTransport 의 동기 버전"""
+
+    def __init__(self, transport: httpx.BaseTransport, override: str = ""):
+        self._transport = transport
+        self._override = override
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if self._override:
+            _override_upstream(request, self._override)
+
+        start = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            metrics.observe_upstream(host, time.perf_counter() - start, True)
+            raise
+        metrics.observe_upstream(
+            host,
+            time.perf_counter() - start,
+            response.status_code >= 400,
+        )
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class HTTPClientRegistry:
+    """업스트림 호스트별로 재사용되는 HTTP 클라이언트 저장소
+
+    호스트마다 커넥션 풀을 하나씩 유지해서 keep-alive 로 TCP/TLS 핸드셰이크를
+    재사용합니다. 클라이언트는 처음 요청될 때 생성되고 애플리케이션 종료 시
+    close() 로 정리됩니다.
+    """
+
+    def __init__(self, config: HTTPClientConfig = None):
+        self.config = config or HTTPClientConfig()
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config: HTTPClientConfig) -> None:
+        """설정을 교체합니다. 이미 생성된 클라이언트에는 적용되지 않습니다."""
+        self.config = config
+
+    def get_async_client(self, url: str) -> httpx.AsyncClient:
+        """url 의 호스트에 해당하는 비동기 클라이언트를 반환합니다."""
+        key = self._host_key(url)
+        if client := self._async_clients.get(key):
+            return client
+
+        with self._lock:
+            if key not in self._async_clients:
+                logging.info(f"Creating async HTTP client for {key}")
+                self._async_clients[key] = httpx.AsyncClient(
+                    transport=_InstrumentedAsyncTransport(
+                        httpx.AsyncHTTPTransport(**self._transport_options()),
+                        self.config.upstream_override,
+                    ),
+                    **self._client_options(),
+                )
+            return self._async_clients[key]
+
+    def get_sync_client(self, url: str) -> httpx.Client:
+        """url 의 호스트에 해당하는 동기 클라이언트를 반환합니다.
+
+        이벤트 루프 밖(스레드, 시작 시점)에서 쓰는 요청 전용입니다.
+        """
+        key = self._host_key(url)
+        if client := self._sync_clients.get(key):
+            return client
+
+        with self._lock:
+            if key not in self._sync_clients:
+                logging.info(f"Creating sync HTTP client for {key}")
+                self._sync_clients[key] = httpx.Client(
+                    transport=_InstrumentedTransport(
+                        httpx.HTTPTransport(**self._transport_options()),
+                        self.config.upstream_override,
+                    ),
+                    **self._client_options(),
+                )
+            return self._sync_clients[key]
+
+    async def close(self) -> None:
+        """생성된 모든 클라이언트를 닫습니다."""
+        with self._lock:
+            async_clients = list(self._async_clients.values())
+            sync_clients = list(self._sync_clients.values())
+            self._async_clients.clear()
+            self._sync_clients.clear()
+
+        for client in async_clients:
+            await client.aclose()
+        for client in sync_clients:
+            client.close()
+
+    def _client_options(self) -> Dict:
+        return {
+            "follow_redirects": True,
+            "timeout": httpx.Timeout(
+                self.config.timeout, connect=self.config.connect_timeout
+            ),
+        }
+
+    def _transport_options(self) -> Dict:
+        return {
+            "http2": self.config.http2 and self._http2_available(),
+            "limits": httpx.Limits(
+                max_connections=self.config.pool_size,
+                max_keepalive_connections=self.config.keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+        }
+
+    @staticmethod
+    def _http2_available() -> bool:
+        return importlib.util.find_spec("h2") is not None
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,197 @@
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+# 지연 시간 히스토그램의 버킷 경계(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """고정 버킷 지연 시간 히스토그램
+
+    관측값을 버킷 개수로만 기억하므로 메모리가 일정하고, 백분위수는 버킷 안에서
+    선형 보간해서 추정합니다.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if seconds <= bound),
+            len(self.buckets),
+        )
+        self.counts[index] += 1
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """q (0~1) 백분위수 추정값(초)을 반환합니다."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max
+
+    def cumulative_counts(self) -> List[int]:
+        result, cumulative = [], 0
+        for count in self.counts:
+            cumulative += count
+            result.append(cumulative)
+        return result
+
+
+class MetricsRegistry:
+    """명령어와 업스트림 호스트별 호출 수, 오류 수, 지연 시간을 모읍니다.
+
+    업스트림 지표는 스레드에서 도는 동기 요청(KRX)에서도 기록되므로 lock 으로
+    보호합니다.
+    """
+
+    def __init__(self):
+        self.admin_ids: List[int] = []
+        self.prometheus_file = ""
+        # 여러 워커가 지표를 내보낼 때 시계열을 구분하는 worker 레이블 값입니다.
+        self.worker = ""
+        self._commands: Dict[str, LatencyHistogram] = {}
+        self._upstreams: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config) -> None:
+        """config.ini 의 [metrics] 섹션에서 관리자 ID 와 덤프 파일 경로를 읽습니다."""
+        if not config.has_section("metrics"):
+            return
+
+        section = config["metrics"]
+        self.admin_ids = [
+            int(user_id)
+            for user_id in section.get("admin_ids", "").split(",")
+            if user_id.strip()
+        ]
+        self.prometheus_file = section.get("prometheus_file", self.prometheus_file)
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.admin_ids
+
+    def observe_command(self, command: str, seconds: float, error: bool) -> None:
+        self._observe(self._commands, command, seconds, error)
+
+    def observe_upstream(self, host: str, seconds: float, error: bool) -> None:
+        self._observe(self._upstreams, host, seconds, error)
+
+    def _observe(
+        self, histograms: Dict[str, LatencyHistogram], name: str, seconds, error
+    ) -> None:
+        with self._lock:
+            if (histogram := histograms.get(name)) is None:
+                histogram = histograms[name] = LatencyHistogram()
+            histogram.observe(seconds, error)
+
+    def instrument(self, command: str, func: Callable) -> Callable:
+        """명령어 핸들러의 호출 수, 예외 수, 실행 시간을 기록하는 래퍼를 반환합니다."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.observe_command(command, time.perf_counter() - start, error)
+
+        return wrapper
+
+    def report(self) -> str:
+        """/stats 로 보여줄 요약 문자열을 반환합니다."""
+        lines = []
+        for title, histograms in (
+            ("명령어", self._commands),
+            ("업스트림", self._upstreams),
+        ):
+            lines.append(f"[{title}]")
+            with self._lock:
+                items = sorted(histograms.items())
+            if not items:
+                lines.append("  (기록 없음)")
+            for name, histogram in items:
+                lines.append(
+                    f"  {name}: n={histogram.count} err={histogram.errors}"
+                    f" p50={histogram.quantile(0.5) * 1000:.0f}ms"
+                    f" p95={histogram.quantile(0.95) * 1000:.0f}ms"
+                    f" p99={histogram.quantile(0.99) * 1000:.0f}ms"
+                )
+        return "\n".join(lines)
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition 형식으로 지표를 반환합니다."""
+        lines = []
+        for metric, label, histograms in (
+            ("bot_command", "command", self._commands),
+            ("bot_upstream", "host", self._upstreams),
+        ):
+            with self._lock:
+                items = sorted(histograms.items())
+
+            lines.append(f"# TYPE {metric}_latency_seconds histogram")
+            for name, histogram in items:
+                labels = self._labels(label, name)
+                bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(
+                        f'{metric}_latency_seconds_bucket{{{labels},le="{bound}"}}'
+                        f" {count}"
+                    )
+                lines.append(
+                    f"{metric}_latency_seconds_sum{{{labels}}} {histogram.total}"
+                )
+                lines.append(
+                    f"{metric}_latency_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines.append(f"# TYPE {metric}_errors_total counter")
+            for name, histogram in items:
+                labels = self._labels(label, name)
+                lines.append(f"{metric}_errors_total{{{labels}}} {histogram.errors}")
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, label: str, name: str) -> str:
+        labels = f'{label}="{name}"'
+        if self.worker:
+            labels += f',worker="{self.worker}"'
+        return labels
+
+    def dump(self, path: str = None) -> None:
+        """prometheus_text() 를 파일에 씁니다. node_exporter textfile 수집용입니다."""
+        path = path or self.prometheus_file
+        if not path:
+            return
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+        logging.debug(f"Metrics written to {path}")
+
+
+metrics = MetricsRegistry()
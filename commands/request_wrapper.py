@@ -1,4 +1,8 @@
-import requests
+import httpx
+
+from commands.http_client import http_clients
+from commands.retry import is_retryable_response, upstream_retry
+from commands.upstream_health import upstream_health
 
 
 class RequestWrapper:
@@ -9,13 +13,32 @@ class RequestWrapper:
             }
         self.headers = headers
 
-    def get(self, url, params=None, **kwargs):
-        return self._request_wrapper(requests.get, url, params=params, **kwargs)
+    async def get(self, url, params=None, **kwargs) -> httpx.Response:
+        return await self._request_wrapper("GET", url, params=params, **kwargs)
 
-    def post(self, url, data=None, json=None, **kwargs):
-        return self._request_wrapper(requests.post, url, data=data, json=json, **kwargs)
+    async def post(self, url, data=None, json=None, **kwargs) -> httpx.Response:
+        return await self._request_wrapper("POST", url, data=data, json=json, **kwargs)
 
-    def _request_wrapper(self, method, url, **kwargs):
+    def stream(self, url, params=None, **kwargs):
+        """응답 본문을 나눠 읽을 수 있는 async context manager 를 반환합니다."""
         if self.headers is not None:
             kwargs.setdefault("headers", self.headers)
-        return method(url, **kwargs)
+        client = http_clients.get_async_client(url)
+        return client.stream("GET", url, params=params, **kwargs)
+
+    async def _request_wrapper(self, method, url, **kwargs) -> httpx.Response:
+        if self.headers is not None:
+            kwargs.setdefault("headers", self.headers)
+        client = http_clients.get_async_client(url)
+        if method != "GET":
+            return await client.request(method, url, **kwargs)
+
+        # GET 은 멱등이므로 연결 오류나 429/5xx 응답이면 백오프 후 다시 요청합니다.
+        # 같은 이유로 느린 응답에 대한 hedging 요청도 GET 에만 적용합니다.
+        host = httpx.URL(url).host
+        return await upstream_retry.run(
+            lambda: upstream_health.call(
+                host, lambda: client.request(method, url, **kwargs)
+            ),
+            retry_if=is_retryable_response,
+        )
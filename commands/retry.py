@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Telegram 이 사진 URL 을 받아오지 못했을 때의 BadRequest 는 일시적인 오류입니다.
+TRANSIENT_BAD_REQUEST_MESSAGES = (
+    "failed to get http url content",
+    "wrong file identifier/http url specified",
+    "wrong type of the web page content",
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """다시 시도하면 성공할 수 있는 오류인지 확인합니다."""
+    if isinstance(error, BadRequest):
+        message = str(error).lower()
+        return any(text in message for text in TRANSIENT_BAD_REQUEST_MESSAGES)
+    if isinstance(error, (RetryAfter, TimedOut, NetworkError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def is_retryable_response(response: httpx.Response) -> bool:
+    """다시 요청해야 하는 HTTP 응답인지 확인합니다."""
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+
+def retry_after(value) -> Optional[float]:
+    """서버가 요청한 대기 시간(초)을 반환합니다. 없으면 None 을 반환합니다."""
+    if isinstance(value, RetryAfter):
+        seconds = value.retry_after
+        return seconds.total_seconds() if hasattr(seconds, "total_seconds") else seconds
+    if isinstance(value, httpx.HTTPStatusError):
+        value = value.response
+    if isinstance(value, httpx.Response):
+        try:
+            return float(value.headers["retry-after"])
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+class RetryPolicy:
+    """지수 백오프와 jitter 로 비동기 호출을 재시도하는 정책
+
+    대기는 asyncio.sleep 으로 하므로 재시도 중에도 다른 업데이트 처리가 멈추지
+    않습니다. RetryAfter 나 Retry-After 헤더가 있으면 그 시간만큼 기다리고,
+    deadline 안에 끝낼 수 없는 재시도는 하지 않습니다.
+    """
+
+    MAX_EXPONENT = 32
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+        deadline: Optional[float] = 15.0,
+    ):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def configure(self, config) -> None:
+        """config.ini 의 [retry] 섹션에서 <name>_attempts 같은 설정을 읽습니다."""
+        if not config.has_section("retry"):
+            return
+
+        section = config["retry"]
+        self.attempts = section.getint(f"{self.name}_attempts", self.attempts)
+        self.base_delay = section.getfloat(f"{self.name}_base_delay", self.base_delay)
+        self.max_delay = section.getfloat(f"{self.name}_max_delay", self.max_delay)
+        self.deadline = section.getfloat(f"{self.name}_deadline", self.deadline)
+
+    def backoff(self, attempt: int) -> float:
+        """attempt 번째 실패 후 기다릴 시간 (full jitter)
+
+        실패가 오래 이어져도 넘치지 않도록 지수는 MAX_EXPONENT 에서 멈춥니다.
+        """
+        exponent = min(attempt, self.MAX_EXPONENT)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**exponent))
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        deadline: Optional[float] = None,
+        retry_on: Callable[[BaseException], bool] = is_retryable,
+        retry_if: Callable[[T], bool] = None,
+    ) -> T:
+        """func 를 호출하고 재시도할 수 있는 실패이면 다시 호출합니다.
+
+        deadline 은 이 호출 전체에 쓸 수 있는 시간(초)으로, 지정하지 않으면 정책의
+        기본값을 씁니다. retry_if 가 True 를 반환하는 결과도 재시도하며, 재시도를
+        다 쓰면 마지막 결과를 그대로 반환합니다.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        expires_at = time.monotonic() + deadline if deadline else None
+
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic() if expires_at else None
+            try:
+                if remaining is not None:
+                    result = await asyncio.wait_for(func(), max(remaining, 0.001))
+                else:
+                    result = await func()
+            except Exception as e:
+                if not retry_on(e) or not await self._wait(attempt, e, expires_at):
+                    raise
+            else:
+                if retry_if is None or not retry_if(result):
+                    return result
+                if not await self._wait(attempt, result, expires_at):
+                    return result
+            attempt += 1
+
+    async def _wait(self, attempt: int, cause, expires_at: Optional[float]) -> bool:
+        """다음 시도 전까지 기다립니다. 더 시도할 수 없으면 False 를 반환합니다."""
+        if attempt + 1 >= self.attempts:
+            return False
+
+        delay = retry_after(cause)
+        if delay is None:
+            delay = self.backoff(attempt)
+        if expires_at is not None and time.monotonic() + delay >= expires_at:
+            return False
+
+        logging.warning(
+            f"Retrying {self.name} call in {delay:.2f}s"
+            f" ({attempt + 1}/{self.attempts - 1}): {cause!r}"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+
+telegram_retry = RetryPolicy("telegram", attempts=3, base_delay=1.0, deadline=30.0)
+upstream_retry = RetryPolicy("upstream", attempts=3, base_delay=0.3, deadline=10.0)
@@ -0,0 +1,349 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from telegram.error import RetryAfter
+
+from commands.retry import is_retryable, retry_after, telegram_retry
+
+
+class Priority(IntEnum):
+    """보내는 메시지의 우선순위. 값이 작을수록 먼저 보냅니다."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class QueueTimeoutError(Exception):
+    """보낼 차례가 오기 전에 우선순위별 최대 대기 시간이 지났습니다."""
+
+    def __init__(self, chat_id: int, waited: float):
+        super().__init__(f"Message to {chat_id} expired after {waited:.1f}s in queue")
+        self.chat_id = chat_id
+        self.waited = waited
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지고 최대 capacity 개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """토큰 하나를 쓸 수 있게 되는 시각(monotonic)을 반환합니다."""
+        self._refill(now)
+        ready_at = now
+        if self.tokens < 1:
+            ready_at = now + (1 - self.tokens) / self.rate
+        return max(ready_at, self.blocked_until)
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until: float) -> None:
+        """RetryAfter 를 받은 경우 until 까지 토큰을 내주지 않습니다."""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 0)
+
+    def idle(self, now: float) -> bool:
+        return self.ready_at(now) <= now and self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    sequence: int
+    chat_id: int = field(compare=False)
+    send: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    retry_on: Callable[[BaseException], bool] = field(compare=False)
+    started: bool = field(default=False, compare=False)
+
+
+class OutboundScheduler:
+    """Telegram 전송 한도를 지키면서 메시지를 내보내는 스케줄러
+
+    채팅마다 토큰 버킷(개인 채팅 chat_rate, 그룹 group_rate)과 전체 토큰
+    버킷(global_rate)을 두고, 두 버킷에 모두 토큰이 있을 때만 보냅니다. 보낼 수
+    있는 채팅 중에서는 우선순위가 높은(INTERACTIVE) 메시지를 먼저, 같은
+    우선순위면 먼저 들어온 메시지를 먼저 보냅니다. 한 채팅에는 한 번에 한
+    메시지만 보내므로 같은 채팅의 메시지 순서는 유지됩니다.
+
+    재시도와 telegram_retry 의 deadline 은 실제 전송에만 적용하고, 큐에서 기다리는
+    시간은 우선순위별 max_wait 로 제한합니다.
+    """
+
+    MAX_IDLE_BUCKETS = 1024
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        group_rate: float = 20 / 60,
+        burst: float = 3.0,
+        warn_depth: int = 50,
+        interactive_max_wait: float = 120.0,
+        bulk_max_wait: float = 600.0,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.warn_depth = warn_depth
+        self.max_wait = {
+            Priority.INTERACTIVE: interactive_max_wait,
+            Priority.BULK: bulk_max_wait,
+        }
+
+        self._global = TokenBucket(global_rate, burst)
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._queues: Dict[int, List[_Job]] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._sending: Set[int] = set()
+
+        self._depth = {priority: 0 for priority in Priority}
+        self._counters: Dict[str, float] = {
+            "started": 0,
+            "sent": 0,
+            "failed": 0,
+            "rate_limited": 0,
+            "expired": 0,
+            "max_depth": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def configure(self, config) -> None:
+        """config.ini 의 [outbound] 섹션에서 전송 한도를 읽습니다."""
+        if not config.has_section("outbound"):
+            return
+
+        section = config["outbound"]
+        self.global_rate = section.getfloat("global_rate", self.global_rate)
+        self.chat_rate = section.getfloat("chat_rate", self.chat_rate)
+        self.group_rate = section.getfloat("group_rate", self.group_rate)
+        self.burst = section.getfloat("burst", self.burst)
+        self.warn_depth = section.getint("warn_depth", self.warn_depth)
+        for priority in Priority:
+            key = f"{priority.name.lower()}_max_wait"
+            self.max_wait[priority] = section.getfloat(key, self.max_wait[priority])
+        self._global = TokenBucket(self.global_rate, self.burst)
+        self._buckets.clear()
+
+    async def submit(
+        self,
+        chat_id: int,
+        send: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.INTERACTIVE,
+        retry_on: Callable[[BaseException], bool] = is_retryable,
+    ) -> Any:
+        """보낼 순서가 되면 send() 를 호출하고 그 결과를 반환합니다.
+
+        retry_on 이 True 를 반환하는 실패는 telegram_retry 정책으로 다시 보냅니다.
+        max_wait 안에 보낼 차례가 오지 않으면 QueueTimeoutError 를 발생시킵니다.
+        """
+        self._ensure_dispatcher()
+
+        job = _Job(
+            priority=priority,
+            sequence=next(self._sequence),
+            chat_id=chat_id,
+            send=send,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic(),
+            retry_on=retry_on,
+        )
+        heapq.heappush(self._queues.setdefault(chat_id, []), job)
+        self._depth[priority] += 1
+
+        depth = self.depth()
+        if depth > self._counters["max_depth"]:
+            self._counters["max_depth"] = depth
+        if depth == self.warn_depth:
+            logging.warning(f"Outbound queue is saturated: {depth} messages waiting")
+
+        self._wakeup.set()
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(job.future), self.max_wait[priority]
+            )
+        except asyncio.TimeoutError:
+            if not job.started:
+                # 큐에 남은 작업은 차례가 오면 건너뜁니다.
+                job.future.cancel()
+                self._counters["expired"] += 1
+                raise QueueTimeoutError(chat_id, time.monotonic() - job.enqueued_at)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        return await job.future
+
+    def depth(self) -> int:
+        return sum(self._depth.values())
+
+    def stats(self) -> Dict[str, float]:
+        started = self._counters["started"]
+        return {
+            "queued": self.depth(),
+            **{f"queued_{p.name.lower()}": n for p, n in self._depth.items()},
+            "sent": self._counters["sent"],
+            "failed": self._counters["failed"],
+            "rate_limited": self._counters["rate_limited"],
+            "expired": self._counters["expired"],
+            "max_depth": self._counters["max_depth"],
+            "wait_avg_ms": (
+                self._counters["wait_total"] / started * 1000 if started else 0.0
+            ),
+            "wait_max_ms": self._counters["wait_max"] * 1000,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logging.info(
+            "Outbound stats: "
+            + ", ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in stats.items()
+            )
+        )
+
+    async def close(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        if (bucket := self._buckets.get(chat_id)) is None:
+            # 그룹/채널의 chat_id 는 음수입니다.
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self._buckets[chat_id] = TokenBucket(rate, self.burst)
+        return bucket
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+
+            job, wake_at = self._next_ready_job(now)
+            if job is not None:
+                global_ready_at = self._global.ready_at(now)
+                if global_ready_at <= now:
+                    self._start(job, now)
+                    continue
+                wake_at = global_ready_at
+
+            timeout = None if wake_at is None else max(wake_at - now, 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next_ready_job(self, now: float):
+        """지금 보낼 수 있는 가장 급한 작업과, 없으면 다음에 깨어날 시각을 반환합니다."""
+        best: Optional[_Job] = None
+        wake_at: Optional[float] = None
+        for chat_id, queue in list(self._queues.items()):
+            while queue and queue[0].future.done():
+                self._depth[heapq.heappop(queue).priority] -= 1
+            if not queue:
+                del self._queues[chat_id]
+                continue
+            if chat_id in self._sending:
+                continue
+
+            ready_at = self._bucket(chat_id).ready_at(now)
+            if ready_at > now:
+                wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+            elif best is None or queue[0] < best:
+                best = queue[0]
+        return best, wake_at
+
+    def _start(self, job: _Job, now: float) -> None:
+        queue = self._queues[job.chat_id]
+        heapq.heappop(queue)
+        if not queue:
+            del self._queues[job.chat_id]
+        self._depth[job.priority] -= 1
+        job.started = True
+        self._sending.add(job.chat_id)
+
+        self._global.consume(now)
+        self._bucket(job.chat_id).consume(now)
+
+        wait = now - job.enqueued_at
+        self._counters["started"] += 1
+        self._counters["wait_total"] += wait
+        self._counters["wait_max"] = max(self._counters["wait_max"], wait)
+
+        task = asyncio.create_task(self._run(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+        if len(self._buckets) > self.MAX_IDLE_BUCKETS:
+            for chat_id in [
+                chat_id
+                for chat_id, bucket in self._buckets.items()
+                if chat_id not in self._queues
+                and chat_id not in self._sending
+                and bucket.idle(now)
+            ]:
+                del self._buckets[chat_id]
+
+    async def _run(self, job: _Job) -> None:
+        try:
+            result = await telegram_retry.run(
+                job.send, retry_on=partial(self._should_retry, job)
+            )
+        except Exception as e:
+            self._finish(job, exception=e)
+        else:
+            self._finish(job, result=result)
+        finally:
+            self._sending.discard(job.chat_id)
+            self._wakeup.set()
+
+    def _should_retry(self, job: _Job, error: BaseException) -> bool:
+        if isinstance(error, RetryAfter):
+            self._counters["rate_limited"] += 1
+            self._bucket(job.chat_id).block(time.monotonic() + retry_after(error))
+        return job.retry_on(error)
+
+    def _finish(self, job: _Job, result=None, exception=None) -> None:
+        self._counters["failed" if exception else "sent"] += 1
+        if job.future.done():
+            return
+        if exception:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
+
+
+outbound = OutboundScheduler()
@@ -0,0 +1,47 @@
+from typing import Callable, Optional
+
+from telegram import Bot, Message, Update
+
+from commands.retry import is_retryable
+from commands.send_scheduler import Priority, outbound
+
+
+async def send_message(
+    bot: Bot,
+    chat_id: int,
+    text: str,
+    priority: Priority = Priority.INTERACTIVE,
+    **kwargs,
+) -> Message:
+    """전송 스케줄러와 재시도 정책을 거쳐 메시지를 보냅니다."""
+    return await outbound.submit(
+        chat_id,
+        lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs),
+        priority,
+    )
+
+
+async def reply_text(update: Update, text: str, **kwargs) -> Message:
+    """전송 스케줄러와 재시도 정책을 거쳐 명령어 메시지에 답장합니다."""
+    return await outbound.submit(
+        update.message.chat_id,
+        lambda: update.message.reply_text(text, **kwargs),
+    )
+
+
+async def send_photo(
+    bot: Bot,
+    chat_id: int,
+    photo,
+    caption: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    retry_on: Callable[[BaseException], bool] = is_retryable,
+    **kwargs,
+) -> Message:
+    """전송 스케줄러와 재시도 정책을 거쳐 사진을 보냅니다."""
+    return await outbound.submit(
+        chat_id,
+        lambda: bot.send_photo(chat_id=chat_id, photo=photo, caption=caption, **kwargs),
+        priority,
+        retry_on,
+    )
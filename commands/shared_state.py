@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from commands.sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+class SharedStore(ABC):
+    """여러 워커 프로세스가 함께 쓰는 TTL 키-값 저장소의 인터페이스
+
+    값은 JSON 으로 저장하고, 만료 시각은 프로세스끼리 비교할 수 있도록
+    time.time() 기준입니다.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """(값, 만료 시각) 을 반환합니다. 없거나 만료되었으면 None 을 반환합니다."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """value 를 ttl 초 동안 저장합니다."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSharedStore(SQLiteStore, SharedStore):
+    """같은 호스트의 워커끼리 공유하는 SQLite(WAL) 저장소"""
+
+    SCHEMA = SCHEMA
+    TIMEOUT = 1.0
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._writes = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value, expires_at FROM entries"
+                " WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.connection.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?", (now,)
+                )
+
+
+class RedisSharedStore(SharedStore):
+    """Redis 호환 서버를 쓰는 저장소. 선택 의존성인 redis 패키지가 필요합니다."""
+
+    def __init__(self, url: str, prefix: str = "bot:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "[shared] backend = redis needs the optional redis package"
+                " (pipenv run pip install redis)"
+            ) from e
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        raw = self._client.get(f"{self.prefix}{namespace}:{key}")
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], entry["expires_at"]
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        entry = {"value": value, "expires_at": time.time() + ttl}
+        self._client.set(
+            f"{self.prefix}{namespace}:{key}",
+            json.dumps(entry, ensure_ascii=False),
+            px=max(int(ttl * 1000), 1),
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class SharedState:
+    """설정에 따라 공유 저장소를 만들어 두는 진입점
+
+    backend 가 none(기본값)이면 store 는 None 이고 모든 캐시는 프로세스 안에서만
+    동작합니다. 저장소 오류는 캐시 미스로 취급해서 요청 처리를 막지 않습니다.
+    저장소 I/O 가 이벤트 루프를 막지 않도록 읽기는 스레드에서 하고, 쓰기는
+    스레드에 넘기고 기다리지 않습니다.
+    """
+
+    def __init__(self):
+        self.store: Optional[SharedStore] = None
+        self._writes: Set[asyncio.Future] = set()
+
+    def configure(self, config) -> None:
+        """config.ini 의 [shared] 섹션에서 backend(none/sqlite/redis)를 읽습니다."""
+        if not config.has_section("shared"):
+            return
+
+        section = config["shared"]
+        backend = section.get("backend", "none").strip().lower()
+        if backend == "sqlite":
+            self.store = SQLiteSharedStore(section.get("path", "shared_state.db"))
+        elif backend == "redis":
+            self.store = RedisSharedStore(
+                section.get("redis_url", "redis://localhost:6379/0"),
+                section.get("redis_prefix", "bot:"),
+            )
+        elif backend not in ("", "none"):
+            raise ValueError(f"Unknown shared backend in config.ini: {backend}")
+
+        if self.store:
+            logging.info(f"Using shared {backend} state backend")
+
+    async def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        if self.store is None:
+            return None
+        return await asyncio.to_thread(self._get, namespace, key)
+
+    async def get_many(
+        self, namespace: str, keys: List[str]
+    ) -> Dict[str, Tuple[Any, float]]:
+        """여러 키를 스레드 하나에서 읽습니다. 없는 키는 결과에서 빠집니다."""
+        if self.store is None or not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many, namespace, keys)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        if self.store is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._set(namespace, key, value, ttl)
+            return
+
+        future = loop.run_in_executor(None, self._set, namespace, key, value, ttl)
+        self._writes.add(future)
+        future.add_done_callback(self._writes.discard)
+
+    def _get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            return self.store.get(namespace, key)
+        except Exception as e:
+            logging.warning(f"Shared state read failed: {str(e)}")
+            return None
+
+    def _get_many(
+        self, namespace: str, keys: List[str]
+    ) -> Dict[str, Tuple[Any, float]]:
+        entries = {}
+        for key in keys:
+            if (entry := self._get(namespace, key)) is not None:
+                entries[key] = entry
+        return entries
+
+    def _set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        try:
+            self.store.set(namespace, key, value, ttl)
+        except Exception as e:
+            logging.warning(f"Shared state write failed: {str(e)}")
+
+    async def close(self) -> None:
+        """남은 쓰기를 마치고 저장소를 닫습니다."""
+        if self._writes:
+            await asyncio.gather(*self._writes)
+        if self.store is not None:
+            self.store.close()
+
+
+shared_state = SharedState()
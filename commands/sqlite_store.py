@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class SQLiteStore:
+    """WAL 모드 SQLite 저장소의 공통 부분
+
+    연결은 처음 쓸 때 열고 SCHEMA 를 적용합니다. 여러 스레드(asyncio.to_thread)
+    에서 써도 되도록 하나의 연결을 RLock 으로 감쌉니다.
+    """
+
+    SCHEMA = ""
+    # 다른 프로세스가 쓰는 중일 때 기다릴 시간(초)
+    TIMEOUT = 5.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=self.TIMEOUT,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    @contextmanager
+    def transaction(self, mode: str = "") -> Iterator[sqlite3.Connection]:
+        """잠금을 잡고 트랜잭션을 엽니다. 예외가 나면 되돌립니다."""
+        with self._lock:
+            connection = self.connection
+            connection.execute(f"BEGIN {mode}".strip())
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,63 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from commands import sender
+from commands.metrics import metrics
+from commands.send_scheduler import outbound
+from commands.stock.alerts import alert_scheduler
+from commands.stock.fallback import fallback_chain
+from commands.stock.inline import inline_search
+from commands.stock.prefetch import prefetcher
+from commands.stock.quote_cache import quote_cache
+from commands.stock.upbit_feed import upbit_feed
+from commands.upstream_health import upstream_health
+
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """관리자에게 명령어/업스트림 지연 시간과 큐, 캐시 상태를 보여줍니다."""
+    if not metrics.is_admin(update.effective_user.id):
+        return
+
+    queue = outbound.stats()
+    cache = quote_cache.stats()
+    fallback = fallback_chain.stats()
+    prefetch = prefetcher.stats()
+    alert = alert_scheduler.stats()
+    search = inline_search.stats()
+    message = "\n".join(
+        [
+            metrics.report(),
+            "[전송 큐]",
+            f"  queued={queue['queued']} max={queue['max_depth']}"
+            f" wait_avg={queue['wait_avg_ms']:.0f}ms"
+            f" wait_max={queue['wait_max_ms']:.0f}ms"
+            f" rate_limited={queue['rate_limited']} expired={queue['expired']}",
+            "[시세 캐시]",
+            "  " + " ".join(f"{key}={value}" for key, value in cache.items()),
+            "[대체 소스]",
+            "  " + " ".join(f"{key}={value}" for key, value in fallback.items()),
+            "[미리 가져오기]",
+            "  " + " ".join(f"{key}={value}" for key, value in prefetch.items()),
+            "[알림]",
+            "  " + " ".join(f"{key}={value}" for key, value in alert.items()),
+            "[인라인]",
+            "  " + " ".join(f"{key}={value}" for key, value in search.items()),
+        ]
+    )
+    if hosts := upstream_health.stats():
+        message += "\n[업스트림 상태]"
+        for host, health in hosts.items():
+            message += f"\n  {host}: " + " ".join(
+                f"{key}={value}" for key, value in health.items()
+            )
+    if upbit_feed.enabled:
+        feed = upbit_feed.stats()
+        message += "\n[업비트 스트림]\n  " + " ".join(
+            f"{key}={value}" for key, value in feed.items()
+        )
+    await sender.reply_text(update, message)
+
+
+async def dump_metrics(context: ContextTypes.DEFAULT_TYPE):
+    """[metrics] prometheus_file 이 설정되어 있으면 지표를 파일로 내보냅니다."""
+    metrics.dump()
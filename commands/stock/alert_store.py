@@ -0,0 +1,205 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from commands.sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watches (
+    chat_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    label TEXT NOT NULL,
+    last_price REAL,
+    PRIMARY KEY (chat_id, source, symbol)
+);
+CREATE INDEX IF NOT EXISTS watches_symbol ON watches (source, symbol);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    label TEXT NOT NULL,
+    op TEXT NOT NULL,
+    price REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_symbol ON alerts (source, symbol);
+CREATE INDEX IF NOT EXISTS alerts_chat ON alerts (chat_id);
+"""
+
+
+@dataclass
+class Watch:
+    chat_id: int
+    source: str
+    symbol: str
+    label: str
+    last_price: Optional[float] = None
+
+
+@dataclass
+class Alert:
+    id: int
+    chat_id: int
+    source: str
+    symbol: str
+    label: str
+    op: str
+    price: float
+
+
+class AlertStore(SQLiteStore):
+    """관심 종목(watch)과 가격 알림(alert)을 저장하는 SQLite 저장소
+
+    알림 조건 비교와 종목별 구독자 조회를 (source, symbol) 인덱스로 처리해서,
+    폴링 비용이 구독자 수가 아니라 종목 수에 비례하도록 합니다.
+    """
+
+    SCHEMA = SCHEMA
+
+    def count(self, chat_id: int) -> int:
+        """채팅 하나의 관심 종목과 알림 수의 합"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT (SELECT COUNT(*) FROM watches WHERE chat_id = ?)"
+                " + (SELECT COUNT(*) FROM alerts WHERE chat_id = ?)",
+                (chat_id, chat_id),
+            ).fetchone()
+        return row[0]
+
+    def add_watch(self, chat_id: int, source: str, symbol: str, label: str) -> bool:
+        """관심 종목을 추가합니다. 이미 있으면 False 를 반환합니다."""
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO watches (chat_id, source, symbol, label)"
+                " VALUES (?, ?, ?, ?)",
+                (chat_id, source, symbol, label),
+            )
+        return cursor.rowcount > 0
+
+    def remove_watch(self, chat_id: int, source: str, symbol: str) -> bool:
+        with self._lock:
+            cursor = self.connection.execute(
+                "DELETE FROM watches WHERE chat_id = ? AND source = ? AND symbol = ?",
+                (chat_id, source, symbol),
+            )
+        return cursor.rowcount > 0
+
+    def list_watches(self, chat_id: int) -> List[Watch]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT chat_id, source, symbol, label, last_price FROM watches"
+                " WHERE chat_id = ? ORDER BY source, label",
+                (chat_id,),
+            ).fetchall()
+        return [Watch(*row) for row in rows]
+
+    def add_alert(
+        self, chat_id: int, source: str, symbol: str, label: str, op: str, price: float
+    ) -> int:
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT INTO alerts (chat_id, source, symbol, label, op, price, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chat_id, source, symbol, label, op, price, time.time()),
+            )
+        return cursor.lastrowid
+
+    def remove_alert(self, chat_id: int, alert_id: int) -> bool:
+        with self._lock:
+            cursor = self.connection.execute(
+                "DELETE FROM alerts WHERE chat_id = ? AND id = ?", (chat_id, alert_id)
+            )
+        return cursor.rowcount > 0
+
+    def list_alerts(self, chat_id: int) -> List[Alert]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT id, chat_id, source, symbol, label, op, price FROM alerts"
+                " WHERE chat_id = ? ORDER BY id",
+                (chat_id,),
+            ).fetchall()
+        return [Alert(*row) for row in rows]
+
+    def symbols(self) -> Dict[str, Set[str]]:
+        """구독 중인 {source: {symbol}}. 구독자가 여럿이어도 한 번만 들어갑니다."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT source, symbol FROM watches"
+                " UNION SELECT source, symbol FROM alerts"
+            ).fetchall()
+        result: Dict[str, Set[str]] = {}
+        for source, symbol in rows:
+            result.setdefault(source, set()).add(symbol)
+        return result
+
+    def triggered(self, source: str, symbol: str, price: float) -> List[Alert]:
+        """price 로 조건을 만족한 알림을 반환합니다. 보낸 뒤 remove_alerts 로 지웁니다."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT id, chat_id, source, symbol, label, op, price FROM alerts"
+                " WHERE source = ? AND symbol = ?"
+                " AND ((op = '>=' AND ? >= price) OR (op = '<=' AND ? <= price))",
+                (source, symbol, price, price),
+            ).fetchall()
+        return [Alert(*row) for row in rows]
+
+    def remove_alerts(self, alert_ids: Iterable[int]) -> None:
+        with self.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM alerts WHERE id = ?",
+                [(alert_id,) for alert_id in alert_ids],
+            )
+
+    def moved_watches(
+        self, source: str, symbol: str, price: float, move: float
+    ) -> List[Watch]:
+        """마지막 알림 가격보다 move(비율) 이상 움직인 관심 종목을 반환합니다.
+
+        처음 보는 종목은 기준 가격만 기록합니다. 알림을 보낸 뒤
+        update_last_prices 로 마지막 알림 가격을 바꿉니다.
+        """
+        with self.transaction("IMMEDIATE") as connection:
+            rows = connection.execute(
+                "SELECT chat_id, source, symbol, label, last_price FROM watches"
+                " WHERE source = ? AND symbol = ? AND last_price > 0"
+                " AND abs(? / last_price - 1) >= ?",
+                (source, symbol, price, move),
+            ).fetchall()
+            connection.execute(
+                "UPDATE watches SET last_price = ?"
+                " WHERE source = ? AND symbol = ? AND last_price IS NULL",
+                (price, source, symbol),
+            )
+        return [Watch(*row) for row in rows]
+
+    def update_last_prices(self, watches: Iterable[Tuple[Watch, float]]) -> None:
+        """알림을 보낸 관심 종목의 마지막 알림 가격을 바꿉니다."""
+        with self.transaction() as connection:
+            connection.executemany(
+                "UPDATE watches SET last_price = ?"
+                " WHERE chat_id = ? AND source = ? AND symbol = ?",
+                [
+                    (price, watch.chat_id, watch.source, watch.symbol)
+                    for watch, price in watches
+                ],
+            )
+
+
+def parse_condition(text: str) -> Optional[Tuple[str, float]]:
+    """ ">= 100", "<=100" 같은 조건을 (연산자, 가격) 으로 바꿉니다."""
+    text = text.replace(" ", "").replace(",", "")
+    for op, normalized in ((">=", ">="), ("<=", "<="), (">", ">="), ("<", "<=")):
+        if text.startswith(op):
+            try:
+                return normalized, float(text[len(op) :])
+            except ValueError:
+                return None
+    return None
+
+
+def split_condition(text: str) -> Tuple[str, Optional[Tuple[str, float]]]:
+    """ "AAPL>=200", "KODEX 200 <= 10,000" 을 (종목, 조건) 으로 나눕니다."""
+    position = next((i for i, ch in enumerate(text) if ch in "<>"), len(text))
+    return text[:position].strip(), parse_condition(text[position:])
@@ -0,0 +1,461 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+from telegram import Bot, Update
+from telegram.error import Forbidden
+from telegram.ext import ContextTypes
+
+import commands.stock.stock_data as stock_data
+from commands import sender
+from commands.send_scheduler import Priority
+from commands.stock.alert_store import AlertStore, Watch, split_condition
+from commands.stock.market_hours import Market, is_open, seconds_until_open
+from commands.stock.quote_cache import quote_cache
+from commands.stock.stock import (
+    MarketDataFetcher,
+    crypto_market,
+    format_crypto_price,
+    rh,
+)
+
+SOURCE_MARKETS = {"kr": Market.KRX, "us": Market.US, "crypto": Market.CRYPTO}
+
+
+def is_korean_query(text: str) -> bool:
+    return any("가" <= ch <= "힣" or "ㄱ" <= ch <= "ㅎ" for ch in text)
+
+
+async def resolve_symbol(text: str) -> Optional[Tuple[str, str, str]]:
+    """입력을 (source, symbol, 표시 이름) 으로 바꿉니다.
+
+    6자리 숫자는 한국 종목코드, 한글이나 정확한 종목명은 한국 주식으로 봅니다.
+    $AAPL 처럼 $ 로 시작하면 미국 주식, KRW-BTC 처럼 마켓 코드를 쓰면 암호화폐입니다.
+    그 밖에는 조회한 적 있는 미국 종목(T 같은 한 글자 종목 포함), 업비트 마켓에 있는
+    암호화폐, 나머지 미국 주식 순서로 봅니다.
+    """
+    index = stock_data.get_index()
+    if text.isnumeric():
+        if len(text) != 6:
+            return None
+        return "kr", text, index.name_of(text) or text
+    if code := index.code_of(text):
+        return "kr", code, index.name_of(code) or text
+    if is_korean_query(text):
+        if code := index.lookup(text):
+            return "kr", code, index.name_of(code) or text
+        return None
+
+    ticker = text.upper()
+    if ticker.startswith("$"):
+        ticker = ticker.removeprefix("$")
+        return ("us", ticker, ticker) if ticker else None
+
+    market = crypto_market(text)
+    if "-" not in text and await rh.is_known(ticker):
+        return "us", ticker, ticker
+    if market in await MarketDataFetcher.fetch_crypto_markets():
+        return "crypto", market, market.removeprefix("KRW-")
+    return "us", ticker, ticker
+
+
+async def fetch_prices(source: str, symbols: List[str]) -> Dict[str, float]:
+    """source 별로 묶어서 현재가를 가져옵니다. 못 가져온 종목은 빠집니다.
+
+    한국 주식과 암호화폐는 요청 하나로, 미국 주식은 종목별 요청을 동시에 보냅니다.
+    """
+    if source == "kr":
+        stocks = await MarketDataFetcher.fetch_korean_stocks(symbols)
+        # 장애 중에 대신 쓴 오래된 가격으로는 알림을 보내지 않습니다.
+        return {
+            code: float(data["closePrice"].replace(",", ""))
+            for code, data in stocks.items()
+            if not data.get("stale")
+        }
+
+    if source == "crypto":
+        tickers = await MarketDataFetcher.fetch_cryptos(symbols)
+        return {market: float(data["trade_price"]) for market, data in tickers.items()}
+
+    # 시작 직후라 Robinhood 데이터를 아직 읽지 않았으면 읽을 때까지 기다립니다.
+    await rh.ensure_loaded()
+
+    semaphore = asyncio.Semaphore(MarketDataFetcher.US_STOCK_CONCURRENCY)
+
+    async def fetch(ticker: str) -> Optional[float]:
+        async with semaphore:
+            try:
+                data = await quote_cache.get_or_fetch(
+                    "robinhood", ticker, partial(rh.get_data, ticker)
+                )
+                return MarketDataFetcher.us_trade_price(data) if data else None
+            except Exception as e:
+                logging.warning(f"Failed to fetch US price {ticker}: {str(e)}")
+                return None
+
+    prices = await asyncio.gather(*(fetch(ticker) for ticker in symbols))
+    return {
+        ticker: price for ticker, price in zip(symbols, prices) if price is not None
+    }
+
+
+def format_price(source: str, price: float) -> str:
+    if source == "kr":
+        return f"{price:,.0f}원"
+    if source == "crypto":
+        return format_crypto_price(price)
+    return f"${price:,.2f}"
+
+
+@dataclass
+class Notification:
+    """보낼 알림 하나. 가격 알림이면 alert_id, 관심 종목이면 watch 가 있습니다."""
+
+    chat_id: int
+    text: str
+    price: float
+    alert_id: Optional[int] = None
+    watch: Optional[Watch] = None
+
+    @property
+    def key(self) -> Hashable:
+        if self.watch is not None:
+            return (self.watch.chat_id, self.watch.source, self.watch.symbol)
+        return self.alert_id
+
+
+class AlertScheduler:
+    """관심 종목과 가격 알림을 한 곳에서 확인하는 스케줄러
+
+    구독한 채팅 수와 상관없이 종목마다 한 번씩만 시세를 가져오고, 결과를
+    구독한 채팅에 나눠 보냅니다. 시장이 열려 있으면 open_interval 마다, 닫혀
+    있으면 closed_interval(다음 개장 전까지) 마다 확인합니다. 알림은 보내는 데
+    성공하면(또는 봇이 차단되었으면) 지우고, 관심 종목은 마지막으로 알린 가격에서
+    watch_move_percent 이상 움직이면 알리고 보내는 데 성공하면 마지막 알림 가격을
+    바꿉니다. 메시지는 명령어 응답보다 낮은 우선순위로, 확인과 따로 보냅니다. 저장소는 이벤트 루프를 막지 않도록 스레드에서 읽고 씁니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        path: str = "alerts.db",
+        open_interval: float = 15.0,
+        closed_interval: float = 600.0,
+        watch_move_percent: float = 3.0,
+        max_per_chat: int = 20,
+    ):
+        self.enabled = enabled
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self.watch_move_percent = watch_move_percent
+        self.max_per_chat = max_per_chat
+        self.store = AlertStore(path)
+        self._next_at: Dict[str, float] = {}
+        self._polls: Dict[str, asyncio.Task] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        # 보내는 중인 알림(Notification.key). 다음 확인에서 같은 알림을 다시 보내지 않습니다.
+        self._sending: Set[Hashable] = set()
+        self._counters: Dict[str, int] = {
+            "polls": 0,
+            "failures": 0,
+            "alerts_sent": 0,
+            "watch_sent": 0,
+        }
+
+    def configure(self, config) -> None:
+        """config.ini 의 [alerts] 섹션에서 확인 주기와 저장 경로를 읽습니다."""
+        if not config.has_section("alerts"):
+            return
+
+        section = config["alerts"]
+        self.enabled = section.getboolean("enabled", self.enabled)
+        self.open_interval = section.getfloat("open_interval", self.open_interval)
+        self.closed_interval = section.getfloat("closed_interval", self.closed_interval)
+        self.watch_move_percent = section.getfloat(
+            "watch_move_percent", self.watch_move_percent
+        )
+        self.max_per_chat = section.getint("max_per_chat", self.max_per_chat)
+        self.store = AlertStore(section.get("path", self.store.path))
+
+    def interval(self, market: Market) -> float:
+        if is_open(market):
+            return self.open_interval
+        return max(
+            self.open_interval, min(self.closed_interval, seconds_until_open(market))
+        )
+
+    async def run_due(self, bot: Bot) -> None:
+        """확인할 때가 된 source 의 확인을 시작합니다. 끝날 때까지 기다리지 않습니다.
+
+        같은 source 를 아직 확인하고 있으면 건너뜁니다.
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        for source, symbols in (await asyncio.to_thread(self.store.symbols)).items():
+            if (task := self._polls.get(source)) is not None and not task.done():
+                continue
+            if self._next_at.get(source, 0.0) > now:
+                continue
+            self._next_at[source] = now + self.interval(SOURCE_MARKETS[source])
+            self._polls[source] = asyncio.create_task(
+                self._poll(bot, source, sorted(symbols))
+            )
+
+    async def close(self) -> None:
+        """진행 중인 확인과 전송을 취소합니다."""
+        tasks = [*self._polls.values(), *self._deliveries]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _poll(self, bot: Bot, source: str, symbols: List[str]) -> None:
+        self._counters["polls"] += 1
+        try:
+            prices = await fetch_prices(source, symbols)
+        except Exception as e:
+            self._counters["failures"] += 1
+            logging.warning(f"Failed to poll {source} prices: {str(e)}")
+            return
+
+        notifications = await asyncio.to_thread(
+            self._collect, source, prices, frozenset(self._sending)
+        )
+        if not notifications:
+            return
+
+        # 보내는 데 오래 걸려도(BULK 는 큐에서 bulk_max_wait 까지 기다립니다)
+        # 다음 확인이 밀리지 않도록 전송은 따로 진행합니다.
+        self._sending |= {notification.key for notification in notifications}
+        task = asyncio.create_task(self._deliver(bot, notifications))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, bot: Bot, notifications: List["Notification"]) -> None:
+        """알림을 보내고, 보낸 알림은 지우고 관심 종목은 마지막 알림 가격을 바꿉니다."""
+        try:
+            results = await asyncio.gather(
+                *(
+                    sender.send_message(
+                        bot,
+                        notification.chat_id,
+                        notification.text,
+                        priority=Priority.BULK,
+                    )
+                    for notification in notifications
+                ),
+                return_exceptions=True,
+            )
+            done: List[int] = []
+            moved: List[Tuple[Watch, float]] = []
+            for notification, result in zip(notifications, results):
+                if isinstance(result, Exception):
+                    logging.error(
+                        f"Failed to send alert to {notification.chat_id}: {str(result)}"
+                    )
+                    # 봇을 차단한 채팅의 알림은 다시 보내지 않고 지웁니다.
+                    # 관심 종목은 마지막 알림 가격을 바꾸지 않아 다음 확인에서 다시 보냅니다.
+                    if not isinstance(result, Forbidden):
+                        continue
+                elif notification.watch is None:
+                    self._counters["alerts_sent"] += 1
+                else:
+                    self._counters["watch_sent"] += 1
+                if notification.alert_id is not None:
+                    done.append(notification.alert_id)
+                if notification.watch is not None:
+                    moved.append((notification.watch, notification.price))
+            if done:
+                await asyncio.to_thread(self.store.remove_alerts, done)
+            if moved:
+                await asyncio.to_thread(self.store.update_last_prices, moved)
+        finally:
+            self._sending -= {notification.key for notification in notifications}
+
+    def _collect(
+        self, source: str, prices: Dict[str, float], sending: FrozenSet[Hashable]
+    ) -> List["Notification"]:
+        """보낼 알림 목록. 보내는 중인 알림(sending)은 빼고 만듭니다."""
+        notifications: List[Notification] = []
+        for symbol, price in prices.items():
+            for alert in self.store.triggered(source, symbol, price):
+                if alert.id in sending:
+                    continue
+                notifications.append(
+                    Notification(
+                        alert.chat_id,
+                        f"🔔 {alert.label} {format_price(source, price)}"
+                        f" (알림 조건: {alert.op} {format_price(source, alert.price)})",
+                        price,
+                        alert_id=alert.id,
+                    )
+                )
+
+            move = self.watch_move_percent / 100
+            for watch in self.store.moved_watches(source, symbol, price, move):
+                if (watch.chat_id, source, symbol) in sending:
+                    continue
+                change = (price / watch.last_price - 1) * 100
+                icon = "📈" if change >= 0 else "📉"
+                notifications.append(
+                    Notification(
+                        watch.chat_id,
+                        f"{icon} {watch.label} {format_price(source, price)}"
+                        f" ({change:+.2f}%, 지난 알림 이후)",
+                        price,
+                        watch=watch,
+                    )
+                )
+        return notifications
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._counters,
+            "symbols": sum(len(symbols) for symbols in self.store.symbols().values()),
+        }
+
+
+alert_scheduler = AlertScheduler()
+
+
+async def check_alerts(context: ContextTypes.DEFAULT_TYPE):
+    """관심 종목과 가격 알림을 확인합니다."""
+    await alert_scheduler.run_due(context.bot)
+
+
+def split_symbols(args: List[str]) -> List[str]:
+    """공백이 들어간 종목명(예: KODEX 200)은 한 종목으로 취급합니다."""
+    joined = " ".join(args)
+    if len(args) > 1 and stock_data.get_index().code_of(joined):
+        return [joined]
+    return args
+
+
+async def watch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """관심 종목을 추가하거나, 인자가 없으면 관심 종목의 현재가를 보여줍니다."""
+    chat_id = update.message.chat_id
+    store = alert_scheduler.store
+    if not context.args:
+        watches = store.list_watches(chat_id)
+        if not watches:
+            return await sender.reply_text(update, "관심 종목이 없습니다.")
+
+        by_source: Dict[str, List[str]] = {}
+        for item in watches:
+            by_source.setdefault(item.source, []).append(item.symbol)
+        prices = dict(
+            zip(
+                by_source,
+                await asyncio.gather(
+                    *(
+                        fetch_prices(source, codes)
+                        for source, codes in by_source.items()
+                    )
+                ),
+            )
+        )
+        lines = []
+        for item in watches:
+            price = prices[item.source].get(item.symbol)
+            value = format_price(item.source, price) if price is not None else "-"
+            lines.append(f"{item.label}: {value}")
+        return await sender.reply_text(update, "\n".join(lines))
+
+    lines = []
+    for text in split_symbols(context.args):
+        if store.count(chat_id) >= alert_scheduler.max_per_chat:
+            lines.append(f"등록은 {alert_scheduler.max_per_chat}개까지 가능합니다.")
+            break
+        if (resolved := await resolve_symbol(text)) is None:
+            lines.append(f"{text}: 종목 정보를 찾지 못했습니다.")
+            continue
+
+        source, symbol, label = resolved
+        price = (await fetch_prices(source, [symbol])).get(symbol)
+        if price is None:
+            lines.append(f"{text}: 종목 정보를 찾지 못했습니다.")
+        elif store.add_watch(chat_id, source, symbol, label):
+            lines.append(
+                f"{label}: 관심 종목에 추가했습니다. ({format_price(source, price)})"
+            )
+        else:
+            lines.append(f"{label}: 이미 관심 종목입니다.")
+    await sender.reply_text(update, "\n".join(lines))
+
+
+async def unwatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """관심 종목을 지웁니다."""
+    if not context.args:
+        return await sender.reply_text(update, "/unwatch (종목) 형식으로 입력해주세요.")
+
+    lines = []
+    for text in split_symbols(context.args):
+        resolved = await resolve_symbol(text)
+        if resolved and alert_scheduler.store.remove_watch(
+            update.message.chat_id, *resolved[:2]
+        ):
+            lines.append(f"{resolved[2]}: 관심 종목에서 지웠습니다.")
+        else:
+            lines.append(f"{text}: 관심 종목이 아닙니다.")
+    await sender.reply_text(update, "\n".join(lines))
+
+
+async def alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """가격 알림을 등록하거나, 인자가 없으면 등록한 알림을 보여줍니다."""
+    chat_id = update.message.chat_id
+    store = alert_scheduler.store
+    if not context.args:
+        alerts = store.list_alerts(chat_id)
+        if not alerts:
+            return await sender.reply_text(update, "등록한 알림이 없습니다.")
+        return await sender.reply_text(
+            update,
+            "\n".join(
+                f"#{item.id} {item.label} {item.op} {format_price(item.source, item.price)}"
+                for item in alerts
+            ),
+        )
+
+    text, condition = split_condition(" ".join(context.args))
+    if not text or condition is None:
+        return await sender.reply_text(
+            update, "/alert (종목) >= (가격) 형식으로 입력해주세요."
+        )
+    if store.count(chat_id) >= alert_scheduler.max_per_chat:
+        return await sender.reply_text(
+            update, f"등록은 {alert_scheduler.max_per_chat}개까지 가능합니다."
+        )
+
+    resolved = await resolve_symbol(text)
+    price = None
+    if resolved:
+        price = (await fetch_prices(resolved[0], [resolved[1]])).get(resolved[1])
+    if price is None:
+        return await sender.reply_text(update, f"{text}: 종목 정보를 찾지 못했습니다.")
+
+    source, symbol, label = resolved
+    op, target = condition
+    alert_id = store.add_alert(chat_id, source, symbol, label, op, target)
+    await sender.reply_text(
+        update,
+        f"#{alert_id} {label} {op} {format_price(source, target)} 알림을 등록했습니다."
+        f" (현재 {format_price(source, price)})",
+    )
+
+
+async def unalert(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """번호로 가격 알림을 지웁니다."""
+    if not context.args or not context.args[0].lstrip("#").isnumeric():
+        return await sender.reply_text(
+            update, "/unalert (알림 번호) 형식으로 입력해주세요."
+        )
+
+    alert_id = int(context.args[0].lstrip("#"))
+    if alert_scheduler.store.remove_alert(update.message.chat_id, alert_id):
+        await sender.reply_text(update, f"#{alert_id} 알림을 지웠습니다.")
+    else:
+        await sender.reply_text(update, f"#{alert_id} 알림이 없습니다.")
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Union
+
+from telegram import Bot, Message
+from telegram.error import BadRequest
+
+from commands import sender
+from commands.retry import is_retryable
+from commands.shared_state import shared_state
+from commands.stock.enums import ChartType
+
+# 차트 이미지가 실제로 바뀌는 주기(초). 같은 구간 안에서는 같은 이미지를 재사용합니다.
+CHART_REFRESH_SECONDS: Dict[ChartType, int] = {
+    ChartType.REALTIME: 60,
+    ChartType.DAY: 300,
+    ChartType.WEEK: 3600,
+    ChartType.MONTHLY: 3600,
+    ChartType.MONTH_1: 3600,
+    ChartType.MONTH_3: 3600,
+    ChartType.YEAR: 6 * 3600,
+    ChartType.YERR_3: 6 * 3600,
+    ChartType.YEAR_10: 6 * 3600,
+}
+
+
+def chart_bucket(chart_type: ChartType, now: float = None) -> int:
+    """차트 갱신 주기 단위로 자른 시각(epoch 초)을 반환합니다."""
+    interval = CHART_REFRESH_SECONDS.get(chart_type, 60)
+    now = time.time() if now is None else now
+    return int(now // interval * interval)
+
+
+def _key_string(key: Hashable) -> str:
+    return "|".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class ChartFileIdCache:
+    """차트 이미지의 Telegram file_id 캐시
+
+    처음 업로드한 사진의 file_id 를 (종목, 차트 종류, 시간 구간) 키와 이미지
+    해시로 기억해 두고, 이후 같은 차트는 file_id 로 다시 보내서 업로드를
+    생략합니다. 두 맵 모두 max_entries 를 넘으면 LRU 로 제거합니다. 공유 저장소가
+    설정되어 있으면 다른 워커가 업로드한 file_id 도 재사용합니다.
+    """
+
+    def __init__(self, max_entries: int = 512, shared_ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.shared_ttl = shared_ttl
+        self._by_key: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._by_digest: "OrderedDict[str, str]" = OrderedDict()
+        self._counters: Dict[str, int] = {"hits": 0, "misses": 0, "uploads": 0}
+
+    def configure(self, config) -> None:
+        if config.has_section("cache"):
+            self.max_entries = config["cache"].getint(
+                "chart_max_entries", self.max_entries
+            )
+
+    async def get(self, key: Hashable) -> Optional[str]:
+        if (file_id := self._by_key.get(key)) is not None:
+            self._by_key.move_to_end(key)
+        elif entry := await shared_state.get("chart_key", _key_string(key)):
+            file_id = entry[0]
+            self._put(self._by_key, key, file_id)
+        return file_id
+
+    async def get_by_digest(self, digest: str) -> Optional[str]:
+        if (file_id := self._by_digest.get(digest)) is not None:
+            self._by_digest.move_to_end(digest)
+        elif entry := await shared_state.get("chart_digest", digest):
+            file_id = entry[0]
+            self._put(self._by_digest, digest, file_id)
+        return file_id
+
+    def put(self, key: Hashable, file_id: str, digest: str = None) -> None:
+        self._put(self._by_key, key, file_id)
+        shared_state.set("chart_key", _key_string(key), file_id, self.shared_ttl)
+        if digest:
+            self._put(self._by_digest, digest, file_id)
+            shared_state.set("chart_digest", digest, file_id, self.shared_ttl)
+
+    def discard(self, file_id: str) -> None:
+        """더 이상 쓸 수 없는 file_id 를 두 맵에서 모두 제거합니다."""
+        for entries in (self._by_key, self._by_digest):
+            for key in [k for k, f in entries.items() if f == file_id]:
+                del entries[key]
+
+    def _put(self, entries: OrderedDict, key: Hashable, file_id: str) -> None:
+        entries[key] = file_id
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "size": len(self._by_key)}
+
+    async def send_photo(
+        self,
+        bot: Bot,
+        chat_id: int,
+        key: Hashable,
+        photo: Optional[Union[bytes, str]],
+        caption: str,
+    ) -> Message:
+        """차트 사진을 보내고 file_id 를 캐시합니다.
+
+        photo 는 이미지 바이트나 URL 입니다. 같은 키나 같은 이미지가 이미 업로드된
+        적이 있으면 file_id 로 보냅니다. 키가 캐시에 있으면 photo 는 None 이어도
+        됩니다.
+        """
+        digest = hashlib.sha256(photo).hexdigest() if isinstance(photo, bytes) else None
+        file_id = await self.get(key) or (digest and await self.get_by_digest(digest))
+
+        if file_id:
+            self._counters["hits"] += 1
+            try:
+                # 거부된 file_id 는 다시 보내지 않고 원본으로 업로드합니다.
+                message = await sender.send_photo(
+                    bot,
+                    chat_id,
+                    file_id,
+                    caption,
+                    retry_on=lambda e: not isinstance(e, BadRequest)
+                    and is_retryable(e),
+                )
+                self.put(key, file_id, digest)
+                return message
+            except BadRequest as e:
+                logging.warning(f"Cached chart file_id rejected: {str(e)}")
+                self.discard(file_id)
+                if photo is None:
+                    raise
+        else:
+            self._counters["misses"] += 1
+
+        message = await sender.send_photo(bot, chat_id, photo, caption)
+        self._counters["uploads"] += 1
+        if message.photo:
+            self.put(key, message.photo[-1].file_id, digest)
+        return message
+
+
+chart_cache = ChartFileIdCache()
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from commands.request_wrapper import RequestWrapper
+
+# commands/stock/market_close.png 의 SHA-256. 장이 닫혔을 때 내려오는 안내 이미지입니다.
+MARKET_CLOSE_DIGEST = "3e269d08f6a7a49974f85db7e3361c6152760632bd23200cf9ed58ba512bc876"
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def is_market_close_image(content: bytes) -> bool:
+    """장 마감 안내 이미지인지 확인합니다."""
+    return content_digest(content) == MARKET_CLOSE_DIGEST
+
+
+@dataclass
+class ChartValidators:
+    """차트 URL 마다 저장하는 조건부 요청 정보"""
+
+    digest: str
+    bucket: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ChartImageStore:
+    """해시 이름으로 차트 이미지를 저장하는 작은 디스크 저장소
+
+    images/ 에는 <sha256>.png 를, urls/ 에는 URL 별 ETag/Last-Modified 를
+    저장합니다. 새 파일을 evict_every 개 쓸 때마다 디렉터리를 훑어서 파일이
+    max_files 를 넘으면 가장 오래 쓰지 않은 파일부터 지웁니다.
+
+    모든 메서드는 파일을 직접 읽고 쓰므로 이벤트 루프에서는
+    asyncio.to_thread 로 호출합니다.
+    """
+
+    def __init__(
+        self,
+        directory: str = "chart_cache",
+        max_files: int = 256,
+        evict_every: int = 32,
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self.evict_every = evict_every
+        self._new_files: Dict[str, int] = {}
+        self._evict_lock = threading.Lock()
+
+    def configure(self, config) -> None:
+        if config.has_section("cache"):
+            section = config["cache"]
+            self.directory = section.get("chart_store_dir", self.directory)
+            self.max_files = section.getint("chart_store_max_files", self.max_files)
+            self.evict_every = section.getint(
+                "chart_store_evict_every", self.evict_every
+            )
+
+    def get_image(self, digest: str) -> Optional[bytes]:
+        path = self._image_path(digest)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+
+    def put_image(self, content: bytes) -> str:
+        digest = content_digest(content)
+        path = self._image_path(digest)
+        if not os.path.exists(path):
+            self._write(path, content)
+            self._count_new_file("images")
+        return digest
+
+    def get_validators(self, url: str) -> Optional[ChartValidators]:
+        try:
+            with open(self._url_path(url), "r", encoding="utf-8") as f:
+                return ChartValidators(**json.load(f))
+        except (FileNotFoundError, TypeError, ValueError):
+            return None
+
+    def put_validators(self, url: str, validators: ChartValidators) -> None:
+        path = self._url_path(url)
+        is_new = not os.path.exists(path)
+        self._write(path, json.dumps(asdict(validators)).encode())
+        if is_new:
+            self._count_new_file("urls")
+
+    def remove_validators(self, url: str) -> None:
+        try:
+            os.unlink(self._url_path(url))
+        except FileNotFoundError:
+            pass
+
+    def load(self, url: str) -> Tuple[Optional[ChartValidators], Optional[bytes]]:
+        """(조건부 요청 정보, 이미지) 를 읽습니다.
+
+        이미지가 먼저 지워져서 없으면 조건부 요청 정보도 지우고 (None, None) 을
+        반환합니다. 그대로 두면 304 를 받아도 쓸 이미지가 없습니다.
+        """
+        if (validators := self.get_validators(url)) is None:
+            return None, None
+        if (content := self.get_image(validators.digest)) is None:
+            self.remove_validators(url)
+            return None, None
+        return validators, content
+
+    def _image_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "images", f"{digest}.png")
+
+    def _url_path(self, url: str) -> str:
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.directory, "urls", f"{name}.json")
+
+    @staticmethod
+    def _write(path: str, content: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def _count_new_file(self, subdirectory: str) -> None:
+        with self._evict_lock:
+            count = self._new_files.get(subdirectory, 0) + 1
+            self._new_files[subdirectory] = count % max(self.evict_every, 1)
+            if count >= self.evict_every:
+                self._evict(subdirectory)
+
+    def _evict(self, subdirectory: str) -> None:
+        directory = os.path.join(self.directory, subdirectory)
+        entries = []
+        for entry in os.scandir(directory):
+            try:
+                if entry.is_file():
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+        if len(entries) <= self.max_files:
+            return
+
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_files]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class ChartFetcher:
+    """차트 이미지를 조건부 요청과 디스크 캐시로 가져옵니다.
+
+    같은 갱신 구간(bucket) 안에서는 저장된 이미지를 그대로 쓰고, 구간이 바뀌면
+    ETag/Last-Modified 로 조건부 요청을 보내 304 이면 저장된 이미지를
+    재사용합니다.
+    """
+
+    def __init__(self, store: ChartImageStore):
+        self.store = store
+        self._counters: Dict[str, int] = {"fresh": 0, "not_modified": 0, "fetched": 0}
+
+    async def fetch(self, url: str, bucket: int) -> Optional[bytes]:
+        """url 의 이미지를 반환합니다. 실패하면 None 을 반환합니다."""
+        validators, content = await asyncio.to_thread(self.store.load, url)
+        if validators and validators.bucket == bucket:
+            self._counters["fresh"] += 1
+            return content
+
+        request_wrapper = RequestWrapper()
+        headers = dict(request_wrapper.headers)
+        if validators:
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+
+        response = await request_wrapper.get(
+            url, params={"timestamp": bucket}, headers=headers
+        )
+
+        if response.status_code == 304 and validators:
+            self._counters["not_modified"] += 1
+            validators.bucket = bucket
+            await asyncio.to_thread(self.store.put_validators, url, validators)
+            return content
+
+        if response.status_code != 200:
+            return None
+
+        self._counters["fetched"] += 1
+        await asyncio.to_thread(
+            self._store_response, url, bucket, response.content, response.headers
+        )
+        return response.content
+
+    def _store_response(
+        self, url: str, bucket: int, content: bytes, headers: httpx.Headers
+    ) -> None:
+        self.store.put_validators(
+            url,
+            ChartValidators(
+                digest=self.store.put_image(content),
+                bucket=bucket,
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+            ),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+
+chart_fetcher = ChartFetcher(ChartImageStore())
@@ -1,5 +1,8 @@
+from datetime import timedelta, timezone
 from enum import Enum
 
+KST = timezone(timedelta(hours=9), "KST")
+
 
 class KoreanMarketType(Enum):
     KOSPI = "KOSPI"
@@ -1,33 +1,111 @@
-import time
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from commands import sender
 from commands.request_wrapper import RequestWrapper
+from commands.stock.chart_cache import chart_bucket, chart_cache
 from commands.stock.common import Country
+from commands.stock.enums import ChartType
+from commands.stock.prefetch import prefetcher
+from commands.stock.quote_cache import quote_cache
+
+DEFAULT_CURRENCIES = [
+    "USD",
+    "JPY",
+    "EUR",
+    "CNY",
+    "GBP",
+    "HKD",
+    "TWD",
+    "AUD",
+    "CAD",
+    "CHF",
+    "SGD",
+    "THB",
+    "VND",
+]
+
+
+@dataclass
+class RateTable:
+    """원화 기준 환율표. 두 통화 사이의 환율은 원화를 거쳐 계산합니다."""
+
+    quotes: Dict[str, Dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_quotes(cls, quotes: List[Dict]) -> "RateTable":
+        return cls({quote["code"].removeprefix("FRX.KRW"): quote for quote in quotes})
+
+    @property
+    def currencies(self) -> List[str]:
+        return ["KRW", *self.quotes]
+
+    def krw_per_unit(self, code: str) -> float:
+        """1 단위(1달러, 1엔)가 몇 원인지 반환합니다."""
+        if code == "KRW":
+            return 1.0
+        quote = self.quotes[code]
+        return float(quote["basePrice"]) / quote["currencyUnit"]
+
+    def convert(self, amount: float, source: str, target: str) -> float:
+        return amount * self.krw_per_unit(source) / self.krw_per_unit(target)
+
+    def name(self, code: str) -> str:
+        if code == "KRW":
+            return "원"
+        return self.quotes[code].get("currencyName") or code
 
 
 class Currency:
-    FOREX_API_ENDPOINT = "https://crix-api-cdn.upbit.com/v1/forex/recent?codes=FRX.KRW"
+    FOREX_API_ENDPOINT = "https://crix-api-cdn.upbit.com/v1/forex/recent?codes="
     FOREX_CHART_ENDPOINT = "https://ssl.pstatic.net/imgfinance/chart/marketindex/area/month3/FX_{}KRW.png?ver={}"
+    CURRENCIES = DEFAULT_CURRENCIES
+
+    @classmethod
+    def configure(cls, config) -> None:
+        """config.ini 의 [fx] 섹션에서 환율표에 넣을 통화 목록을 읽습니다.
+
+        /usd, /jpy 같은 명령어의 통화는 항상 포함합니다.
+        """
+        if not config.has_section("fx"):
+            return
+
+        if currencies := config["fx"].get("currencies"):
+            codes = [code.strip().upper() for code in currencies.split(",")]
+            fixed = [country.value for country in Country if country != Country.KOREA]
+            cls.CURRENCIES = list(dict.fromkeys(code for code in fixed + codes if code))
+
+    async def fetch(self, code: Country) -> Tuple[float, str, int]:
+        quote = (await self.fetch_table()).quotes[code.value]
+        return quote["basePrice"], quote["currencyName"], quote["currencyUnit"]
 
-    def fetch(self, code: Country) -> Tuple[float, str, int]:
-        url = self.FOREX_API_ENDPOINT + code.value
+    async def fetch_table(self) -> RateTable:
+        """모든 통화의 환율표를 가져옵니다. 캐시에 없을 때만 한 번 요청합니다."""
+        quotes = await quote_cache.get_or_fetch("upbit_forex", "table", self.request)
+        return RateTable.from_quotes(quotes)
+
+    async def request(self) -> List[Dict]:
+        codes = ",".join(f"FRX.KRW{code}" for code in self.CURRENCIES)
         request_wrapper = RequestWrapper()
-        response = request_wrapper.get(url)
-        data = response.json()[0]
-        return data["basePrice"], data["currencyName"], data["currencyUnit"]
+        response = await request_wrapper.get(self.FOREX_API_ENDPOINT + codes)
+        response.raise_for_status()
+        return response.json()
 
     def create_photo_url(self, code: Country) -> str:
-        return self.FOREX_CHART_ENDPOINT.format(code.value, int(time.time()))
+        return self.FOREX_CHART_ENDPOINT.format(
+            code.value, chart_bucket(ChartType.MONTH_3)
+        )
 
 
 async def get_currency_data(
     update: Update, context: ContextTypes.DEFAULT_TYPE, /, code: Country
 ):
+    prefetcher.record("fx", [code.value])
     currency = Currency()
-    base_price, currency_name, currency_unit = currency.fetch(code)
+    base_price, currency_name, currency_unit = await currency.fetch(code)
 
     if len(context.args) == 0:
         chat_message = f"{currency_unit}{currency_name}: {base_price}"
@@ -37,8 +115,64 @@ async def get_currency_data(
         chat_message = f"{amount}{currency_name}: {converted_price:.2f}"
 
     chat_message += "원"
-    await context.bot.send_photo(
-        chat_id=update.message.chat_id,
-        photo=currency.create_photo_url(code),
-        caption=chat_message,
+    key = ("fx", code.value, chart_bucket(ChartType.MONTH_3))
+    await chart_cache.send_photo(
+        context.bot,
+        update.message.chat_id,
+        key,
+        currency.create_photo_url(code),
+        chat_message,
     )
+
+
+def parse_fx_args(args: List[str]) -> Tuple[float, Optional[str], List[str]]:
+    """[금액] [통화] [대상 통화...] 형식의 인자를 (금액, 통화, 대상 통화) 로 나눕니다."""
+    amount = 1.0
+    if args:
+        try:
+            amount = float(args[0].replace(",", ""))
+            args = args[1:]
+        except ValueError:
+            pass
+
+    codes = [arg.upper() for arg in args]
+    return amount, (codes[0] if codes else None), codes[1:]
+
+
+def format_rate_table(table: RateTable) -> str:
+    lines = []
+    for code, quote in table.quotes.items():
+        lines.append(
+            f"{quote['currencyUnit']}{table.name(code)}({code}): "
+            f"{float(quote['basePrice']):,.2f}원"
+        )
+    return "\n".join(lines)
+
+
+async def fx(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """환율표를 보여주거나 여러 통화 사이의 환율을 계산합니다."""
+    amount, source, targets = parse_fx_args(context.args or [])
+    table = await Currency().fetch_table()
+    if source is None:
+        return await sender.reply_text(update, format_rate_table(table))
+
+    unknown = [code for code in [source, *targets] if code not in table.currencies]
+    if unknown:
+        return await sender.reply_text(
+            update,
+            f"지원하지 않는 통화입니다: {', '.join(unknown)}\n"
+            f"가능한 값: {', '.join(table.currencies)}",
+        )
+
+    prefetcher.record("fx", [source])
+    lines = [
+        f"{amount:,.2f} {source} = {table.convert(amount, source, target):,.2f} {target}"
+        for target in targets or (["KRW"] if source != "KRW" else ["USD"])
+    ]
+    await sender.reply_text(update, "\n".join(lines))
+
+
+async def prefetch_currencies(codes: List[str], ttl: float) -> None:
+    """환율표 전체를 새로 가져옵니다. 통화 수와 상관없이 요청은 한 번입니다."""
+    currency = Currency()
+    await quote_cache.refresh("upbit_forex", "table", currency.request, ttl)
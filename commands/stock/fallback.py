@@ -0,0 +1,134 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from commands.stock.quote_cache import quote_cache
+
+# 주 소스가 실패했을 때 차례로 시도할 대체 소스
+DEFAULT_CHAINS: Dict[str, List[str]] = {
+    "robinhood": ["naver_world"],
+    "naver_stock": ["naver_mobile_stock"],
+    "naver_market": [],
+}
+
+SOURCE_LABELS: Dict[str, str] = {
+    "robinhood": "Robinhood",
+    "naver_world": "네이버 해외증시",
+    "naver_stock": "네이버 증권",
+    "naver_mobile_stock": "네이버 모바일 증권",
+    "naver_market": "네이버 증권",
+}
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}초"
+    if seconds < 3600:
+        return f"{seconds // 60:.0f}분"
+    return f"{seconds // 3600:.0f}시간"
+
+
+@dataclass
+class Served:
+    """주 소스 대신 내놓은 값과 그 출처"""
+
+    value: Any
+    primary: str
+    source: str
+    # 오래된 캐시 값이면 가져온 지 지난 시간(초)
+    age: Optional[float] = None
+
+    @property
+    def notice(self) -> str:
+        """사용자에게 보여줄 안내 문구"""
+        primary = SOURCE_LABELS.get(self.primary, self.primary)
+        if self.age is not None:
+            return f"⚠️ {primary} 응답이 없어 {format_age(self.age)} 전 시세입니다."
+        source = SOURCE_LABELS.get(self.source, self.source)
+        return f"⚠️ {primary} 응답이 없어 {source} 시세로 대신합니다."
+
+    def annotated(self) -> Dict:
+        """dict 값에 안내 문구(notice)와 오래된 값인지(stale)를 넣은 사본"""
+        return {**self.value, "notice": self.notice, "stale": self.age is not None}
+
+
+def append_notice(message: str, data: Dict, separator: str = "\n") -> str:
+    """Served.annotated 로 만든 값이면 메시지 끝에 안내 문구를 붙입니다."""
+    if notice := data.get("notice"):
+        return f"{message}{separator}{notice}"
+    return message
+
+
+class FallbackChain:
+    """주 소스가 실패했을 때 대체 소스와 오래된 캐시 값을 차례로 시도합니다.
+
+    대체 소스도 quote_cache 를 거치므로 장애 중에도 요청이 몰리지 않습니다.
+    대체 소스가 모두 실패하면 가져온 지 max_stale 초가 지나지 않은 주 소스의
+    캐시 값을 씁니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        chains: Dict[str, List[str]] = None,
+        max_stale: float = 900.0,
+    ):
+        self.enabled = enabled
+        self.chains: Dict[str, List[str]] = {**DEFAULT_CHAINS, **(chains or {})}
+        self.max_stale = max_stale
+        self._counters: Dict[str, int] = {"fallbacks": 0, "stale": 0, "misses": 0}
+
+    def configure(self, config) -> None:
+        """config.ini 의 [fallback] 섹션을 읽습니다.
+
+        chain_<source> = 대체1,대체2 형식으로 소스별 대체 순서를 지정합니다.
+        """
+        if not config.has_section("fallback"):
+            return
+
+        section = config["fallback"]
+        self.enabled = section.getboolean("enabled", self.enabled)
+        self.max_stale = section.getfloat("max_stale", self.max_stale)
+        for key, value in section.items():
+            if key.startswith("chain_"):
+                self.chains[key[len("chain_") :]] = [
+                    name.strip() for name in value.split(",") if name.strip()
+                ]
+
+    async def fetch(
+        self,
+        source: str,
+        symbol: Hashable,
+        providers: Dict[str, Callable[[], Awaitable[Optional[Any]]]],
+    ) -> Optional[Served]:
+        """source 대신 쓸 값을 찾습니다. 없으면 None 을 반환합니다.
+
+        providers 는 대체 소스 이름과 그 소스에서 symbol 을 가져오는 함수입니다.
+        """
+        if not self.enabled:
+            return None
+
+        for name in self.chains.get(source, []):
+            if (provider := providers.get(name)) is None:
+                continue
+            try:
+                value = await quote_cache.get_or_fetch(name, symbol, provider)
+            except Exception as e:
+                logging.warning(f"Fallback {name} failed for {symbol}: {str(e)}")
+                continue
+            if value is not None:
+                self._counters["fallbacks"] += 1
+                return Served(value, source, name)
+
+        if stale := quote_cache.get_stale(source, symbol, self.max_stale):
+            self._counters["stale"] += 1
+            return Served(stale[0], source, source, stale[1])
+
+        self._counters["misses"] += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+
+fallback_chain = FallbackChain()
@@ -0,0 +1,135 @@
+import html
+import json
+import re
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from commands.request_wrapper import RequestWrapper
+
+T = TypeVar("T")
+
+NEXT_DATA_PATTERN = re.compile(
+    r"<script\b[^>]*\bid\s*=\s*[\"']__NEXT_DATA__[\"'][^>]*>(.*?)</script\s*>",
+    re.DOTALL | re.IGNORECASE,
+)
+ATTRIBUTE_PATTERN = re.compile(
+    r"([\w:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", re.DOTALL
+)
+
+
+def extract_next_data(text: str) -> Optional[Dict]:
+    """<script id="__NEXT_DATA__"> 의 JSON 을 파싱해서 반환합니다."""
+    if match := NEXT_DATA_PATTERN.search(text):
+        try:
+            return json.loads(match.group(1))
+        except ValueError:
+            return None
+    return None
+
+
+def extract_meta_content(text: str, name: str) -> Optional[str]:
+    """<meta name="..." content="..."> 의 content 값을 반환합니다."""
+    start = 0
+    while (position := text.find(name, start)) != -1:
+        start = position + len(name)
+        tag_start = text.rfind("<", 0, position)
+        tag_end = text.find(">", position)
+        if tag_start == -1 or tag_end == -1:
+            return None
+        tag = text[tag_start : tag_end + 1]
+        if tag[1:5].lower() != "meta":
+            continue
+
+        attributes = {
+            key.lower(): html.unescape(next((v for v in values if v), ""))
+            for key, *values in ATTRIBUTE_PATTERN.findall(tag)
+        }
+        if attributes.get("name") == name and "content" in attributes:
+            return attributes["content"]
+    return None
+
+
+# (찾을 문자열, 그 뒤에 나오면 태그가 끝났다고 볼 문자열)
+Markers = Tuple[bytes, bytes]
+
+NEXT_DATA_MARKERS: Markers = (b"__NEXT_DATA__", b"</script>")
+
+
+def meta_tag_markers(name: str) -> Markers:
+    """name 을 가진 meta 태그가 끝났는지 볼 때 쓰는 표시"""
+    return name.encode(), b">"
+
+
+class MarkerScanner:
+    """스트리밍으로 받은 바이트에서 marker 와 그 뒤의 terminator 를 찾습니다.
+
+    청크를 받을 때마다 새로 들어온 부분만 (경계에 걸친 표시를 놓치지 않도록
+    표시 길이만큼 겹쳐서) 찾으므로, 전체를 읽는 비용이 응답 크기에 비례합니다.
+    """
+
+    def __init__(self, markers: Markers):
+        self.marker, self.terminator = markers
+        self.buffer = bytearray()
+        self._found = -1
+        self._scanned = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """청크를 붙이고, marker 뒤에 terminator 까지 받았으면 True 를 반환합니다."""
+        self.buffer += chunk
+        return self._scan()
+
+    def skip(self) -> bool:
+        """지금 찾은 marker 를 건너뛰고 다음 marker 를 찾습니다."""
+        self._scanned = self._found + 1
+        self._found = -1
+        return self._scan()
+
+    def _scan(self) -> bool:
+        if self._found == -1:
+            position = self.buffer.find(self.marker, self._scanned)
+            if position == -1:
+                self._scanned = max(0, len(self.buffer) - len(self.marker) + 1)
+                return False
+            self._found = position
+            self._scanned = position + len(self.marker)
+
+        if self.buffer.find(self.terminator, self._scanned) == -1:
+            self._scanned = max(
+                self._scanned, len(self.buffer) - len(self.terminator) + 1
+            )
+            return False
+        return True
+
+
+async def fetch_and_extract(
+    request_wrapper: RequestWrapper,
+    url: str,
+    markers: Markers,
+    extract: Callable[[str], Optional[T]],
+    fallback: Callable[[str], Optional[T]] = None,
+) -> Optional[T]:
+    """응답을 스트리밍으로 읽다가 필요한 태그를 받으면 바로 멈추고 추출합니다.
+
+    태그가 끝났는지는 디코딩 전의 바이트에서 markers 로 확인하고, 그때만 받은
+    부분을 디코딩해서 extract 합니다. 끝까지 읽어도 추출하지 못하면
+    fallback(전체 HTML) 결과를 반환합니다. 404 응답은 None, 그 외 오류 응답은
+    httpx.HTTPStatusError 를 발생시킵니다.
+    """
+    scanner = MarkerScanner(markers)
+    async with request_wrapper.stream(url) as response:
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        encoding = response.encoding or "utf-8"
+
+        async for chunk in response.aiter_bytes():
+            complete = scanner.feed(chunk)
+            while complete:
+                text = scanner.buffer.decode(encoding, errors="replace")
+                if (value := extract(text)) is not None:
+                    return value
+                complete = scanner.skip()
+
+    text = scanner.buffer.decode(encoding, errors="replace")
+    if (value := extract(text)) is not None:
+        return value
+    return fallback(text) if fallback else None
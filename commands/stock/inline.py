@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+import commands.stock.stock_data as stock_data
+from commands.retry import telegram_retry
+from commands.stock.enums import ChartType
+from commands.stock.prefetch import prefetcher
+from commands.stock.quote_cache import quote_cache
+from commands.stock.stock import (
+    MarketDataFetcher,
+    format_korean_stock_message,
+    format_us_stock_message,
+    rh,
+)
+
+US_TICKER_PATTERN = re.compile(r"[A-Za-z][A-Za-z.\-]{0,5}")
+
+# (source, symbol, 제목)
+Candidate = Tuple[str, str, str]
+
+
+class InlineSearch:
+    """인라인 모드 종목 자동완성
+
+    후보는 메모리의 종목 인덱스와 알려진 미국 티커에서 찾고, 설명에는 캐시에
+    있는 시세만 씁니다. 키 입력마다 오는 질의는 debounce 동안 기다렸다가 같은
+    사용자의 더 새 질의가 있으면 답하지 않습니다. 같은 질의의 후보 목록은
+    cache_time 동안 재사용하고, Telegram 에도 같은 cache_time 으로 캐시하게
+    합니다. 결과를 고르면 그때 시세를 가져와 메시지를 고칩니다.
+    """
+
+    def __init__(
+        self,
+        limit: int = 10,
+        cache_time: int = 30,
+        debounce: float = 0.02,
+        max_cached_queries: int = 2048,
+    ):
+        self.limit = limit
+        self.cache_time = cache_time
+        self.debounce = debounce
+        self.max_cached_queries = max_cached_queries
+        self._candidates: "OrderedDict[str, Tuple[float, List[Candidate]]]" = (
+            OrderedDict()
+        )
+        self._latest: Dict[int, str] = {}
+        self._counters: Dict[str, int] = {"queries": 0, "superseded": 0, "hits": 0}
+
+    def configure(self, config) -> None:
+        """config.ini 의 [inline] 섹션에서 결과 수와 캐시 시간을 읽습니다."""
+        if not config.has_section("inline"):
+            return
+
+        section = config["inline"]
+        self.limit = min(section.getint("limit", self.limit), 50)
+        self.cache_time = section.getint("cache_time", self.cache_time)
+        self.debounce = section.getfloat("debounce_ms", self.debounce * 1000) / 1000
+        self.max_cached_queries = section.getint(
+            "max_cached_queries", self.max_cached_queries
+        )
+
+    def candidates(self, query: str) -> List[Candidate]:
+        """질의에 맞는 종목 후보. 업스트림 요청 없이 메모리에서만 찾습니다."""
+        key = query.strip().upper()
+        if not key:
+            return []
+
+        now = time.monotonic()
+        if (entry := self._candidates.get(key)) and entry[0] > now:
+            self._candidates.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[1]
+
+        result = self._search(key)
+        self._candidates[key] = (now + self.cache_time, result)
+        self._candidates.move_to_end(key)
+        while len(self._candidates) > self.max_cached_queries:
+            self._candidates.popitem(last=False)
+        return result
+
+    def _search(self, key: str) -> List[Candidate]:
+        index = stock_data.get_index()
+        korean: List[Candidate] = []
+        if key.isnumeric():
+            if name := index.name_of(key):
+                korean.append(("kr", key, f"{name} ({key})"))
+        else:
+            korean = [
+                ("kr", code, f"{name} ({code})")
+                for name, code in index.search(key, self.limit)
+            ]
+
+        us: List[Candidate] = []
+        if US_TICKER_PATTERN.fullmatch(key):
+            known = set(rh.instruments) | set(prefetcher.symbols("us"))
+            matches = sorted(
+                (ticker for ticker in known if ticker.startswith(key)),
+                key=lambda ticker: (len(ticker), ticker),
+            )
+            if key not in matches:
+                matches.insert(0, key)
+            us = [("us", ticker, f"{ticker} (미국)") for ticker in matches]
+
+        return (us + korean)[: self.limit]
+
+    async def answer(self, update: Update) -> None:
+        inline_query = update.inline_query
+        self._counters["queries"] += 1
+        user_id = inline_query.from_user.id
+        self._latest[user_id] = inline_query.id
+        if self.debounce:
+            await asyncio.sleep(self.debounce)
+        if self._latest.get(user_id) != inline_query.id:
+            self._counters["superseded"] += 1
+            return
+        del self._latest[user_id]
+
+        results = [
+            self._article(source, symbol, title)
+            for source, symbol, title in self.candidates(inline_query.query)
+        ]
+        await inline_query.answer(
+            results, cache_time=self.cache_time, auto_pagination=False
+        )
+
+    def _article(
+        self, source: str, symbol: str, title: str
+    ) -> InlineQueryResultArticle:
+        cached = cached_quote_text(source, symbol)
+        return InlineQueryResultArticle(
+            id=f"{source}:{symbol}",
+            title=title,
+            description=cached or "선택하면 시세를 가져옵니다.",
+            input_message_content=InputTextMessageContent(
+                cached or f"⏳ {title} 시세를 가져오는 중입니다."
+            ),
+            reply_markup=refresh_markup(source, symbol),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "cached_queries": len(self._candidates)}
+
+
+inline_search = InlineSearch()
+
+
+def refresh_markup(source: str, symbol: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    "🔄 새로고침", callback_data=f"quote:{source}:{symbol}"
+                )
+            ]
+        ]
+    )
+
+
+def cached_quote_text(source: str, symbol: str) -> Optional[str]:
+    """캐시에 있는 시세로 만든 메시지. 없으면 None 을 반환합니다."""
+    if source == "kr":
+        if data := quote_cache.get("naver_stock", symbol):
+            return format_korean_stock_message(data)
+    elif source == "us":
+        if data := quote_cache.get("robinhood", symbol):
+            company_name, message = MarketDataFetcher._parse_us_stock_data(data, symbol)
+            return format_us_stock_message(company_name, message, ChartType.REALTIME)
+    return None
+
+
+async def quote_text(source: str, symbol: str) -> str:
+    """시세를 가져와 메시지를 만듭니다.
+
+    업스트림 장애로 가져오지 못하면 새로고침을 안내하는 메시지를 반환합니다.
+    """
+    prefetcher.record(source, [symbol])
+    try:
+        if source == "kr":
+            if data := await MarketDataFetcher.fetch_korean_stock(symbol):
+                return format_korean_stock_message(data)
+            return "종목 정보를 찾지 못했습니다."
+
+        company_name, message = await MarketDataFetcher.fetch_us_stock(symbol)
+    except Exception as e:
+        logging.warning(f"Failed to fetch inline quote {source}:{symbol}: {str(e)}")
+        return f"{symbol}: 시세를 가져오지 못했습니다. 잠시 후 새로고침 해주세요."
+    return format_us_stock_message(company_name, message, ChartType.REALTIME)
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """입력 중인 종목명/티커의 후보를 보여줍니다."""
+    await inline_search.answer(update)
+
+
+async def chosen_inline_result(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """고른 결과의 시세를 가져와 보낸 메시지를 고칩니다.
+
+    BotFather 에서 inline feedback 을 켜야 호출됩니다. 꺼져 있으면 새로고침
+    버튼으로 시세를 가져옵니다.
+    """
+    result = update.chosen_inline_result
+    if not result.inline_message_id:
+        return
+
+    source, symbol = result.result_id.split(":", 1)
+    text = await quote_text(source, symbol)
+    try:
+        await telegram_retry.run(
+            lambda: context.bot.edit_message_text(
+                text,
+                inline_message_id=result.inline_message_id,
+                reply_markup=refresh_markup(source, symbol),
+            )
+        )
+    except BadRequest as e:
+        logging.info(f"Inline message was not updated: {str(e)}")
+
+
+async def refresh_quote(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """새로고침 버튼을 누르면 시세를 다시 가져옵니다.
+
+    시세를 가져오는 동안 버튼이 계속 로딩 중으로 보이지 않도록 먼저 응답합니다.
+    """
+    callback_query = update.callback_query
+    _, source, symbol = callback_query.data.split(":", 2)
+    try:
+        await callback_query.answer()
+    except BadRequest as e:
+        # 오래된 버튼이면 "query is too old" 가 오지만 메시지는 고칠 수 있습니다.
+        logging.info(f"Callback query was not answered: {str(e)}")
+    text = await quote_text(source, symbol)
+    try:
+        await telegram_retry.run(
+            lambda: callback_query.edit_message_text(
+                text, reply_markup=refresh_markup(source, symbol)
+            )
+        )
+    except BadRequest as e:
+        # 시세가 그대로면 "message is not modified" 가 옵니다.
+        logging.info(f"Quote message was not updated: {str(e)}")
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, tzinfo
+from enum import Enum
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from commands.stock.common import KST
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+class Market(Enum):
+    KRX = "KRX"
+    US = "US"
+    FX = "FX"
+    CRYPTO = "CRYPTO"
+
+
+@dataclass(frozen=True)
+class Session:
+    """현지 시각 기준 평일 거래 시간. close 가 None 이면 자정까지입니다."""
+
+    timezone: tzinfo
+    open: time
+    close: Optional[time] = None
+
+
+# 미국은 봇이 프리장/시간외 시세도 보여주므로 확장 거래 시간을 기준으로 합니다.
+# 공휴일은 고려하지 않습니다.
+SESSIONS = {
+    Market.KRX: Session(KST, time(9, 0), time(15, 30)),
+    Market.US: Session(NEW_YORK, time(4, 0), time(20, 0)),
+    Market.FX: Session(NEW_YORK, time(0, 0)),
+}
+
+
+def is_open(market: Market, now: Optional[datetime] = None) -> bool:
+    """시장이 열려 있는지 확인합니다. 암호화폐는 항상 열려 있습니다."""
+    if (session := SESSIONS.get(market)) is None:
+        return True
+
+    local = (now or datetime.now(KST)).astimezone(session.timezone)
+    if local.weekday() >= 5:
+        return False
+    return session.open <= local.time() and (
+        session.close is None or local.time() < session.close
+    )
+
+
+def seconds_until_open(market: Market, now: Optional[datetime] = None) -> float:
+    """다음 개장까지 남은 시간(초)을 반환합니다. 열려 있으면 0 을 반환합니다."""
+    now = now or datetime.now(KST)
+    if is_open(market, now):
+        return 0.0
+
+    session = SESSIONS[market]
+    local = now.astimezone(session.timezone)
+    for days in range(8):
+        day = local.date() + timedelta(days=days)
+        opens_at = datetime.combine(day, session.open, tzinfo=session.timezone)
+        if day.weekday() < 5 and opens_at > local:
+            return (opens_at - local).total_seconds()
+    raise AssertionError("Market never opens")
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from commands.stock.market_hours import Market, is_open, seconds_until_open
+
+MAX_TRACKED_SYMBOLS = 1000
+MIN_SCORE = 0.05
+
+Refresher = Callable[[List[str], float], Awaitable[None]]
+
+
+@dataclass
+class PrefetchKind:
+    """같은 방법으로 한 번에 갱신하는 종목 묶음(예: 한국 주식, 미국 주식)"""
+
+    market: Market
+    refresh: Refresher
+    pinned: Set[str] = field(default_factory=set)
+    next_at: float = 0.0
+    # 아직 끝나지 않은 갱신. 끝나기 전에는 새로 시작하지 않습니다.
+    task: Optional[asyncio.Task] = None
+
+
+class Prefetcher:
+    """자주 찾는 시세를 미리 가져와 캐시를 데워 두는 스케줄러
+
+    고정 종목 명령어(/kospi, /nasdaq, /usd 등)의 심볼은 항상, 사용자가 찾은
+    종목은 최근 조회 수 상위 top_n 개를 갱신합니다. 조회 수는 half_life 마다
+    절반으로 줄어듭니다. 시장이 열려 있으면 open_interval 마다, 닫혀 있으면
+    closed_interval(다음 개장 전까지) 마다 갱신하고, 캐시 TTL 은 다음 갱신까지
+    버티도록 갱신 주기 + grace 로 저장합니다. idle_after 동안 명령어가 없으면
+    갱신을 쉽니다. 갱신은 백그라운드 작업으로 돌리므로 1초마다 부르는 run_due 는
+    바로 끝나고, 느린 갱신은 끝날 때까지 다시 시작하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        open_interval: float = 5.0,
+        closed_interval: float = 300.0,
+        grace: float = 5.0,
+        top_n: int = 10,
+        idle_after: float = 1800.0,
+        half_life: float = 3600.0,
+    ):
+        self.enabled = enabled
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self.grace = grace
+        self.top_n = top_n
+        self.idle_after = idle_after
+        self.half_life = half_life
+        self.kinds: Dict[str, PrefetchKind] = {}
+        self._scores: Dict[str, Dict[str, float]] = {}
+        self._decayed_at = time.monotonic()
+        self._last_activity = time.monotonic()
+        self._counters: Dict[str, int] = {"runs": 0, "failures": 0, "idle_skips": 0}
+
+    def configure(self, config) -> None:
+        """config.ini 의 [prefetch] 섹션에서 갱신 주기와 top_n 을 읽습니다."""
+        if not config.has_section("prefetch"):
+            return
+
+        section = config["prefetch"]
+        self.enabled = section.getboolean("enabled", self.enabled)
+        self.open_interval = section.getfloat("open_interval", self.open_interval)
+        self.closed_interval = section.getfloat("closed_interval", self.closed_interval)
+        self.grace = section.getfloat("grace", self.grace)
+        self.top_n = section.getint("top_n", self.top_n)
+        self.idle_after = section.getfloat("idle_after", self.idle_after)
+        self.half_life = section.getfloat("half_life", self.half_life)
+
+    def add_kind(self, name: str, market: Market, refresh: Refresher) -> None:
+        """refresh(symbols, ttl) 로 한 번에 갱신할 종목 묶음을 등록합니다."""
+        self.kinds[name] = PrefetchKind(market, refresh)
+        self._scores.setdefault(name, {})
+
+    def pin(self, name: str, symbol: str) -> None:
+        """조회 수와 상관없이 항상 갱신할 심볼을 등록합니다."""
+        self.kinds[name].pinned.add(symbol)
+
+    def record(self, name: str, symbols: Iterable[str]) -> None:
+        """명령어가 조회한 심볼을 기록합니다."""
+        self._last_activity = time.monotonic()
+        scores = self._scores.setdefault(name, {})
+        for symbol in symbols:
+            scores[symbol] = scores.get(symbol, 0.0) + 1.0
+
+        if len(scores) > MAX_TRACKED_SYMBOLS:
+            for symbol in sorted(scores, key=scores.get)[
+                : len(scores) - MAX_TRACKED_SYMBOLS
+            ]:
+                del scores[symbol]
+
+    def popular(self, name: str) -> List[str]:
+        """고정 심볼을 뺀 조회 수 상위 top_n 개 심볼"""
+        pinned = self.kinds[name].pinned if name in self.kinds else set()
+        scores = self._scores.get(name, {})
+        ranked = sorted(
+            (symbol for symbol in scores if symbol not in pinned),
+            key=scores.get,
+            reverse=True,
+        )
+        return ranked[: self.top_n]
+
+    def symbols(self, name: str) -> List[str]:
+        pinned = self.kinds[name].pinned if name in self.kinds else set()
+        return sorted(pinned) + self.popular(name)
+
+    def interval(self, market: Market) -> float:
+        """시장 상태에 맞는 갱신 주기(초). 닫혀 있어도 개장 시각은 넘기지 않습니다."""
+        if is_open(market):
+            return self.open_interval
+        return max(
+            self.open_interval, min(self.closed_interval, seconds_until_open(market))
+        )
+
+    async def run_due(self) -> None:
+        """갱신할 때가 된 종목 묶음의 갱신을 시작합니다. 끝날 때까지 기다리지 않습니다."""
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        self._decay(now)
+        if now - self._last_activity > self.idle_after:
+            self._counters["idle_skips"] += 1
+            return
+
+        for name, kind in self.kinds.items():
+            if kind.task is not None and not kind.task.done():
+                continue
+            if kind.next_at > now or not (symbols := self.symbols(name)):
+                continue
+            interval = self.interval(kind.market)
+            kind.next_at = now + interval
+            kind.task = asyncio.create_task(
+                self._refresh(name, kind, symbols, interval + self.grace)
+            )
+
+    async def close(self) -> None:
+        """진행 중인 갱신을 취소합니다."""
+        tasks = [kind.task for kind in self.kinds.values() if kind.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _refresh(
+        self, name: str, kind: PrefetchKind, symbols: List[str], ttl: float
+    ) -> None:
+        self._counters["runs"] += 1
+        try:
+            await kind.refresh(symbols, ttl)
+        except Exception as e:
+            self._counters["failures"] += 1
+            logging.warning(f"Prefetch {name} failed: {str(e)}")
+
+    def _decay(self, now: float) -> None:
+        elapsed = now - self._decayed_at
+        if elapsed < self.half_life / 10:
+            return
+
+        self._decayed_at = now
+        factor = math.pow(0.5, elapsed / self.half_life)
+        for scores in self._scores.values():
+            for symbol in list(scores):
+                scores[symbol] *= factor
+                if scores[symbol] < MIN_SCORE:
+                    del scores[symbol]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._counters,
+            "tracked": sum(len(scores) for scores in self._scores.values()),
+            "symbols": sum(len(self.symbols(name)) for name in self.kinds),
+        }
+
+
+prefetcher = Prefetcher()
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from commands.shared_state import shared_state
+
+CacheKey = Tuple[str, Hashable]
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "naver_market": 10.0,
+    "naver_stock": 5.0,
+    "naver_mobile_stock": 5.0,
+    "naver_world": 5.0,
+    "naver_world_code": 86400.0,
+    "robinhood": 5.0,
+    "upbit_forex": 30.0,
+    "upbit_ticker": 3.0,
+    "upbit_markets": 3600.0,
+}
+
+
+class QuoteCache:
+    """(source, symbol) 단위의 시세 캐시
+
+    소스별 TTL 이 지난 항목은 다시 가져오고, max_entries 를 넘으면 가장 오래
+    쓰이지 않은 항목부터 제거합니다(LRU). 같은 키에 대한 요청이 동시에 들어오면
+    업스트림 요청 하나를 공유합니다(single-flight). 공유 저장소가 설정되어 있으면
+    메모리에 없을 때 업스트림보다 먼저 공유 저장소를 확인해서, 다른 워커가 가져온
+    값도 남은 TTL 동안 재사용합니다. 만료된 항목도 LRU 에서 밀려나기 전까지는
+    get_stale 로 읽을 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttls: Dict[str, float] = None,
+        default_ttl: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.ttls: Dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        # (만료 시각, 값, 가져온 시각)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any, float]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "shared_hits": 0,
+            "refreshes": 0,
+            "evictions": 0,
+            "stale_hits": 0,
+        }
+
+    def configure(self, config) -> None:
+        """config.ini 의 [cache] 섹션에서 크기와 TTL 을 읽습니다.
+
+        ttl_<source> 형식의 키로 소스별 TTL(초)을 지정합니다.
+        """
+        if not config.has_section("cache"):
+            return
+
+        section = config["cache"]
+        self.max_entries = section.getint("max_entries", self.max_entries)
+        self.default_ttl = section.getfloat("default_ttl", self.default_ttl)
+        for key, value in section.items():
+            if key.startswith("ttl_"):
+                self.ttls[key[len("ttl_") :]] = float(value)
+
+    def ttl_for(self, source: str) -> float:
+        return self.ttls.get(source, self.default_ttl)
+
+    def get(self, source: str, symbol: Hashable) -> Optional[Any]:
+        """메모리에 있는 만료되지 않은 값을 반환합니다. 없으면 None 을 반환합니다.
+
+        공유 저장소는 보지 않으므로 키 입력마다 불러도 I/O 가 없습니다.
+        """
+        key = (source, symbol)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get_stale(
+        self, source: str, symbol: Hashable, max_age: float
+    ) -> Optional[Tuple[Any, float]]:
+        """만료되었더라도 가져온 지 max_age 초가 지나지 않은 값과 그 경과 시간(초)
+
+        업스트림 장애 때 대신 보여줄 값을 찾는 데 씁니다. 없으면 None 을 반환합니다.
+        """
+        if (entry := self._entries.get((source, symbol))) is None:
+            return None
+
+        age = time.monotonic() - entry[2]
+        if age > max_age:
+            return None
+        self._counters["stale_hits"] += 1
+        return entry[1], age
+
+    def set(
+        self, source: str, symbol: Hashable, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ttl = self.ttl_for(source) if ttl is None else ttl
+        self._put((source, symbol), time.monotonic() + ttl, value)
+        shared_state.set(f"quote:{source}", str(symbol), value, ttl)
+
+    def _adopt_shared(
+        self, source: str, symbol: Hashable, entry: Tuple[Any, float]
+    ) -> Any:
+        """다른 워커가 저장한 (값, 만료 시각) 을 남은 TTL 동안 메모리에 둡니다."""
+        value, expires_at = entry
+        remaining = expires_at - time.time()
+        now = time.monotonic()
+        self._put(
+            (source, symbol),
+            now + remaining,
+            value,
+            now - max(0.0, self.ttl_for(source) - remaining),
+        )
+        self._counters["shared_hits"] += 1
+        return value
+
+    def _put(
+        self,
+        key: CacheKey,
+        expires_at: float,
+        value: Any,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        self._entries[key] = (expires_at, value, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    async def get_or_fetch(
+        self,
+        source: str,
+        symbol: Hashable,
+        fetcher: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """캐시 값을 반환하고, 없으면 fetcher 로 가져와 저장합니다.
+
+        None 결과는 캐시하지 않습니다.
+        """
+        value = self.get(source, symbol)
+        if value is not None:
+            self._counters["hits"] += 1
+            return value
+
+        key = (source, symbol)
+        if task := self._inflight.get(key):
+            self._counters["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        self._counters["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(key, fetcher, shared=True))
+        task.add_done_callback(_consume_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def get_many_or_fetch(
+        self,
+        source: str,
+        symbols: List[Hashable],
+        fetcher: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """여러 심볼을 한 번에 조회합니다.
+
+        캐시에 없는 심볼만 모아서 fetcher 를 한 번 호출하고, 이미 다른 요청이
+        가져오는 중인 심볼은 그 결과를 기다립니다. 결과에 없는 심볼은 반환
+        값에서도 빠집니다.
+        """
+        results: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Task] = {}
+        missing: List[Hashable] = []
+
+        for symbol in dict.fromkeys(symbols):
+            key = (source, symbol)
+            if (value := self.get(source, symbol)) is not None:
+                self._counters["hits"] += 1
+                results[symbol] = value
+            elif task := self._inflight.get(key):
+                self._counters["coalesced"] += 1
+                waiting[symbol] = task
+            else:
+                self._counters["misses"] += 1
+                missing.append(symbol)
+
+        if missing:
+            batch = asyncio.ensure_future(
+                self._fetch_many(source, missing, fetcher, shared=True)
+            )
+            batch.add_done_callback(_consume_exception)
+            for symbol in missing:
+                task = asyncio.ensure_future(_pick(batch, symbol))
+                task.add_done_callback(_consume_exception)
+                self._inflight[(source, symbol)] = task
+                waiting[symbol] = task
+
+        for symbol, task in waiting.items():
+            if (value := await asyncio.shield(task)) is not None:
+                results[symbol] = value
+
+        return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+    async def refresh(
+        self,
+        source: str,
+        symbol: Hashable,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """캐시 값과 상관없이 새로 가져와 ttl 동안 저장합니다.
+
+        미리 가져오기(prefetch)에 씁니다. 이미 가져오는 중이면 그 결과를 기다립니다.
+        """
+        key = (source, symbol)
+        if task := self._inflight.get(key):
+            return await asyncio.shield(task)
+
+        self._counters["refreshes"] += 1
+        task = asyncio.ensure_future(self._fetch(key, fetcher, ttl))
+        task.add_done_callback(_consume_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def refresh_many(
+        self,
+        source: str,
+        symbols: List[Hashable],
+        fetcher: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        ttl: Optional[float] = None,
+    ) -> None:
+        """여러 심볼을 fetcher 한 번으로 새로 가져와 ttl 동안 저장합니다."""
+        missing = [
+            symbol
+            for symbol in dict.fromkeys(symbols)
+            if (source, symbol) not in self._inflight
+        ]
+        if not missing:
+            return
+
+        self._counters["refreshes"] += len(missing)
+        batch = asyncio.ensure_future(self._fetch_many(source, missing, fetcher, ttl))
+        batch.add_done_callback(_consume_exception)
+        for symbol in missing:
+            task = asyncio.ensure_future(_pick(batch, symbol))
+            task.add_done_callback(_consume_exception)
+            self._inflight[(source, symbol)] = task
+        await asyncio.shield(batch)
+
+    async def _fetch_many(
+        self,
+        source: str,
+        symbols: List[Hashable],
+        fetcher: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        ttl: Optional[float] = None,
+        shared: bool = False,
+    ) -> Dict[Hashable, Any]:
+        try:
+            values: Dict[Hashable, Any] = {}
+            if shared:
+                entries = await shared_state.get_many(
+                    f"quote:{source}", [str(symbol) for symbol in symbols]
+                )
+                for symbol in symbols:
+                    if (entry := entries.get(str(symbol))) is not None:
+                        values[symbol] = self._adopt_shared(source, symbol, entry)
+            if remaining := [symbol for symbol in symbols if symbol not in values]:
+                fetched = await fetcher(remaining)
+                for symbol, value in fetched.items():
+                    if value is not None:
+                        self.set(source, symbol, value, ttl)
+                values.update(fetched)
+            return values
+        finally:
+            for symbol in symbols:
+                self._inflight.pop((source, symbol), None)
+
+    async def _fetch(
+        self,
+        key: CacheKey,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        shared: bool = False,
+    ) -> Any:
+        try:
+            if shared:
+                entry = await shared_state.get(f"quote:{key[0]}", str(key[1]))
+                if entry is not None:
+                    return self._adopt_shared(*key, entry)
+            value = await fetcher()
+            if value is not None:
+                self.set(*key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """hit/miss/coalesced 카운터와 현재 크기를 반환합니다."""
+        return {
+            **self._counters,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+    def log_stats(self) -> None:
+        logging.info(f"Quote cache stats: {self.stats()}")
+
+
+async def _pick(batch: asyncio.Task, symbol: Hashable) -> Any:
+    return (await asyncio.shield(batch)).get(symbol)
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # 기다리던 요청이 모두 취소된 경우에도 예외 경고가 남지 않도록 합니다.
+    if not task.cancelled():
+        task.exception()
+
+
+quote_cache = QuoteCache()
@@ -1,10 +1,24 @@
+import asyncio
+import base64
 import json
 import logging
+import time
 from dataclasses import dataclass
 from typing import Dict, Optional
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+
+from commands.request_wrapper import RequestWrapper
+from commands.retry import upstream_retry
+from commands.stock.html_extract import (
+    NEXT_DATA_MARKERS,
+    extract_meta_content,
+    extract_next_data,
+    fetch_and_extract,
+    meta_tag_markers,
+)
+from commands.stock.robinhood_store import RobinhoodStore
+from commands.upstream_health import is_upstream_failure
 
 
 @dataclass
@@ -15,7 +29,10 @@ class RobinhoodConfig:
     api_url: str = (
         "https://bonfire.robinhood.com/instruments/{}/detail-page-live-updating-data/"
     )
-    data_file: str = "robinhood_data.json"
+    data_file: str = "robinhood_data.db"
+    legacy_data_file: str = "robinhood_data.json"
+    token_refresh_margin: float = 300.0
+    instrument_meta_name: str = "twitter:app:url:iphone"
     headers: Dict = None
 
     def __post_init__(self):
@@ -34,38 +51,82 @@ class RobinHood:
         self.config = config or RobinhoodConfig()
         self.access_token: str = ""
         self.instruments: Dict = {}
+        self.request_wrapper = RequestWrapper()
+        self.store = RobinhoodStore(self.config.data_file)
+        self.loaded = False
+        self._loading: Optional[asyncio.Task] = None
+        self._renewal: Optional[asyncio.Task] = None
 
     def load_data(self) -> None:
-        """저장된 데이터를 로드합니다."""
+        """저장된 데이터를 로드합니다. 실패하면 다음 호출에서 다시 시도합니다."""
+        self.store.migrate_json(self.config.legacy_data_file)
+        self.access_token, self.instruments = self.store.load()
+        self.loaded = True
+
+    async def ensure_loaded(self) -> None:
+        """저장된 데이터를 아직 읽지 않았으면 스레드에서 한 번만 읽습니다."""
+        if self.loaded:
+            return
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self.load_data))
+        await asyncio.shield(self._loading)
+
+    async def refresh_access_token(self, stale_token: Optional[str] = None) -> None:
+        """액세스 토큰을 갱신합니다. 동시에 여러 번 호출되어도 한 번만 갱신합니다.
+
+        stale_token 이 주어졌는데 이미 다른 토큰으로 바뀌었다면 갱신하지 않습니다.
+        """
+        if stale_token is not None and stale_token != self.access_token:
+            return
+        if self._adopt_stored_token():
+            return
+
+        if self._renewal is None or self._renewal.done():
+            self._renewal = asyncio.ensure_future(self.renew_access_token())
+        await asyncio.shield(self._renewal)
+
+    def _adopt_stored_token(self) -> bool:
+        """다른 워커가 이미 갱신해서 저장한 토큰이 있으면 그 토큰을 씁니다."""
+        stored = self.store.get_access_token()
+        if not stored or stored == self.access_token:
+            return False
+
+        previous, self.access_token = self.access_token, stored
+        if self.token_needs_refresh():
+            self.access_token = previous
+            return False
+        logging.info("Using Robinhood token renewed by another worker")
+        return True
+
+    def token_expires_at(self) -> Optional[float]:
+        """JWT 토큰의 exp 값(epoch 초)을 반환합니다. 알 수 없으면 None 입니다."""
         try:
-            with open(self.config.data_file, "r") as f:
-                data = json.load(f)
-                self.access_token = data["access_token"]
-                self.instruments = data["instruments"]
-        except FileNotFoundError:
-            logging.info(f"Creating new {self.config.data_file}")
-            self.save_data()
-
-    def save_data(self) -> None:
-        """현재 데이터를 파일에 저장합니다."""
-        with open(self.config.data_file, "w") as f:
-            json.dump(
-                {
-                    "access_token": self.access_token,
-                    "instruments": self.instruments,
-                },
-                f,
-                indent=2,
-            )
+            payload = self.access_token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
 
-    def renew_access_token(self) -> None:
+    def token_needs_refresh(self) -> bool:
+        """토큰이 없거나 곧 만료되면 True 를 반환합니다."""
+        if not self.access_token:
+            return True
+        if (expires_at := self.token_expires_at()) is None:
+            return False
+        return expires_at - time.time() < self.config.token_refresh_margin
+
+    async def renew_access_token(self) -> None:
         """액세스 토큰을 갱신합니다."""
         try:
-            res = requests.get(self.config.url_format.format("NVDA"))
-            res.raise_for_status()
-
-            soup = BeautifulSoup(res.text, "html.parser")
-            next_data = self._extract_next_data(soup)
+            next_data = await upstream_retry.run(
+                lambda: fetch_and_extract(
+                    self.request_wrapper,
+                    self.config.url_format.format("NVDA"),
+                    NEXT_DATA_MARKERS,
+                    extract_next_data,
+                    fallback=self._extract_next_data,
+                )
+            )
 
             if not next_data:
                 raise ValueError("No __NEXT_DATA__ found")
@@ -74,52 +135,91 @@ class RobinHood:
                 "state"
             ]["data"]
             self.access_token = token
-            self.save_data()
+            self.store.set_access_token(token)
 
         except Exception as e:
             logging.error(f"Failed to renew access token: {str(e)}")
             raise
 
-    def get_instrument_id(self, ticker: str) -> Optional[str]:
-        """종목 ID를 조회합니다."""
-        if instrument_id := self.instruments.get(ticker):
-            return instrument_id
+    async def is_known(self, ticker: str) -> bool:
+        """한 번이라도 조회한 적 있는 종목이면 True 입니다. 네트워크를 쓰지 않습니다."""
+        await self.ensure_loaded()
+        if ticker in self.instruments:
+            return True
+        return await asyncio.to_thread(self.store.get_instrument, ticker) is not None
 
-        try:
-            res = requests.get(self.config.url_format.format(ticker))
-            if res.status_code == 404:
-                return None
-            res.raise_for_status()
+    async def get_instrument_id(self, ticker: str) -> Optional[str]:
+        """종목 ID를 조회합니다.
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            instrument_id = self._extract_instrument_id(soup)
+        없는 종목이면 None 을 반환하고, 업스트림 장애는 예외로 올립니다.
+        """
+        await self.ensure_loaded()
 
-            if instrument_id:
-                self.instruments[ticker] = instrument_id
-                self.save_data()
-                return instrument_id
+        if instrument_id := self.instruments.get(ticker):
+            return instrument_id
+        if instrument_id := self.store.get_instrument(ticker):
+            self.instruments[ticker] = instrument_id
+            return instrument_id
 
+        meta_name = self.config.instrument_meta_name
+        try:
+            content = await upstream_retry.run(
+                lambda: fetch_and_extract(
+                    self.request_wrapper,
+                    self.config.url_format.format(ticker),
+                    meta_tag_markers(meta_name),
+                    lambda text: extract_meta_content(text, meta_name),
+                    fallback=lambda text: self._extract_meta_content(text, meta_name),
+                )
+            )
         except Exception as e:
             logging.error(f"Failed to get instrument ID for {ticker}: {str(e)}")
+            if is_upstream_failure(e):
+                raise
             return None
 
-    def get_data(self, ticker: str, is_retry: bool = False) -> Optional[Dict]:
-        """종목 데이터를 조회합니다."""
+        if not content:
+            return None
+        instrument_id = content.replace("robinhood://instrument?id=", "")
+        if not instrument_id:
+            return None
+        self.instruments[ticker] = instrument_id
+        self.store.set_instrument(ticker, instrument_id)
+        return instrument_id
+
+    async def get_data(self, ticker: str, is_retry: bool = False) -> Optional[Dict]:
+        """종목 데이터를 조회합니다.
+
+        없는 종목이면 None 을 반환하고, 업스트림 장애(연결 오류, 5xx, 열린 회로)는
+        대체 소스를 쓸 수 있도록 예외로 올립니다.
+        """
+        if not self.access_token:
+            # 빈 토큰은 httpx 가 헤더로 보내지 못하므로 먼저 발급받습니다. 여기서
+            # 실패하면 새 토큰으로 다시 시도할 것도 없으므로 따로 처리합니다.
+            try:
+                await self.refresh_access_token()
+            except Exception as e:
+                logging.error(f"Failed to get access token for {ticker}: {str(e)}")
+                if is_upstream_failure(e):
+                    raise
+                return None
+        access_token = self.access_token
+
         try:
-            instrument_id = self.get_instrument_id(ticker)
+            instrument_id = await self.get_instrument_id(ticker)
             if not instrument_id:
                 return None
 
             headers = {
                 **self.config.headers,
-                "authorization": f"Bearer {self.access_token}",
+                "authorization": f"Bearer {access_token}",
             }
             params = {
                 "display_span": "day",
                 "hide_extended_hours": "false",
             }
 
-            response = requests.get(
+            response = await self.request_wrapper.get(
                 self.config.api_url.format(instrument_id),
                 params=params,
                 headers=headers,
@@ -127,27 +227,40 @@ class RobinHood:
             response.raise_for_status()
             return response.json()
 
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (401, 403):
+                logging.error(f"Failed to get data for {ticker}: {str(e)}")
+                if is_upstream_failure(e):
+                    raise
+                return None
             if is_retry:
                 raise e
             logging.info(f"Token expired, renewing for {ticker}")
-            self.renew_access_token()
-            return self.get_data(ticker, is_retry=True)
+            await self.refresh_access_token(stale_token=access_token)
+            return await self.get_data(ticker, is_retry=True)
 
         except Exception as e:
             logging.error(f"Failed to get data for {ticker}: {str(e)}")
+            if is_upstream_failure(e):
+                raise
             return None
 
     @staticmethod
-    def _extract_next_data(soup: BeautifulSoup) -> Optional[Dict]:
-        """__NEXT_DATA__ 스크립트를 추출합니다."""
+    def _extract_next_data(text: str) -> Optional[Dict]:
+        """__NEXT_DATA__ 스크립트를 BeautifulSoup 으로 추출합니다."""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(text, "html.parser")
         if script := soup.find("script", {"id": "__NEXT_DATA__"}):
             return json.loads(script.string)
         return None
 
     @staticmethod
-    def _extract_instrument_id(soup: BeautifulSoup) -> Optional[str]:
-        """instrument ID를 추출합니다."""
-        if meta := soup.find("meta", {"name": "twitter:app:url:iphone"}):
-            return meta["content"].replace("robinhood://instrument?id=", "")
+    def _extract_meta_content(text: str, name: str) -> Optional[str]:
+        """meta 태그의 content 를 BeautifulSoup 으로 추출합니다."""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(text, "html.parser")
+        if meta := soup.find("meta", {"name": name}):
+            return meta["content"]
         return None
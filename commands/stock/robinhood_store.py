@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from commands.sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS instruments (
+    ticker TEXT PRIMARY KEY,
+    instrument_id TEXT NOT NULL
+);
+"""
+
+
+class RobinhoodStore(SQLiteStore):
+    """Robinhood 토큰과 종목 ID 를 저장하는 SQLite 저장소
+
+    WAL 모드로 열어서 키 단위로 바로 기록합니다. 전체 파일을 다시 쓰지 않으므로
+    종목이 늘어나도 저장 비용이 일정합니다.
+    """
+
+    SCHEMA = SCHEMA
+    ACCESS_TOKEN_KEY = "access_token"
+
+    def load(self) -> Tuple[str, Dict[str, str]]:
+        """(액세스 토큰, {ticker: instrument_id}) 를 읽습니다."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value FROM settings WHERE key = ?", (self.ACCESS_TOKEN_KEY,)
+            ).fetchone()
+            instruments = dict(
+                self.connection.execute("SELECT ticker, instrument_id FROM instruments")
+            )
+        return (row[0] if row else ""), instruments
+
+    def get_access_token(self) -> str:
+        """다른 프로세스가 갱신했을 수 있는 최신 토큰을 읽습니다."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value FROM settings WHERE key = ?", (self.ACCESS_TOKEN_KEY,)
+            ).fetchone()
+        return row[0] if row else ""
+
+    def get_instrument(self, ticker: str) -> Optional[str]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT instrument_id FROM instruments WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_access_token(self, access_token: str) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                (self.ACCESS_TOKEN_KEY, access_token),
+            )
+
+    def set_instrument(self, ticker: str, instrument_id: str) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO instruments (ticker, instrument_id) VALUES (?, ?)",
+                (ticker, instrument_id),
+            )
+
+    def migrate_json(self, json_path: str) -> bool:
+        """예전 JSON 파일을 한 번만 가져오고 .migrated 로 이름을 바꿉니다."""
+        if not os.path.exists(json_path):
+            return False
+
+        with open(json_path, "r") as f:
+            data = json.load(f)
+
+        instruments = data.get("instruments", {})
+        with self.transaction() as connection:
+            if access_token := data.get("access_token"):
+                connection.execute(
+                    "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                    (self.ACCESS_TOKEN_KEY, access_token),
+                )
+            connection.executemany(
+                "INSERT OR IGNORE INTO instruments (ticker, instrument_id) VALUES (?, ?)",
+                instruments.items(),
+            )
+
+        os.replace(json_path, f"{json_path}.migrated")
+        logging.info(
+            f"Migrated {len(instruments)} instruments from {json_path} to {self.path}"
+        )
+        return True
@@ -1,56 +1,310 @@
+import asyncio
 import json
 import logging
-import time
-from concurrent.futures import ALL_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Optional, Union
+from functools import partial
+from typing import Dict, Hashable, List, Optional, Set, Union
 
-import requests
-from telegram import Update
+from telegram import Bot, Message, Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 import commands.stock.stock_data as stock_data
+from commands import sender
+from commands.boot import boot_timer
 from commands.request_wrapper import RequestWrapper
+from commands.retry import is_retryable
+from commands.stock.chart_cache import chart_bucket, chart_cache
+from commands.stock.chart_fetcher import chart_fetcher, is_market_close_image
 from commands.stock.common import KoreanMarketType
 from commands.stock.enums import ChartType
+from commands.stock.fallback import append_notice, fallback_chain
+from commands.stock.prefetch import prefetcher
+from commands.stock.quote_cache import quote_cache
 from commands.stock.robinhood import RobinHood
-
-df_code = stock_data.create()
+from commands.stock.upbit_feed import upbit_feed
+from commands.upstream_health import is_upstream_failure
 
 rh = RobinHood()
-rh.load_data()
 
 
 class MarketDataFetcher:
     """시장 데이터를 가져오는 유틸리티 클래스"""
 
+    NAVER_STOCK_BATCH_SIZE = 20
+    US_STOCK_CONCURRENCY = 10
+    US_STOCK_TIMEOUT = 5.0
+
+    @classmethod
+    def configure(cls, config) -> None:
+        """config.ini 의 [stock] 섹션에서 조회 설정을 읽습니다."""
+        if not config.has_section("stock"):
+            return
+
+        section = config["stock"]
+        cls.US_STOCK_CONCURRENCY = section.getint(
+            "us_concurrency", cls.US_STOCK_CONCURRENCY
+        )
+        cls.US_STOCK_TIMEOUT = section.getfloat("us_timeout", cls.US_STOCK_TIMEOUT)
+
     @staticmethod
-    def fetch_korean_stock(code: str) -> Dict:
+    async def fetch_korean_stock(code: str) -> Optional[Dict]:
         """한국 주식 데이터를 가져옵니다."""
-        url = f"https://polling.finance.naver.com/api/realtime/domestic/stock/{code}"
+        return (await MarketDataFetcher.fetch_korean_stocks([code])).get(code)
+
+    @staticmethod
+    async def fetch_korean_stocks(codes: List[str]) -> Dict[str, Dict]:
+        """여러 한국 주식 데이터를 가능한 적은 요청으로 가져옵니다.
+
+        네이버 증권이 응답하지 않으면 대체 소스나 오래된 캐시 값을 쓰고, 그 값에는
+        안내 문구(notice)를 넣습니다.
+        """
+        try:
+            return await quote_cache.get_many_or_fetch(
+                "naver_stock", codes, MarketDataFetcher.request_korean_stocks
+            )
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            logging.warning(f"Naver stock request failed: {str(e)}")
+
+        served = await asyncio.gather(
+            *(
+                fallback_chain.fetch(
+                    "naver_stock",
+                    code,
+                    {
+                        "naver_mobile_stock": partial(
+                            MarketDataFetcher.request_naver_mobile_stock, code
+                        )
+                    },
+                )
+                for code in codes
+            )
+        )
+        return {code: item.annotated() for code, item in zip(codes, served) if item}
+
+    @staticmethod
+    async def request_korean_stocks(codes: List[str]) -> Dict[str, Dict]:
+        """캐시를 거치지 않고 NAVER_STOCK_BATCH_SIZE 개씩 묶어서 요청합니다."""
+
+        async def fetch_batch(batch: List[str]) -> Dict[str, Dict]:
+            url = f"https://polling.finance.naver.com/api/realtime/domestic/stock/{','.join(batch)}"
+            request_wrapper = RequestWrapper()
+            response = await request_wrapper.get(url)
+            response.raise_for_status()
+            return {
+                data["itemCode"]: data for data in json.loads(response.text)["datas"]
+            }
+
+        size = MarketDataFetcher.NAVER_STOCK_BATCH_SIZE
+        batches = await asyncio.gather(
+            *(fetch_batch(codes[i : i + size]) for i in range(0, len(codes), size))
+        )
+        return {code: data for batch in batches for code, data in batch.items()}
+
+    @staticmethod
+    async def request_naver_mobile_stock(code: str) -> Dict:
+        """네이버 모바일 증권에서 한국 주식 시세를 가져옵니다. 네이버 증권 대체 소스입니다."""
+        url = f"https://m.stock.naver.com/api/stock/{code}/basic"
         request_wrapper = RequestWrapper()
-        response = request_wrapper.get(url)
-        return json.loads(response.text)["datas"][0]
+        response = await request_wrapper.get(url)
+        response.raise_for_status()
+        return response.json()
 
     @staticmethod
-    def fetch_korean_market(market_type: KoreanMarketType) -> Dict:
-        """한국 시장 지수를 가져옵니다."""
+    async def fetch_korean_market(market_type: KoreanMarketType) -> Dict:
+        """한국 시장 지수를 가져옵니다. 실패하면 오래된 캐시 값이라도 씁니다."""
+        try:
+            return await quote_cache.get_or_fetch(
+                "naver_market",
+                market_type.value,
+                lambda: MarketDataFetcher.request_korean_market(market_type),
+            )
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            served = await fallback_chain.fetch("naver_market", market_type.value, {})
+            if served is None:
+                raise
+            logging.warning(f"Naver index request failed: {str(e)}")
+            return served.annotated()
+
+    @staticmethod
+    async def request_korean_market(market_type: KoreanMarketType) -> Dict:
         url = f"https://m.stock.naver.com/api/index/{market_type.value}/basic"
         request_wrapper = RequestWrapper()
-        response = request_wrapper.get(url)
+        response = await request_wrapper.get(url)
+        response.raise_for_status()
         return json.loads(response.text)
 
     @staticmethod
-    def fetch_us_stock(ticker: str, flat: bool = False) -> tuple[str, str]:
+    async def fetch_us_stock(ticker: str, flat: bool = False) -> tuple[str, str]:
         """미국 주식 데이터를 가져옵니다."""
         ticker = ticker.upper()
-        data = rh.get_data(ticker)
+        try:
+            data = await quote_cache.get_or_fetch(
+                "robinhood", ticker, lambda: rh.get_data(ticker)
+            )
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            logging.warning(f"Robinhood request failed for {ticker}: {str(e)}")
+            return await MarketDataFetcher._fetch_us_stock_fallback(ticker, flat)
 
         if not data:
             return "", "종목 정보를 찾지 못했습니다."
 
         return MarketDataFetcher._parse_us_stock_data(data, ticker, flat)
 
+    @staticmethod
+    async def _fetch_us_stock_fallback(ticker: str, flat: bool) -> tuple[str, str]:
+        """Robinhood 대신 대체 소스나 오래된 캐시 값으로 메시지를 만듭니다."""
+        served = await fallback_chain.fetch(
+            "robinhood",
+            ticker,
+            {
+                "naver_world": partial(
+                    MarketDataFetcher.request_naver_world_stock, ticker
+                )
+            },
+        )
+        if served is None:
+            return "", "시세를 가져오지 못했습니다. 잠시 후 다시 시도해 주세요."
+
+        if served.source == "naver_world":
+            company_name, message = MarketDataFetcher._parse_naver_world_data(
+                served.value, ticker, flat
+            )
+        else:
+            company_name, message = MarketDataFetcher._parse_us_stock_data(
+                served.value, ticker, flat
+            )
+        separator = " " if flat else "\n"
+        return company_name, f"{message}{separator}{served.notice}"
+
+    @staticmethod
+    async def request_naver_world_stock(ticker: str) -> Optional[Dict]:
+        """네이버 해외증시에서 미국 주식 시세를 가져옵니다. Robinhood 대체 소스입니다."""
+        code = await quote_cache.get_or_fetch(
+            "naver_world_code",
+            ticker,
+            partial(MarketDataFetcher.request_naver_world_code, ticker),
+        )
+        if not code:
+            return None
+
+        request_wrapper = RequestWrapper()
+        response = await request_wrapper.get(
+            f"https://api.stock.naver.com/stock/{code}/basic"
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    async def request_naver_world_code(ticker: str) -> Optional[str]:
+        """티커를 네이버 해외증시 종목 코드(AAPL.O 같은 로이터 코드)로 바꿉니다."""
+        if not ticker.replace(".", "").isalpha():
+            # ^IXIC 같은 지수와 GC=F 같은 선물은 대체 소스가 없습니다.
+            return None
+
+        request_wrapper = RequestWrapper()
+        response = await request_wrapper.get(
+            "https://ac.stock.naver.com/ac", params={"q": ticker, "target": "stock"}
+        )
+        response.raise_for_status()
+        for item in response.json().get("items", []):
+            if item.get("code") == ticker and item.get("nationCode") == "USA":
+                return item.get("reutersCode")
+        return None
+
+    @staticmethod
+    async def fetch_us_stocks(
+        tickers: List[str], flat: bool = False
+    ) -> List[tuple[str, str]]:
+        """여러 미국 주식 데이터를 동시에 가져옵니다.
+
+        동시에 US_STOCK_CONCURRENCY 개까지만 요청하고, 종목마다 US_STOCK_TIMEOUT
+        안에 응답하지 않거나 실패한 종목은 안내 문구로 대신합니다. 결과 순서는
+        입력 순서와 같습니다.
+        """
+        semaphore = asyncio.Semaphore(MarketDataFetcher.US_STOCK_CONCURRENCY)
+
+        async def fetch(ticker: str) -> tuple[str, str]:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        MarketDataFetcher.fetch_us_stock(ticker, flat),
+                        MarketDataFetcher.US_STOCK_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    logging.warning(f">>> 미국 주식정보 시간 초과 {ticker}")
+                    return ticker.upper(), "응답이 늦어 조회하지 못했습니다."
+                except Exception as e:
+                    logging.error(f">>> 미국 주식정보 에러 {ticker}: {str(e)}")
+                    return ticker.upper(), "종목 정보를 찾지 못했습니다."
+
+        return await asyncio.gather(*(fetch(ticker) for ticker in tickers))
+
+    @staticmethod
+    async def fetch_crypto(market: str) -> Optional[Dict]:
+        """업비트 암호화폐 시세를 가져옵니다."""
+        return (await MarketDataFetcher.fetch_cryptos([market])).get(market)
+
+    @staticmethod
+    async def fetch_cryptos(markets: List[str]) -> Dict[str, Dict]:
+        """여러 업비트 시세를 가져옵니다.
+
+        업비트 스트림이 연결되어 있으면 스트림에서 받은 시세를 그대로 쓰고, 나머지
+        마켓만 모아서 한 번에 요청합니다. 없는 마켓은 반환 값에서 빠집니다.
+        """
+        results = {}
+        missing = []
+        for market in markets:
+            if (data := upbit_feed.get(market)) is not None:
+                results[market] = data
+            else:
+                missing.append(market)
+
+        if missing:
+            results.update(
+                await quote_cache.get_many_or_fetch(
+                    "upbit_ticker", missing, MarketDataFetcher.request_cryptos
+                )
+            )
+        return {market: results[market] for market in markets if market in results}
+
+    @staticmethod
+    async def request_cryptos(markets: List[str]) -> Dict[str, Dict]:
+        """캐시를 거치지 않고 markets= 요청 하나로 가져옵니다.
+
+        업비트는 없는 마켓이 하나라도 섞이면 요청 전체를 404 로 거절하므로, 마켓
+        목록에 있는 마켓만 요청합니다.
+        """
+        known = await MarketDataFetcher.fetch_crypto_markets()
+        markets = [market for market in markets if market in known]
+        if not markets:
+            return {}
+
+        await upbit_feed.subscribe(markets)
+        url = f"https://api.upbit.com/v1/ticker?markets={','.join(markets)}"
+        request_wrapper = RequestWrapper()
+        response = await request_wrapper.get(url)
+        response.raise_for_status()
+        return {data["market"]: data for data in response.json()}
+
+    @staticmethod
+    async def fetch_crypto_markets() -> Set[str]:
+        """업비트에서 거래 중인 마켓 코드 목록을 가져옵니다."""
+
+        async def fetch() -> List[str]:
+            request_wrapper = RequestWrapper()
+            response = await request_wrapper.get("https://api.upbit.com/v1/market/all")
+            response.raise_for_status()
+            return [data["market"] for data in response.json()]
+
+        return set(await quote_cache.get_or_fetch("upbit_markets", "all", fetch))
+
     @staticmethod
     def _get_icon_by_profit_percent(profit_percent: float) -> str:
         """수익률에 따른 아이콘을 반환합니다."""
@@ -87,6 +341,37 @@ class MarketDataFetcher:
         message = " ".join(messages) if flat else "\n".join(messages)
         return company_name, message
 
+    @staticmethod
+    def _parse_naver_world_data(
+        data: Dict, ticker: str, flat: bool = False
+    ) -> tuple[str, str]:
+        """네이버 해외증시 데이터를 _parse_us_stock_data 와 같은 모양으로 파싱합니다."""
+        company_name = f"{data['stockName']} ({ticker})"
+        percentage = float(data["fluctuationsRatio"])
+        icon = MarketDataFetcher._get_icon_by_profit_percent(percentage)
+        messages = [
+            f"{icon} 현재가: {data['closePrice']}"
+            f" {data['compareToPreviousClosePrice']} ({percentage:.2f}%)"
+        ]
+        if over := data.get("overMarketPriceInfo"):
+            percentage = float(over["fluctuationsRatio"])
+            icon = MarketDataFetcher._get_icon_by_profit_percent(percentage)
+            messages.append(f"{icon} 시간외: {over['overPrice']} ({percentage:.2f}%)")
+
+        message = " ".join(messages) if flat else "\n".join(messages)
+        return company_name, message
+
+    @staticmethod
+    def us_trade_price(data: Dict) -> float:
+        """메시지에 보여주는 것과 같은 가격(장 밖에서는 시간외 가격)을 반환합니다."""
+        display = data["chart_section"]["default_display"]
+        quote = data["chart_section"]["quote"]
+        for value_type in ["secondary_value", "tertiary_value"]:
+            value = display.get(value_type)
+            if value and value["description"]["value"] != "Today":
+                return float(quote["last_extended_hours_trade_price"])
+        return float(quote["last_trade_price"])
+
     @staticmethod
     def _translate_market_desc(value: str) -> str:
         """마켓 설명을 번역합니다."""
@@ -99,20 +384,119 @@ class MarketDataFetcher:
         return translations.get(value, value)
 
 
+def is_multiple_stock_query(args: List[str]) -> bool:
+    """여러 종목을 한 번에 조회하는 입력인지 확인합니다.
+
+    공백이 들어간 종목명(예: KODEX 200)은 한 종목으로 취급합니다.
+    """
+    if len(args) < 2 or args[-1] in ["일봉", "주봉"]:
+        return False
+    if args[0].isnumeric():
+        return True
+    return stock_data.get_index().code_of(" ".join(args)) is None
+
+
 def get_stock_code(args: str) -> Optional[str]:
     """주식 종목 코드를 검색합니다."""
     if args[0].isnumeric():
         return args[0]
 
+    stock_name = " ".join(args[:-1]) if args[-1] in ["일봉", "주봉"] else " ".join(args)
+    code = stock_data.get_index().lookup(stock_name)
+    if code:
+        logging.info(f">>> 코스피 종목 이름으로 {code} 반환")
+    return code
+
+
+async def load_stock_data(context: ContextTypes.DEFAULT_TYPE):
+    """종목 데이터를 백그라운드에서 읽고 최신 목록으로 갱신합니다."""
+    if not stock_data.is_loaded():
+        with boot_timer.phase("load stock snapshot"):
+            await asyncio.to_thread(stock_data.load)
+    if not rh.loaded:
+        with boot_timer.phase("load robinhood data"):
+            await rh.ensure_loaded()
+    with boot_timer.phase("refresh KRX listing"):
+        await asyncio.to_thread(stock_data.refresh)
+    boot_timer.log_report()
+
+
+async def refresh_stock_data(context: ContextTypes.DEFAULT_TYPE):
+    """KRX 종목 목록을 주기적으로 갱신합니다."""
+    await asyncio.to_thread(stock_data.refresh)
+
+
+async def refresh_robinhood_token(context: ContextTypes.DEFAULT_TYPE):
+    """Robinhood 토큰이 만료되기 전에 미리 갱신합니다."""
+    if not rh.loaded or not rh.token_needs_refresh():
+        return
+
+    logging.info("Refreshing Robinhood token before it expires")
     try:
-        stock_name = (
-            " ".join(args[:-1]) if args[-1] in ["일봉", "주봉"] else " ".join(args)
+        await rh.refresh_access_token()
+    except Exception:
+        # 실패 로그는 renew_access_token 에서 남기고, 다음 주기에 다시 시도합니다.
+        pass
+
+
+async def prefetch_market_data(context: ContextTypes.DEFAULT_TYPE):
+    """갱신할 때가 된 시세를 미리 가져옵니다."""
+    await prefetcher.run_due()
+
+
+async def prefetch_korean_markets(symbols: List[str], ttl: float) -> None:
+    await asyncio.gather(
+        *(
+            quote_cache.refresh(
+                "naver_market",
+                symbol,
+                partial(
+                    MarketDataFetcher.request_korean_market, KoreanMarketType(symbol)
+                ),
+                ttl,
+            )
+            for symbol in symbols
+        )
+    )
+
+
+async def prefetch_korean_stocks(codes: List[str], ttl: float) -> None:
+    await quote_cache.refresh_many(
+        "naver_stock", codes, MarketDataFetcher.request_korean_stocks, ttl
+    )
+
+
+async def prefetch_us_stocks(tickers: List[str], ttl: float) -> None:
+    """미국 주식 시세와, 아직 file_id 가 없는 실시간 차트 이미지를 미리 가져옵니다."""
+    if not rh.loaded:
+        return
+
+    semaphore = asyncio.Semaphore(MarketDataFetcher.US_STOCK_CONCURRENCY)
+
+    async def prefetch(ticker: str) -> None:
+        async with semaphore:
+            await quote_cache.refresh(
+                "robinhood", ticker, partial(rh.get_data, ticker), ttl
+            )
+            key = (
+                "us",
+                ticker,
+                ChartType.REALTIME.name,
+                chart_bucket(ChartType.REALTIME),
+            )
+            if not await chart_cache.get(key):
+                await fetch_usstock_chart_photo(ticker, ChartType.REALTIME)
+
+    await asyncio.gather(*(prefetch(ticker) for ticker in tickers))
+
+
+async def prefetch_crypto(markets: List[str], ttl: float) -> None:
+    """업비트 스트림으로 받고 있지 않은 마켓만 한 번에 새로 가져옵니다."""
+    markets = [market for market in markets if upbit_feed.get(market) is None]
+    if markets:
+        await quote_cache.refresh_many(
+            "upbit_ticker", markets, MarketDataFetcher.request_cryptos, ttl
         )
-        code = str(df_code[stock_name][0])
-        logging.info(f">>> 코스피 종목 이름으로 {code} 반환")
-        return code
-    except:
-        return None
 
 
 async def get_kospi_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -124,55 +508,102 @@ async def get_kospi_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     logging.info(f">>> 코스피 종목 정보 {context.args}")
 
+    if is_multiple_stock_query(context.args):
+        return await get_kospi_info_multiple(update, context)
+
     code = get_stock_code(context.args)
     if code is None:
-        return await context.bot.send_message(
-            chat_id=update.message.chat_id, text="종목 정보를 찾지 못했습니다."
+        return await sender.send_message(
+            context.bot, update.message.chat_id, "종목 정보를 찾지 못했습니다."
+        )
+    prefetcher.record("kr", [code])
+
+    data = await MarketDataFetcher.fetch_korean_stock(code)
+    if data is None:
+        return await sender.send_message(
+            context.bot, update.message.chat_id, "종목 정보를 찾지 못했습니다."
         )
 
-    data = MarketDataFetcher.fetch_korean_stock(code)
     caption = format_korean_stock_message(data)
 
-    photo_url = get_chart_photo_url(code, context.args[-1])
-    if context.args[-1] == "주봉":
+    chart_type = ChartType.WEEK if context.args[-1] == "주봉" else ChartType.REALTIME
+    photo_url = get_chart_photo_url(code, chart_type)
+    if chart_type == ChartType.WEEK:
         caption += "\n주봉 차트입니다."
 
-    for retry_count in range(3):
-        try:
-            return await context.bot.send_photo(
-                chat_id=update.message.chat_id, photo=photo_url, caption=caption
-            )
-        except Exception:
-            logging.error(f">>> 코스피 종목 정보 에러 {retry_count}회 재시도")
-            time.sleep(1)
-            continue
+    key = ("kr", code, chart_type.name, chart_bucket(chart_type))
+    return await send_chart_or_text(
+        context.bot, update.message.chat_id, key, photo_url, caption
+    )
+
+
+async def send_chart_or_text(
+    bot: Bot,
+    chat_id: int,
+    key: Hashable,
+    photo: Optional[Union[bytes, str]],
+    caption: str,
+) -> Message:
+    """차트 사진과 함께 보내고, Telegram 이 차트 URL 을 가져오지 못하면 글만 보냅니다."""
+    try:
+        return await chart_cache.send_photo(bot, chat_id, key, photo, caption)
+    except BadRequest as e:
+        if not is_retryable(e):
+            raise
+        logging.warning(f"Chart unavailable, sending text only: {str(e)}")
+    return await sender.send_message(bot, chat_id, caption)
+
+
+async def get_kospi_info_multiple(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """여러 한국 주식 정보를 한 번에 조회합니다."""
+    names = context.args
+    codes = {name: get_stock_code([name]) for name in names}
+    prefetcher.record("kr", [code for code in codes.values() if code])
+    stocks = await MarketDataFetcher.fetch_korean_stocks(
+        [code for code in codes.values() if code]
+    )
+
+    lines = []
+    for name in names:
+        if data := stocks.get(codes[name]):
+            lines.append(format_korean_stock_message(data))
+        else:
+            lines.append(f"{name}: 종목 정보를 찾지 못했습니다.")
+
+    await sender.send_message(context.bot, update.message.chat_id, "\n".join(lines))
 
 
 def format_korean_stock_message(data: Dict) -> str:
     """한국 주식 메시지를 포맷팅합니다."""
-    return (
+    return append_notice(
         f"종목명: {data['stockName']} / "
         f"현재: {data['closePrice']} "
-        f"({float(data['fluctuationsRatio']):.2f}%)"
+        f"({float(data['fluctuationsRatio']):.2f}%)",
+        data,
     )
 
 
-def get_chart_photo_url(code: str, chart_type: str) -> str:
+def get_chart_photo_url(code: str, chart_type: ChartType) -> str:
     """차트 이미지 URL을 생성합니다."""
     base_url = "https://ssl.pstatic.net/imgfinance/chart/item/area/"
-    timeframe = "week/" if chart_type == "주봉" else "day/"
-    return f"{base_url}{timeframe}{code}.png?ver={str(int(time.time()))}"
+    timeframe = "week/" if chart_type == ChartType.WEEK else "day/"
+    return f"{base_url}{timeframe}{code}.png?ver={chart_bucket(chart_type)}"
 
 
 async def get_korea_market_point(
     update: Update, context: ContextTypes.DEFAULT_TYPE, type: KoreanMarketType
 ):
     """한국 시장 지수를 조회합니다."""
-    resp = MarketDataFetcher.fetch_korean_market(type)
-
-    await context.bot.send_message(
-        chat_id=update.message.chat_id,
-        text=f'{type.name} 지수: {resp["closePrice"]} ({resp["compareToPreviousClosePrice"]} {resp["fluctuationsRatio"]}%)',
+    prefetcher.record("kr_index", [type.value])
+    resp = await MarketDataFetcher.fetch_korean_market(type)
+
+    await sender.send_message(
+        context.bot,
+        update.message.chat_id,
+        append_notice(
+            f'{type.name} 지수: {resp["closePrice"]} ({resp["compareToPreviousClosePrice"]} {resp["fluctuationsRatio"]}%)',
+            resp,
+        ),
     )
 
 
@@ -188,6 +619,7 @@ async def get_usstock_info(
         ticker = str(context.args[0]).upper()
 
     logging.info(f">>> 미국 주식정보 {ticker}")
+    prefetcher.record("us", [ticker])
 
     try:
         chart_type = (
@@ -197,20 +629,28 @@ async def get_usstock_info(
         )
     except Exception:
         message = f"잘못된 차트 타입입니다.\n가능한 값: {', '.join([str(chart_type.value) for chart_type in ChartType])}"
-        await context.bot.send_message(chat_id=update.message.chat_id, text=message)
+        await sender.send_message(context.bot, update.message.chat_id, message)
         return
 
-    company_name, stock_data = MarketDataFetcher.fetch_us_stock(ticker)
-    photo = fetch_usstock_chart_photo(ticker, chart_type)
+    key = ("us", ticker, chart_type.name, chart_bucket(chart_type))
+    cached = await chart_cache.get(key)
+    if cached:
+        company_name, stock_data = await MarketDataFetcher.fetch_us_stock(ticker)
+        photo = None
+    else:
+        (company_name, stock_data), photo = await asyncio.gather(
+            MarketDataFetcher.fetch_us_stock(ticker),
+            fetch_usstock_chart_photo(ticker, chart_type),
+        )
 
     message = format_us_stock_message(company_name, stock_data, chart_type)
 
-    if photo:
-        await context.bot.send_photo(
-            chat_id=update.message.chat_id, photo=photo, caption=message
+    if photo or cached:
+        await send_chart_or_text(
+            context.bot, update.message.chat_id, key, photo or None, message
         )
     else:
-        await context.bot.send_message(chat_id=update.message.chat_id, text=message)
+        await sender.send_message(context.bot, update.message.chat_id, message)
 
 
 def format_us_stock_message(
@@ -225,28 +665,13 @@ def format_us_stock_message(
     return message
 
 
-def _validate_chart_image(image: bytes) -> bool:
-    """차트 이미지가 유효한지 검증합니다."""
-    global market_close_image
-    try:
-        return market_close_image == image
-    except NameError:
-        import os
-
-        current_path = os.path.dirname(os.path.abspath(__file__))
-        market_close_path = os.path.join(current_path, "market_close.png")
-        if os.path.exists(market_close_path):
-            with open(market_close_path, "rb") as f:
-                market_close_image = f.read()
-                return market_close_image == image
-
-    raise Exception("chart image validation failed")
-
-
-def fetch_usstock_chart_photo(
+async def fetch_usstock_chart_photo(
     ticker: str, chart_type: ChartType
 ) -> Optional[Union[bytes, bool]]:
-    """미국 주식 차트 이미지를 가져옵니다."""
+    """미국 주식 차트 이미지를 가져옵니다.
+
+    차트 서버 장애(연결 오류, 5xx, 열린 회로)면 None 을 반환해서 시세만 보내게 합니다.
+    """
     try:
         chart_types_mapper = {
             ChartType.REALTIME: ("d", "stock"),
@@ -262,36 +687,33 @@ def fetch_usstock_chart_photo(
     except KeyError:
         return False
 
-    url = f"https://t1.daumcdn.net/finance/chart/us/{chart_types_mapper[1]}/{chart_types_mapper[0]}/{ticker}.png?timestamp={str(int(time.time()))}"
-    res = requests.get(url)
-    if res.status_code != 200:
+    url = f"https://t1.daumcdn.net/finance/chart/us/{chart_types_mapper[1]}/{chart_types_mapper[0]}/{ticker}.png"
+    try:
+        content = await chart_fetcher.fetch(url, chart_bucket(chart_type))
+    except Exception as e:
+        if not is_upstream_failure(e):
+            raise
+        logging.warning(f"Failed to fetch chart for {ticker}: {str(e)}")
         return None
-
-    if _validate_chart_image(res.content):
+    if content is None or is_market_close_image(content):
         return None
 
-    return res.content
+    return content
 
 
 async def get_usstock_info_multiple(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """여러 미국 주식 정보를 조회합니다."""
     tickers = context.args
     logging.info(f">>> 미국 주식정보 (multiple) {tickers}")
+    prefetcher.record("us", [ticker.upper() for ticker in tickers])
 
-    message = ""
-    with ThreadPoolExecutor() as executor:
-        futures = {
-            executor.submit(MarketDataFetcher.fetch_us_stock, ticker, True): ticker
-            for ticker in tickers
-        }
+    results = await MarketDataFetcher.fetch_us_stocks(tickers, flat=True)
 
-        done, not_done = wait(futures.keys(), return_when=ALL_COMPLETED)
-
-        for future in futures.keys():
-            company_name, stock_data = future.result()
-            message += f"{company_name}\n{stock_data}\n\n"
+    message = ""
+    for company_name, stock_data in results:
+        message += f"{company_name}\n{stock_data}\n\n"
 
-    await context.bot.send_message(chat_id=update.message.chat_id, text=message)
+    await sender.send_message(context.bot, update.message.chat_id, message)
 
 
 async def fear_and_greed_index(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -299,30 +721,66 @@ async def fear_and_greed_index(update: Update, context: ContextTypes.DEFAULT_TYP
     try:
         url = f'https://production.dataviz.cnn.io/index/fearandgreed/graphdata/{datetime.now().strftime("%Y-%m-%d")}'
         request_wrapper = RequestWrapper()
-        response = request_wrapper.get(url)
+        response = await request_wrapper.get(url)
         response.raise_for_status()
         data = response.json()
         score = round(data["fear_and_greed"]["score"], 1)
         rating = data["fear_and_greed"]["rating"]
-        await update.message.reply_text(f"현재 fear & greed Index\n{score} {rating}\n")
+        await sender.reply_text(update, f"현재 fear & greed Index\n{score} {rating}\n")
     except Exception:
-        await update.message.reply_text("데이터를 가져오는데 실패했습니다.")
+        await sender.reply_text(update, "데이터를 가져오는데 실패했습니다.")
+
+
+def crypto_market(symbol: str) -> str:
+    """BTC 같은 심볼을 업비트 마켓 코드(KRW-BTC)로 바꿉니다."""
+    symbol = symbol.upper()
+    return symbol if "-" in symbol else f"KRW-{symbol}"
+
+
+def format_crypto_price(price: float) -> str:
+    if abs(price) >= 100:
+        return f"{price:,.0f}"
+    return f"{price:,.4f}".rstrip("0").rstrip(".")
 
 
 async def btc(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """비트코인 가격을 조회합니다."""
-    url = "https://api.upbit.com/v1/ticker?markets=KRW-BTC"
-    request_wrapper = RequestWrapper()
-    response = request_wrapper.get(url)
-    data = response.json()
-    trade_price = int(data[0]["trade_price"])
-    signed_change_rate = data[0]["signed_change_rate"] * 100
-    signed_change_price = int(data[0]["signed_change_price"])
-    await update.message.reply_text(
-        f"[업비트] 현재가: {trade_price:,}원 ({signed_change_rate:.2f}% {signed_change_price:,})"
+    prefetcher.record("crypto", ["KRW-BTC"])
+    data = await MarketDataFetcher.fetch_crypto("KRW-BTC")
+    if data is None:
+        await sender.reply_text(update, "[업비트] 비트코인 시세를 가져오지 못했습니다.")
+        return
+
+    trade_price = int(data["trade_price"])
+    signed_change_rate = data["signed_change_rate"] * 100
+    signed_change_price = int(data["signed_change_price"])
+    await sender.reply_text(
+        update,
+        f"[업비트] 현재가: {trade_price:,}원 ({signed_change_rate:.2f}% {signed_change_price:,})",
     )
 
 
+async def coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """여러 암호화폐 가격을 한 번에 조회합니다."""
+    markets = list(dict.fromkeys(crypto_market(arg) for arg in context.args or ["BTC"]))
+    prefetcher.record("crypto", markets)
+    tickers = await MarketDataFetcher.fetch_cryptos(markets)
+
+    lines = []
+    for market in markets:
+        if (data := tickers.get(market)) is None:
+            lines.append(f"{market}: 마켓 정보를 찾지 못했습니다.")
+            continue
+        unit = "원" if market.startswith("KRW-") else f" {market.split('-')[0]}"
+        lines.append(
+            f"{market.removeprefix('KRW-')}: "
+            f"{format_crypto_price(data['trade_price'])}{unit} "
+            f"({data['signed_change_rate'] * 100:.2f}% "
+            f"{format_crypto_price(data['signed_change_price'])})"
+        )
+    await sender.reply_text(update, "\n".join(lines))
+
+
 async def wallstreetbets(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """월스트리트베츠 센티먼트를 조회합니다."""
 
@@ -332,7 +790,7 @@ async def wallstreetbets(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         url = "https://tradestie.com/api/v1/apps/reddit"
         request_wrapper = RequestWrapper()
-        response = request_wrapper.get(url)
+        response = await request_wrapper.get(url)
         response.raise_for_status()
         data = response.json()[:10]
 
@@ -341,6 +799,6 @@ async def wallstreetbets(update: Update, context: ContextTypes.DEFAULT_TYPE):
             for i, d in enumerate(data)
         )
 
-        await update.message.reply_text(message)
+        await sender.reply_text(update, message)
     except Exception:
-        await update.message.reply_text("데이터를 가져오는데 실패했습니다.")
+        await sender.reply_text(update, "데이터를 가져오는데 실패했습니다.")
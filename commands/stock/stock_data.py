@@ -1,9 +1,23 @@
-from typing import Dict, Hashable
+import io
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
 
-import pandas as pd
-import requests
+from commands.http_client import http_clients
+from commands.stock.symbol_index import SymbolIndex, read_entries
 
 CSV_FILE_NAME = "stock_data.csv"
+MIN_LISTING_RATIO = 0.5
+
+CUSTOM_FIXTURES: List[Tuple[str, str]] = [
+    ("곱버스", "252670"),
+]
+
+_index: Optional[SymbolIndex] = None
+_fixture_index: Optional[SymbolIndex] = None
+_refresh_lock = threading.Lock()
 
 
 def get_default_headers() -> Dict[str, str]:
@@ -12,16 +26,32 @@ def get_default_headers() -> Dict[str, str]:
     }
 
 
-def get_stock_data() -> None:
+def get_stock_data() -> str:
+    """KRX 에서 전체 종목 CSV 를 받아 문자열로 반환합니다."""
     code = _get_otp()
     download_url = "http://data.krx.co.kr/comm/fileDn/download_csv/download.cmd"
-    res = requests.post(
+    res = http_clients.get_sync_client(download_url).post(
         download_url, data={"code": code}, headers=get_default_headers()
     )
     res.raise_for_status()
-    decoded_content = res.content.decode("euc-kr")
-    with open(CSV_FILE_NAME, "w", encoding="utf-8") as f:
-        f.write(decoded_content)
+    return res.content.decode("euc-kr")
+
+
+def write_snapshot(content: str) -> None:
+    """임시 파일에 쓴 뒤 교체해서, 쓰는 도중 실패해도 기존 스냅샷을 보존합니다."""
+    directory = os.path.dirname(os.path.abspath(CSV_FILE_NAME))
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{CSV_FILE_NAME}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, CSV_FILE_NAME)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
 
 
 def _get_otp() -> str:
@@ -34,26 +64,79 @@ def _get_otp() -> str:
         "name": "fileDown",
         "url": "dbms/MDC/STAT/standard/MDCSTAT01901",
     }
-    res = requests.post(req_url, data=payload, headers=get_default_headers())
+    res = http_clients.get_sync_client(req_url).post(
+        req_url, data=payload, headers=get_default_headers()
+    )
     res.raise_for_status()
     return res.text
 
 
-def apply_custom_fixtures(df_code: Dict[Hashable, int]) -> Dict[Hashable, int]:
-    df_code["곱버스"] = ["252670"]
-    return df_code
+def load() -> SymbolIndex:
+    """디스크에 저장된 종목 스냅샷을 읽어 종목 인덱스를 교체합니다."""
+    global _index
 
+    if not os.path.exists(CSV_FILE_NAME):
+        logging.warning(f"{CSV_FILE_NAME} does not exist yet")
+        _index = SymbolIndex(CUSTOM_FIXTURES)
+        return _index
 
-def create() -> Dict[Hashable, int]:
-    try:
-        get_stock_data()
-    except Exception as e:
-        print(e)
-    stock_data = pd.read_csv(
-        CSV_FILE_NAME, usecols=["한글 종목약명", "단축코드"], encoding="utf8"
-    )
-    df_code: Dict[Hashable, int] = stock_data.set_index("한글 종목약명").T.to_dict(
-        "list"
-    )
-    df_code = apply_custom_fixtures(df_code)
-    return df_code
+    _index = SymbolIndex.from_csv(CSV_FILE_NAME, extra_entries=CUSTOM_FIXTURES)
+    logging.info(f"Loaded {len(_index)} symbols from {CSV_FILE_NAME}")
+    return _index
+
+
+def refresh() -> SymbolIndex:
+    """KRX 에서 종목 목록을 새로 받아 바뀐 종목만 인덱스에 반영합니다(SymbolIndex.apply).
+
+    네트워크와 CSV 파싱을 모두 수행하므로 이벤트 루프 밖에서 호출해야 합니다.
+    실패하면 기존 스냅샷과 인덱스를 그대로 유지합니다.
+    """
+    global _index
+
+    with _refresh_lock:
+        current = _index or load()
+        try:
+            content = get_stock_data()
+            entries = read_entries(io.StringIO(content))
+        except Exception as e:
+            logging.error(f"Failed to download KRX listing: {str(e)}")
+            return current
+
+        if len(entries) < len(current) * MIN_LISTING_RATIO:
+            logging.error(
+                f"KRX listing looks truncated ({len(entries)} rows), keeping snapshot"
+            )
+            return current
+
+        diff = current.diff([*entries, *CUSTOM_FIXTURES])
+        if not diff:
+            logging.info("KRX listing is up to date")
+            return current
+
+        try:
+            write_snapshot(content)
+        except OSError as e:
+            logging.error(f"Failed to write {CSV_FILE_NAME}: {str(e)}")
+
+        _index = current.apply(diff)
+        logging.info(f"KRX listing refreshed: {diff.summary()}")
+        return _index
+
+
+def is_loaded() -> bool:
+    return _index is not None
+
+
+def get_index() -> SymbolIndex:
+    """현재 종목 인덱스를 반환합니다.
+
+    이벤트 루프에서 불리므로 디스크를 읽지 않습니다. 시작할 때(post_init) 스냅샷을
+    읽기 전이면 CUSTOM_FIXTURES 만 있는 인덱스를 반환합니다.
+    """
+    global _fixture_index
+
+    if _index is not None:
+        return _index
+    if _fixture_index is None:
+        _fixture_index = SymbolIndex(CUSTOM_FIXTURES)
+    return _fixture_index
@@ -0,0 +1,396 @@
+import csv
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+NAME_COLUMN = "한글 종목약명"
+CODE_COLUMN = "단축코드"
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+SYLLABLES_PER_CHOSUNG = 588
+
+
+def normalize(text: str) -> str:
+    """공백을 제거하고 소문자로 바꿉니다."""
+    return "".join(text.split()).lower()
+
+
+def to_chosung(text: str) -> str:
+    """한글 음절을 초성으로 바꿉니다. 한글이 아닌 문자는 그대로 둡니다."""
+    result = []
+    for char in normalize(text):
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            result.append(CHOSUNG[(code - HANGUL_BASE) // SYLLABLES_PER_CHOSUNG])
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def is_chosung_query(text: str) -> bool:
+    return bool(text) and all(char in CHOSUNG for char in normalize(text))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """a, b 의 편집 거리를 계산합니다. limit 을 넘으면 limit + 1 을 반환합니다."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+ID_BITS = 20
+ID_MASK = (1 << ID_BITS) - 1
+# 지워진 번호가 살아 있는 종목 수의 이 비율을 넘으면 apply 가 인덱스를 새로 만듭니다.
+MAX_DEAD_RATIO = 0.25
+
+
+def read_entries(f: IO[str]) -> List[Tuple[str, str]]:
+    """KRX 종목 CSV 에서 (종목명, 코드) 목록을 읽습니다."""
+    return [
+        (row[NAME_COLUMN].strip(), row[CODE_COLUMN].strip())
+        for row in csv.DictReader(f)
+    ]
+
+
+@dataclass
+class SymbolDiff:
+    """두 종목 목록 사이의 변경 사항"""
+
+    added: List[Tuple[str, str]] = field(default_factory=list)
+    removed: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def renamed(self) -> List[Tuple[str, str, str]]:
+        """같은 코드의 이름이 바뀐 항목을 (코드, 이전 이름, 새 이름)으로 반환합니다."""
+        removed_names = {code: name for name, code in self.removed}
+        return [
+            (code, removed_names[code], name)
+            for name, code in self.added
+            if code in removed_names
+        ]
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.renamed())} renamed"
+        )
+
+
+def _bigrams(text: str) -> Iterator[int]:
+    """문자 두 개를 하나의 정수로 묶은 바이그램 값을 반환합니다."""
+    if len(text) == 1:
+        yield ord(text) << 21
+    for i in range(len(text) - 1):
+        yield ord(text[i]) << 21 | ord(text[i + 1])
+
+
+class _PackedStrings:
+    """문자열 목록을 하나의 문자열과 오프셋 배열로 저장합니다.
+
+    문자열마다 파이썬 객체를 두지 않아서 수천 개의 짧은 종목명을 저장할 때
+    메모리를 크게 줄여 줍니다.
+    """
+
+    __slots__ = ("_blob", "_offsets")
+
+    def __init__(self, values: Iterable[str]):
+        offsets = array("I", [0])
+        parts = []
+        for value in values:
+            parts.append(value)
+            offsets.append(offsets[-1] + len(value))
+        self._blob = "".join(parts)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+    def extended(self, values: Iterable[str]) -> "_PackedStrings":
+        """values 를 뒤에 붙인 사본을 반환합니다. 기존 번호는 그대로입니다."""
+        result = _PackedStrings(())
+        result._offsets = array("I", self._offsets)
+        parts = [self._blob]
+        for value in values:
+            parts.append(value)
+            result._offsets.append(result._offsets[-1] + len(value))
+        result._blob = "".join(parts)
+        return result
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+
+class _SortedIds:
+    """key 함수 기준으로 정렬된 종목 번호 배열
+
+    접두사 검색은 bisect 로 구간을 찾아서 처리하므로, 노드 객체를 만들지 않는
+    평탄화된 트라이처럼 동작합니다.
+    """
+
+    __slots__ = ("ids", "key")
+
+    def __init__(self, keys: List[str], key: Callable[[int], str]):
+        self.ids = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+        self.key = key
+
+    def exact(self, key: str) -> Optional[int]:
+        i = bisect_left(self.ids, key, key=self.key)
+        if i < len(self.ids) and self.key(self.ids[i]) == key:
+            return self.ids[i]
+        return None
+
+    def updated(
+        self, removed: Set[int], added: Iterable[int], key: Callable[[int], str]
+    ) -> "_SortedIds":
+        """removed 번호를 빼고 added 번호를 정렬 위치에 넣은 사본을 반환합니다.
+
+        전체를 다시 정렬하지 않으므로 key 는 넣는 번호의 이진 탐색에만 쓰입니다.
+        """
+        result = _SortedIds([], key)
+        result.ids = array("I", (i for i in self.ids if i not in removed))
+        for symbol_id in added:
+            insort(result.ids, symbol_id, key=key)
+        return result
+
+    def prefix(self, prefix: str) -> List[int]:
+        start = bisect_left(self.ids, prefix, key=self.key)
+        end = bisect_right(self.ids, prefix + "\U0010ffff", key=self.key)
+        return list(self.ids[start:end])
+
+
+class SymbolIndex:
+    """한국 종목명/종목코드 검색 인덱스
+
+    종목명과 코드는 번호(id) 순서로 압축 저장하고, 검색에는 정렬된 번호 배열과
+    바이그램 배열만 사용합니다. 정확히 일치, 공백/대소문자 무시, 접두사,
+    초성("ㅅㅅㅈㅈ" → 삼성전자), 오타 허용 검색과 코드 → 종목명 역조회를
+    지원합니다. apply 로 만든 인덱스는 지워진 종목의 번호를 비워 둔 채로(tombstone)
+    저장 공간에 남겨 두고, 정렬된 배열에서만 뺍니다.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        deduplicated: Dict[str, str] = {}
+        for name, code in entries:
+            if name and code:
+                deduplicated[name] = code
+
+        names = list(deduplicated.keys())
+        codes = list(deduplicated.values())
+        normalized = [normalize(name) for name in names]
+
+        self.names = _PackedStrings(names)
+        self.codes = _PackedStrings(codes)
+        self._dead: FrozenSet[int] = frozenset()
+        self._by_name = _SortedIds(normalized, self._normalized_name)
+        self._by_chosung = _SortedIds(
+            [to_chosung(name) for name in names], self._chosung_name
+        )
+        self._by_code = _SortedIds(codes, self.codes.__getitem__)
+        self._bigrams = array(
+            "Q",
+            sorted(
+                bigram << ID_BITS | symbol_id
+                for symbol_id, key in enumerate(normalized)
+                for bigram in set(_bigrams(key))
+            ),
+        )
+
+    @classmethod
+    def from_csv(
+        cls, path: str, extra_entries: Iterable[Tuple[str, str]] = ()
+    ) -> "SymbolIndex":
+        """KRX 종목 CSV 에서 인덱스를 만듭니다."""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            entries = read_entries(f)
+        return cls([*entries, *extra_entries])
+
+    def __len__(self) -> int:
+        return len(self._by_code.ids)
+
+    def __contains__(self, name: str) -> bool:
+        return self._by_name.exact(normalize(name)) is not None
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        return (
+            (self.names[symbol_id], self.codes[symbol_id])
+            for symbol_id in range(len(self.names))
+            if symbol_id not in self._dead
+        )
+
+    def diff(self, entries: Iterable[Tuple[str, str]]) -> SymbolDiff:
+        """현재 인덱스와 새 종목 목록을 비교합니다."""
+        current = dict(self.items())
+        new = {name: code for name, code in entries if name and code}
+        return SymbolDiff(
+            added=[
+                (name, code) for name, code in new.items() if current.get(name) != code
+            ],
+            removed=[
+                (name, code) for name, code in current.items() if new.get(name) != code
+            ],
+        )
+
+    def apply(self, diff: SymbolDiff) -> "SymbolIndex":
+        """변경 사항을 반영한 새 인덱스를 반환합니다. 현재 인덱스는 바뀌지 않습니다.
+
+        추가된 종목은 저장 공간 뒤에 붙여 정렬된 배열에 끼워 넣고, 지워진 종목은
+        배열에서만 뺍니다. 종목명 정규화, 초성 변환, 바이그램 계산은 바뀐 종목에만
+        합니다. 지워진 번호가 MAX_DEAD_RATIO 를 넘으면 새로 만듭니다.
+        """
+        removed = {
+            symbol_id
+            for name, _ in diff.removed
+            if (symbol_id := self._id_of(name)) is not None
+        }
+        dead = self._dead | removed
+        total = len(self.names) + len(diff.added)
+        if len(dead) > (total - len(dead)) * MAX_DEAD_RATIO or total > ID_MASK:
+            entries = dict(self.items())
+            for name, _ in diff.removed:
+                entries.pop(name, None)
+            entries.update(diff.added)
+            return SymbolIndex(entries.items())
+
+        start = len(self.names)
+        added = list(range(start, start + len(diff.added)))
+        index = SymbolIndex.__new__(SymbolIndex)
+        index.names = self.names.extended(name for name, _ in diff.added)
+        index.codes = self.codes.extended(code for _, code in diff.added)
+        index._dead = frozenset(dead)
+        index._by_name = self._by_name.updated(removed, added, index._normalized_name)
+        index._by_chosung = self._by_chosung.updated(
+            removed, added, index._chosung_name
+        )
+        index._by_code = self._by_code.updated(removed, added, index.codes.__getitem__)
+        index._bigrams = array(
+            "Q", (value for value in self._bigrams if value & ID_MASK not in removed)
+        )
+        for symbol_id in added:
+            for bigram in set(_bigrams(index._normalized_name(symbol_id))):
+                insort(index._bigrams, bigram << ID_BITS | symbol_id)
+        return index
+
+    def _id_of(self, name: str) -> Optional[int]:
+        for symbol_id in self._by_name.prefix(normalize(name)):
+            if self.names[symbol_id] == name:
+                return symbol_id
+        return None
+
+    def code_of(self, name: str) -> Optional[str]:
+        """종목명(공백/대소문자 무시)이 정확히 일치하는 코드를 반환합니다."""
+        if (symbol_id := self._by_name.exact(normalize(name))) is not None:
+            return self.codes[symbol_id]
+        return None
+
+    def name_of(self, code: str) -> Optional[str]:
+        """종목코드로 종목명을 찾습니다."""
+        if (symbol_id := self._by_code.exact(code)) is not None:
+            return self.names[symbol_id]
+        return None
+
+    def lookup(self, query: str) -> Optional[str]:
+        """질의에 가장 잘 맞는 종목 하나의 코드를 반환합니다."""
+        if code := self.code_of(query):
+            return code
+
+        if is_chosung_query(query):
+            if matches := self._search_chosung(to_chosung(query), limit=1):
+                return self.codes[matches[0]]
+            return None
+
+        if matches := self._search_fuzzy(normalize(query), limit=1):
+            return self.codes[matches[0]]
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """자동완성용으로 (종목명, 코드) 후보를 우선순위 순으로 반환합니다."""
+        key = normalize(query)
+        if not key:
+            return []
+
+        if is_chosung_query(key):
+            ids = self._search_chosung(to_chosung(key), limit)
+        else:
+            ids = self._search_prefix(key, limit)
+            if len(ids) < limit:
+                ids += [
+                    symbol_id
+                    for symbol_id in self._search_fuzzy(key, limit)
+                    if symbol_id not in ids
+                ][: limit - len(ids)]
+
+        return [(self.names[symbol_id], self.codes[symbol_id]) for symbol_id in ids]
+
+    def _normalized_name(self, symbol_id: int) -> str:
+        return normalize(self.names[symbol_id])
+
+    def _chosung_name(self, symbol_id: int) -> str:
+        return to_chosung(self.names[symbol_id])
+
+    def _search_prefix(self, key: str, limit: int) -> List[int]:
+        ids = self._by_name.prefix(key)
+        ids.sort(key=lambda symbol_id: len(self.names[symbol_id]))
+        return ids[:limit]
+
+    def _search_chosung(self, chosung: str, limit: int) -> List[int]:
+        ids = self._by_chosung.prefix(chosung)
+        ids.sort(key=lambda symbol_id: len(self.names[symbol_id]))
+        return ids[:limit]
+
+    def _search_fuzzy(self, key: str, limit: int) -> List[int]:
+        """바이그램을 공유하는 후보 중 편집 거리가 가까운 종목을 찾습니다."""
+        scores: Dict[int, int] = {}
+        for bigram in set(_bigrams(key)):
+            start = bisect_left(self._bigrams, bigram << ID_BITS)
+            end = bisect_left(self._bigrams, (bigram + 1) << ID_BITS)
+            for i in range(start, end):
+                symbol_id = self._bigrams[i] & ID_MASK
+                scores[symbol_id] = scores.get(symbol_id, 0) + 1
+        if not scores:
+            return []
+
+        max_distance = max(1, len(key) // 3)
+        candidates = sorted(scores, key=scores.__getitem__, reverse=True)[:50]
+        ranked = []
+        for symbol_id in candidates:
+            distance = edit_distance(
+                key, self._normalized_name(symbol_id), max_distance
+            )
+            if distance <= max_distance:
+                ranked.append((distance, -scores[symbol_id], symbol_id))
+        ranked.sort()
+        return [symbol_id for _, _, symbol_id in ranked[:limit]]
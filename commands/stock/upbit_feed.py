@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from commands.retry import RetryPolicy
+
+DEFAULT_MARKETS = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL", "KRW-DOGE"]
+
+
+class UpbitFeed:
+    """업비트 WebSocket 시세를 구독해서 마켓별 마지막 체결을 메모리에 들고 있습니다.
+
+    [upbit] stream = true 일 때만 동작하며 선택 의존성인 websockets 패키지가
+    필요합니다. 연결이 끊기면 [retry] upbit_stream_* 설정의 backoff 로 다시
+    연결하고, 끊겨 있는 동안 get 은 None 을 반환해서 REST 요청으로 대신하게
+    합니다. 조회된 마켓은 max_markets 개까지 구독 목록에 더합니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        url: str = "wss://api.upbit.com/websocket/v1",
+        markets: Iterable[str] = DEFAULT_MARKETS,
+        max_markets: int = 100,
+    ):
+        self.enabled = enabled
+        self.url = url
+        self.max_markets = max_markets
+        self.reconnect = RetryPolicy(
+            "upbit_stream", attempts=0, base_delay=1.0, max_delay=60.0, deadline=None
+        )
+        self.tickers: Dict[str, Dict] = {}
+        self._markets: Dict[str, None] = dict.fromkeys(markets)
+        self._websocket = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters: Dict[str, int] = {"messages": 0, "reconnects": 0}
+
+    def configure(self, config) -> None:
+        """config.ini 의 [upbit] 섹션에서 스트림 설정을 읽습니다."""
+        self.reconnect.configure(config)
+        if not config.has_section("upbit"):
+            return
+
+        section = config["upbit"]
+        self.enabled = section.getboolean("stream", self.enabled)
+        self.url = section.get("stream_url", self.url)
+        self.max_markets = section.getint("stream_max_markets", self.max_markets)
+        if markets := section.get("stream_markets"):
+            self._markets = dict.fromkeys(
+                market.strip().upper() for market in markets.split(",") if market
+            )
+
+    @property
+    def connected(self) -> bool:
+        return self._websocket is not None
+
+    @property
+    def markets(self) -> List[str]:
+        return list(self._markets)
+
+    def get(self, market: str) -> Optional[Dict]:
+        """스트림으로 받은 마지막 시세. 연결되어 있지 않으면 None 을 반환합니다."""
+        if not self.connected:
+            return None
+        return self.tickers.get(market)
+
+    async def subscribe(self, markets: Iterable[str]) -> None:
+        """구독하지 않은 마켓을 구독 목록에 더합니다."""
+        if not self.enabled:
+            return
+
+        added = False
+        for market in markets:
+            if market not in self._markets and len(self._markets) < self.max_markets:
+                self._markets[market] = None
+                added = True
+
+        if added and (websocket := self._websocket) is not None:
+            try:
+                await websocket.send(self._subscription())
+            except Exception as e:
+                logging.warning(f"Failed to update Upbit subscription: {str(e)}")
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        try:
+            import websockets
+        except ImportError:
+            logging.error("websockets is not installed, Upbit stream is disabled")
+            return
+
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=2**20) as websocket:
+                    await websocket.send(self._subscription())
+                    self._websocket = websocket
+                    logging.info(
+                        f"Upbit stream connected ({len(self._markets)} markets)"
+                    )
+                    async for message in websocket:
+                        # 연결만 받고 바로 끊는 서버에 계속 다시 붙지 않도록
+                        # 시세를 받은 뒤에만 backoff 를 처음부터 시작합니다.
+                        if self._handle(message):
+                            attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Upbit stream disconnected: {str(e)}")
+            finally:
+                self._websocket = None
+                self.tickers.clear()
+
+            try:
+                delay = self.reconnect.backoff(attempt)
+            except Exception as e:
+                logging.error(f"Upbit reconnect backoff failed: {str(e)}")
+                delay = self.reconnect.max_delay
+            attempt += 1
+            self._counters["reconnects"] += 1
+            await asyncio.sleep(delay)
+
+    def _subscription(self) -> str:
+        return json.dumps(
+            [
+                {"ticket": str(uuid.uuid4())},
+                {"type": "ticker", "codes": list(self._markets)},
+                {"format": "DEFAULT"},
+            ]
+        )
+
+    def _handle(self, message) -> bool:
+        """시세 메시지이면 저장하고 True 를 반환합니다."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return False
+        if data.get("type") != "ticker" or "code" not in data:
+            return False
+
+        # REST 응답과 같은 키로 읽을 수 있도록 market 을 채워 둡니다.
+        data["market"] = data["code"]
+        self.tickers[data["code"]] = data
+        self._counters["messages"] += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._counters,
+            "connected": int(self.connected),
+            "markets": len(self._markets),
+        }
+
+
+upbit_feed = UpbitFeed()
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, TypeVar
+
+import httpx
+
+from commands.retry import is_retryable, is_retryable_response
+
+T = TypeVar("T")
+
+DEFAULT_HEDGE_HOSTS = (
+    "bonfire.robinhood.com",
+    "polling.finance.naver.com",
+    "m.stock.naver.com",
+    "api.stock.naver.com",
+)
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어서 업스트림에 요청하지 않았습니다."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} circuit is open, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """업스트림 장애로 볼 수 있는 오류인지 확인합니다."""
+    return isinstance(error, CircuitOpenError) or is_retryable(error)
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold 번이면 open_seconds 동안 요청을 막는 회로
+
+    막는 시간이 지나면 요청 하나만 시험 삼아 보내고(half-open), 성공하면 다시
+    닫고 실패하면 다시 엽니다.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, open_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.open_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """요청을 보내도 되면 True 를 반환합니다. half-open 이면 한 번만 허용합니다."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record(self, ok: bool) -> bool:
+        """결과를 기록합니다. 이번 결과로 회로가 열렸으면 True 를 반환합니다."""
+        probing, self.probing = self.probing, False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return False
+
+        self.failures += 1
+        if probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def release(self) -> None:
+        """결과 없이 끝난(취소된) 시험 요청의 자리를 돌려줍니다."""
+        self.probing = False
+
+
+class HostHealth:
+    """호스트 하나의 회로와 최근 성공 응답 시간"""
+
+    def __init__(self, breaker: CircuitBreaker, window: int):
+        self.breaker = breaker
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class UpstreamHealth:
+    """업스트림 호스트별 상태를 추적하고 요청에 회로 차단과 hedging 을 적용합니다.
+
+    실패(연결 오류, 시간 초과, 429/5xx)나 slow_call 초보다 오래 걸린 응답(또는
+    slow_call 초가 지나 취소된 요청)이 이어지면 회로를 열어서, 장애 중인 호스트에는
+    기다리지 않고 바로 CircuitOpenError 를 냅니다. hedge_hosts 의 요청은 최근 응답 시간의
+    hedge_quantile 백분위수만큼 기다려도 응답이 없으면 같은 요청을 한 번 더
+    보내고 먼저 온 응답을 씁니다. 추가 요청은 전체 요청의 hedge_budget 비율을
+    넘지 않습니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        slow_call: float = 3.0,
+        hedge_hosts: Iterable[str] = DEFAULT_HEDGE_HOSTS,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_budget: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.slow_call = slow_call
+        self.hedge_hosts = set(hedge_hosts)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_budget = hedge_budget
+        self.window = window
+        self.min_samples = min_samples
+        self._hosts: Dict[str, HostHealth] = {}
+
+    def configure(self, config) -> None:
+        """config.ini 의 [circuit] 섹션에서 회로와 hedging 설정을 읽습니다."""
+        if not config.has_section("circuit"):
+            return
+
+        section = config["circuit"]
+        self.enabled = section.getboolean("enabled", self.enabled)
+        self.failure_threshold = section.getint(
+            "failure_threshold", self.failure_threshold
+        )
+        self.open_seconds = section.getfloat("open_seconds", self.open_seconds)
+        self.slow_call = section.getfloat("slow_call", self.slow_call)
+        if (hosts := section.get("hedge_hosts")) is not None:
+            self.hedge_hosts = {host.strip() for host in hosts.split(",") if host}
+        self.hedge_quantile = section.getfloat("hedge_quantile", self.hedge_quantile)
+        self.hedge_min_delay = section.getfloat("hedge_min_delay", self.hedge_min_delay)
+        self.hedge_budget = section.getfloat("hedge_budget", self.hedge_budget)
+        self.window = section.getint("window", self.window)
+        self.min_samples = section.getint("min_samples", self.min_samples)
+        self._hosts.clear()
+
+    def host(self, host: str) -> HostHealth:
+        if (health := self._hosts.get(host)) is None:
+            health = self._hosts[host] = HostHealth(
+                CircuitBreaker(self.failure_threshold, self.open_seconds), self.window
+            )
+        return health
+
+    def available(self, host: str) -> bool:
+        """회로가 열려 있지 않은지 확인합니다. 시험 요청 자리를 쓰지 않습니다."""
+        return self.host(host).breaker.state != CircuitBreaker.OPEN
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """hedging 요청을 보내기 전까지 기다릴 시간. hedging 하지 않으면 None 입니다."""
+        if host not in self.hedge_hosts:
+            return None
+
+        health = self.host(host)
+        if len(health.latencies) < self.min_samples:
+            return None
+        if health.hedges >= self.hedge_budget * health.requests:
+            return None
+        return max(self.hedge_min_delay, health.quantile(self.hedge_quantile))
+
+    async def call(
+        self, host: str, func: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """func 로 host 에 요청하고 결과를 호스트 상태에 반영합니다."""
+        if not self.enabled:
+            return await func()
+
+        health = self.host(host)
+        breaker = health.breaker
+        if not breaker.allow():
+            health.rejected += 1
+            raise CircuitOpenError(host, breaker.retry_in())
+
+        probing = breaker.probing
+        health.requests += 1
+        start = time.perf_counter()
+        try:
+            if probing:
+                response = await func()
+            else:
+                response = await self._hedged(host, health, func)
+        except Exception as e:
+            if is_retryable(e):
+                self._record(host, breaker, False)
+            elif probing:
+                breaker.release()
+            raise
+        except asyncio.CancelledError:
+            # 바깥의 wait_for 시간 제한은 대개 httpx 시간 초과보다 먼저 취소하므로,
+            # slow_call 을 넘기고 취소된 요청은 실패로 기록해야 멈춘 호스트의 회로가 열립니다.
+            if time.perf_counter() - start >= self.slow_call:
+                self._record(host, breaker, False)
+            elif probing:
+                breaker.release()
+            raise
+
+        elapsed = time.perf_counter() - start
+        ok = not is_retryable_response(response)
+        if ok:
+            health.latencies.append(elapsed)
+        self._record(host, breaker, ok and elapsed < self.slow_call)
+        return response
+
+    def _record(self, host: str, breaker: CircuitBreaker, ok: bool) -> None:
+        if breaker.record(ok):
+            logging.warning(
+                f"Circuit for {host} opened after {breaker.failures} failures,"
+                f" retrying in {breaker.open_seconds:.0f}s"
+            )
+
+    async def _hedged(
+        self, host: str, health: HostHealth, func: Callable[[], Awaitable[T]]
+    ) -> T:
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return await func()
+
+        first = asyncio.ensure_future(func())
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            health.hedges += 1
+            pending.add(asyncio.ensure_future(func()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            health.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict]:
+        """호스트별 회로 상태와 hedging 횟수"""
+        return {
+            host: {
+                "state": health.breaker.state,
+                "requests": health.requests,
+                "rejected": health.rejected,
+                "hedges": health.hedges,
+                "hedge_wins": health.hedge_wins,
+                "p95_ms": (
+                    round(health.quantile(0.95) * 1000) if health.latencies else 0
+                ),
+            }
+            for host, health in sorted(self._hosts.items())
+        }
+
+
+upstream_health = UpstreamHealth()
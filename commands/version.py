@@ -1,12 +1,15 @@
-import git
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from commands import sender
+
 
 async def version(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    import git
+
     repo = git.Repo(search_parent_directories=True)
 
     sha = repo.head.object.hexsha
     commit_message = repo.head.object.summary
     commit_author = repo.head.object.author.name
-    await update.message.reply_text(f"{sha}\n{commit_message} by {commit_author}")
+    await sender.reply_text(update, f"{sha}\n{commit_message} by {commit_author}")
@@ -1,3 +1,4 @@
+import asyncio
 import configparser
 import logging
 import os
@@ -5,18 +6,150 @@ import os
 from telegram.ext import Application, ApplicationBuilder
 from telegram.request import HTTPXRequest
 
+import commands.stock.stock_data as stock_data
+from commands.boot import boot_timer
+from commands.http_client import HTTPClientConfig, http_clients
+from commands.metrics import metrics
+from commands.retry import telegram_retry, upstream_retry
+from commands.send_scheduler import outbound
+from commands.shared_state import shared_state
+from commands.stock.alerts import alert_scheduler
+from commands.stock.chart_cache import chart_cache
+from commands.stock.chart_fetcher import chart_fetcher
+from commands.stock.currency import Currency
+from commands.stock.fallback import fallback_chain
+from commands.stock.inline import inline_search
+from commands.stock.prefetch import prefetcher
+from commands.stock.quote_cache import quote_cache
+from commands.stock.stock import MarketDataFetcher, rh
+from commands.stock.upbit_feed import upbit_feed
+from commands.upstream_health import upstream_health
 
-def build_application() -> Application:
-    config = get_configuration()
+# getUpdates long polling 대기 시간(초)
+POLLING_TIMEOUT = 10
+
+
+def build_application(config=None, updater: bool = True) -> Application:
+    """Application 을 만듭니다.
+
+    updater=False 이면 getUpdates/웹훅 수신기를 만들지 않습니다. 업데이트를 직접
+    넣어 주는 워커(worker.py)용입니다.
+    """
+    config = config or get_configuration()
 
     token = config["telegram"]["token"]
 
     if not token:
         raise ValueError("Telegram token is empty in config.ini")
 
-    timeout = 10.0
+    http_clients.configure(HTTPClientConfig.from_config(config))
+    shared_state.configure(config)
+    metrics.configure(config)
+    telegram_retry.configure(config)
+    upstream_retry.configure(config)
+    upstream_health.configure(config)
+    outbound.configure(config)
+    quote_cache.configure(config)
+    fallback_chain.configure(config)
+    chart_cache.configure(config)
+    chart_fetcher.store.configure(config)
+    MarketDataFetcher.configure(config)
+    Currency.configure(config)
+    prefetcher.configure(config)
+    upbit_feed.configure(config)
+    alert_scheduler.configure(config)
+    inline_search.configure(config)
+
+    section = config["telegram"]
+    read_timeout = section.getfloat("read_timeout", 10.0)
+    write_timeout = section.getfloat("write_timeout", 20.0)
+    connect_timeout = section.getfloat("connect_timeout", 5.0)
+    pool_timeout = section.getfloat("pool_timeout", 3.0)
+
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(max(section.getint("concurrent_updates", 32), 1))
+        .connection_pool_size(section.getint("connection_pool_size", 256))
+        .read_timeout(read_timeout)
+        .write_timeout(write_timeout)
+        .connect_timeout(connect_timeout)
+        .pool_timeout(pool_timeout)
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+    )
+    if not updater:
+        builder = builder.updater(None)
+    elif get_mode(config) == "polling":
+        # getUpdates 는 long polling 이라 별도 커넥션과 더 긴 read timeout 을 씁니다.
+        builder = (
+            builder.get_updates_read_timeout(read_timeout + POLLING_TIMEOUT)
+            .get_updates_connect_timeout(connect_timeout)
+            .get_updates_pool_timeout(pool_timeout)
+        )
+    # 로컬 Bot API 서버나 벤치마크용 가짜 서버를 쓸 때 지정합니다.
+    if base_url := config["telegram"].get("base_url"):
+        builder = builder.base_url(base_url)
+    return builder.build()
+
+
+def get_mode(config) -> str:
+    """[telegram] mode 값(polling, webhook, workers)을 반환합니다."""
+    mode = config["telegram"].get("mode", "polling").strip().lower() or "polling"
+    if mode not in ("polling", "webhook", "workers"):
+        raise ValueError(f"Unknown telegram mode in config.ini: {mode}")
+    return mode
+
+
+def run_application(app: Application, config) -> None:
+    """설정한 mode 로 업데이트 수신을 시작합니다. 기본값은 polling 입니다."""
+    if get_mode(config) == "polling":
+        app.run_polling(timeout=POLLING_TIMEOUT)
+        return
+
+    if not config.has_section("webhook"):
+        raise ValueError("[webhook] section is missing in config.ini")
+
+    section = config["webhook"]
+    url_path = section.get("url_path", "telegram").strip("/")
+    webhook_url = section.get("url", "")
+    if not webhook_url:
+        raise ValueError("Webhook url is empty in config.ini")
+
+    app.run_webhook(
+        listen=section.get("listen", "0.0.0.0"),
+        port=section.getint("port", 8443),
+        url_path=url_path,
+        webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+        secret_token=section.get("secret_token") or None,
+        cert=section.get("cert") or None,
+        key=section.get("key") or None,
+        max_connections=section.getint("max_connections", 40),
+        drop_pending_updates=section.getboolean("drop_pending_updates", False),
+    )
+
+
+async def _post_init(app: Application) -> None:
+    # 첫 업데이트를 받기 전에 종목 인덱스를 스레드에서 읽어 둡니다.
+    with boot_timer.phase("load stock snapshot"):
+        await asyncio.to_thread(stock_data.load)
+    boot_timer.record("ready to poll", boot_timer.elapsed())
+    boot_timer.log_report()
+    upbit_feed.start()
+
 
-    return ApplicationBuilder().token(token).read_timeout(timeout).build()
+async def _post_shutdown(app: Application) -> None:
+    quote_cache.log_stats()
+    outbound.log_stats()
+    metrics.dump()
+    await upbit_feed.close()
+    await prefetcher.close()
+    await alert_scheduler.close()
+    await outbound.close()
+    await http_clients.close()
+    rh.store.close()
+    alert_scheduler.store.close()
+    await shared_state.close()
 
 
 def create_config_file():
@@ -25,7 +158,142 @@ def create_config_file():
             "token": "",
             "except_commands": "",
             "logging_level": "INFO",
-        }
+            "base_url": "",
+            "mode": "polling",
+            "concurrent_updates": "32",
+            "connection_pool_size": "256",
+            "read_timeout": "10.0",
+            "write_timeout": "20.0",
+            "connect_timeout": "5.0",
+            "pool_timeout": "3.0",
+        },
+        "webhook": {
+            "listen": "0.0.0.0",
+            "port": "8443",
+            "url": "",
+            "url_path": "telegram",
+            "secret_token": "",
+            "cert": "",
+            "key": "",
+            "max_connections": "40",
+            "drop_pending_updates": "false",
+        },
+        "http": {
+            "pool_size": "20",
+            "keepalive_connections": "10",
+            "keepalive_expiry": "30.0",
+            "timeout": "10.0",
+            "connect_timeout": "5.0",
+            "http2": "true",
+            "upstream_override": "",
+        },
+        "retry": {
+            "telegram_attempts": "3",
+            "telegram_base_delay": "1.0",
+            "telegram_max_delay": "5.0",
+            "telegram_deadline": "30.0",
+            "upstream_attempts": "3",
+            "upstream_base_delay": "0.3",
+            "upstream_max_delay": "5.0",
+            "upstream_deadline": "10.0",
+            "upbit_stream_base_delay": "1.0",
+            "upbit_stream_max_delay": "60.0",
+        },
+        "circuit": {
+            "enabled": "true",
+            "failure_threshold": "5",
+            "open_seconds": "30",
+            "slow_call": "3.0",
+            "hedge_hosts": "bonfire.robinhood.com,polling.finance.naver.com,"
+            "m.stock.naver.com,api.stock.naver.com",
+            "hedge_quantile": "0.95",
+            "hedge_min_delay": "0.05",
+            "hedge_budget": "0.1",
+            "window": "200",
+            "min_samples": "20",
+        },
+        "fallback": {
+            "enabled": "true",
+            "max_stale": "900",
+            "chain_robinhood": "naver_world",
+            "chain_naver_stock": "naver_mobile_stock",
+            "chain_naver_market": "",
+        },
+        "outbound": {
+            "global_rate": "30.0",
+            "chat_rate": "1.0",
+            "group_rate": "0.33",
+            "burst": "3",
+            "warn_depth": "50",
+            "interactive_max_wait": "120",
+            "bulk_max_wait": "600",
+        },
+        "metrics": {
+            "admin_ids": "",
+            "prometheus_file": "",
+        },
+        "shared": {
+            "backend": "none",
+            "path": "shared_state.db",
+            "redis_url": "redis://localhost:6379/0",
+            "redis_prefix": "bot:",
+        },
+        "workers": {
+            "count": "2",
+            "base_port": "8600",
+        },
+        "stock": {
+            "us_concurrency": "10",
+            "us_timeout": "5.0",
+        },
+        "upbit": {
+            "stream": "false",
+            "stream_url": "wss://api.upbit.com/websocket/v1",
+            "stream_markets": "KRW-BTC,KRW-ETH,KRW-XRP,KRW-SOL,KRW-DOGE",
+            "stream_max_markets": "100",
+        },
+        "fx": {
+            "currencies": "USD,JPY,EUR,CNY,GBP,HKD,TWD,AUD,CAD,CHF,SGD,THB,VND",
+        },
+        "alerts": {
+            "enabled": "true",
+            "path": "alerts.db",
+            "open_interval": "15",
+            "closed_interval": "600",
+            "watch_move_percent": "3",
+            "max_per_chat": "20",
+        },
+        "inline": {
+            "limit": "10",
+            "cache_time": "30",
+            "debounce_ms": "20",
+            "max_cached_queries": "2048",
+        },
+        "prefetch": {
+            "enabled": "true",
+            "open_interval": "5",
+            "closed_interval": "300",
+            "grace": "5",
+            "top_n": "10",
+            "idle_after": "1800",
+            "half_life": "3600",
+        },
+        "cache": {
+            "max_entries": "1024",
+            "ttl_naver_market": "10",
+            "ttl_naver_stock": "5",
+            "ttl_naver_mobile_stock": "5",
+            "ttl_naver_world": "5",
+            "ttl_naver_world_code": "86400",
+            "ttl_robinhood": "5",
+            "ttl_upbit_forex": "30",
+            "ttl_upbit_ticker": "3",
+            "ttl_upbit_markets": "3600",
+            "chart_max_entries": "512",
+            "chart_store_dir": "chart_cache",
+            "chart_store_max_files": "256",
+            "chart_store_evict_every": "32",
+        },
     }
 
     if not os.path.exists("config.ini"):
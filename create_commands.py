@@ -1,21 +1,37 @@
+from datetime import time
 from functools import partial
 from typing import Dict
 
-from commands import choice, version
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    ChosenInlineResultHandler,
+    InlineQueryHandler,
+)
+
+from commands import choice, stats, version
 from commands.commands import CommandHandler
 from commands.ping import ping
-from commands.stock import currency, stock
-from commands.stock.common import Country, KoreanMarketType
+from commands.stock import alerts, currency, inline, stock
+from commands.stock.common import KST, Country, KoreanMarketType
+from commands.stock.market_hours import Market
+from commands.stock.prefetch import prefetcher
 
 commands: Dict[str, Dict] = {
     "ping": {"func": ping, "help": ["/ping: 상태 체크"]},
     "kospi": {
         "func": stock.get_kospi_info,
-        "help": ["\n/kospi: 코스피 지수", "/kospi (종목명): 종목 정보"],
+        "help": [
+            "\n/kospi: 코스피 지수",
+            "/kospi (종목명): 종목 정보",
+            "/kospi (종목명) (종목명) ... 와 같은 형식으로 여러 종목 조회가 가능",
+        ],
+        "prefetch": ("kr_index", "KOSPI"),
     },
     "kosdaq": {
         "func": partial(stock.get_korea_market_point, type=KoreanMarketType.KOSDAQ),
         "help": ["/kosdaq: 코스닥 지수"],
+        "prefetch": ("kr_index", "KOSDAQ"),
     },
     "us": {
         "func": stock.get_usstock_info,
@@ -28,27 +44,58 @@ commands: Dict[str, Dict] = {
     "nasdaq": {
         "func": partial(stock.get_usstock_info, ticker="^IXIC"),
         "help": ["\n/nasdaq: 나스닥 지수"],
+        "prefetch": ("us", "^IXIC"),
     },
     "dow": {
         "func": partial(stock.get_usstock_info, ticker="^DJI"),
         "help": ["/dow: 다우 지수"],
+        "prefetch": ("us", "^DJI"),
     },
     "sp": {
         "func": partial(stock.get_usstock_info, ticker="^GSPC"),
         "help": ["/sp: S&P 500 지수"],
+        "prefetch": ("us", "^GSPC"),
     },
     "vix": {
         "func": partial(stock.get_usstock_info, ticker="^VIX"),
         "help": ["/vix: VIX 지수"],
+        "prefetch": ("us", "^VIX"),
     },
     "gold": {
         "func": partial(stock.get_usstock_info, ticker="GC=F"),
         "help": ["/gold: 금값"],
+        "prefetch": ("us", "GC=F"),
     },
     "btc": {
         "func": stock.btc,
         "help": ["/btc: 비트코인"],
+        "prefetch": ("crypto", "KRW-BTC"),
+    },
+    "coin": {
+        "func": stock.coin,
+        "help": [
+            "/coin (심볼) (심볼) ...: 업비트 암호화폐 시세 (예: /coin BTC ETH XRP)",
+        ],
+    },
+    "watch": {
+        "func": alerts.watch,
+        "help": [
+            "\n/watch (종목) ...: 관심 종목 추가, 크게 움직이면 알려줍니다"
+            " (시장 지정 예: 미국 $T, 코인 KRW-BTC)",
+            "/watch: 관심 종목 현재가",
+            "/unwatch (종목): 관심 종목 삭제",
+        ],
     },
+    "unwatch": {"func": alerts.unwatch, "help": []},
+    "alert": {
+        "func": alerts.alert,
+        "help": [
+            "/alert (종목) >= (가격): 가격 알림 등록 (예: /alert AAPL >= 200)",
+            "/alert: 등록한 알림 목록",
+            "/unalert (번호): 가격 알림 삭제",
+        ],
+    },
+    "unalert": {"func": alerts.unalert, "help": []},
     "fg": {"func": stock.fear_and_greed_index, "help": ["\n/fg: Fear and Greed Index"]},
     "wb": {
         "func": stock.wallstreetbets,
@@ -57,10 +104,19 @@ commands: Dict[str, Dict] = {
     "usd": {
         "func": partial(currency.get_currency_data, code=Country.USA),
         "help": ["\n/usd: 미국 환율"],
+        "prefetch": ("fx", Country.USA.value),
     },
     "jpy": {
         "func": partial(currency.get_currency_data, code=Country.JAPAN),
         "help": ["/jpy: 일본 환율"],
+        "prefetch": ("fx", Country.JAPAN.value),
+    },
+    "fx": {
+        "func": currency.fx,
+        "help": [
+            "/fx: 주요 통화 환율표",
+            "/fx (금액) (통화) (대상 통화) ...: 환율 계산 (예: /fx 100 USD JPY EUR)",
+        ],
     },
     "choice": {
         "func": choice.choice,
@@ -72,6 +128,20 @@ commands: Dict[str, Dict] = {
         "func": version.version,
         "help": ["\n/version: 버전 정보 (git sha)"],
     },
+    "stats": {"func": stats.stats, "help": []},
+}
+
+handlers: Dict[str, Dict] = {
+    "inline": {"handler": InlineQueryHandler, "func": inline.inline_query},
+    "inline_chosen": {
+        "handler": ChosenInlineResultHandler,
+        "func": inline.chosen_inline_result,
+    },
+    "inline_refresh": {
+        "handler": CallbackQueryHandler,
+        "func": inline.refresh_quote,
+        "kwargs": {"pattern": "^quote:"},
+    },
 }
 
 
@@ -85,3 +155,57 @@ def create_commands(command_handler: CommandHandler):
         if command_info.get("alias"):
             for alias in command_info["alias"]:
                 command_handler.set_command(alias, command_info["func"])
+
+    for name, handler_info in handlers.items():
+        command_handler.set_handler(
+            name,
+            handler_info["handler"],
+            handler_info["func"],
+            **handler_info.get("kwargs", {}),
+        )
+
+
+jobs: Dict[str, Dict] = {
+    "load_stock_data": {"func": stock.load_stock_data, "when": 0},
+    "refresh_stock_data": {
+        "func": stock.refresh_stock_data,
+        "daily": time(hour=7, minute=30, tzinfo=KST),
+    },
+    "refresh_robinhood_token": {
+        "func": stock.refresh_robinhood_token,
+        "interval": 60,
+    },
+    "dump_metrics": {"func": stats.dump_metrics, "interval": 60},
+    "prefetch_market_data": {"func": stock.prefetch_market_data, "interval": 1},
+    "check_alerts": {"func": alerts.check_alerts, "interval": 1},
+}
+
+prefetch_kinds: Dict[str, Dict] = {
+    "kr_index": {"func": stock.prefetch_korean_markets, "market": Market.KRX},
+    "kr": {"func": stock.prefetch_korean_stocks, "market": Market.KRX},
+    "us": {"func": stock.prefetch_us_stocks, "market": Market.US},
+    "crypto": {"func": stock.prefetch_crypto, "market": Market.CRYPTO},
+    "fx": {"func": currency.prefetch_currencies, "market": Market.FX},
+}
+
+
+def create_prefetch():
+    for name, kind_info in prefetch_kinds.items():
+        prefetcher.add_kind(name, kind_info["market"], kind_info["func"])
+
+    for command_info in commands.values():
+        if command_info.get("prefetch"):
+            prefetcher.pin(*command_info["prefetch"])
+
+
+def create_jobs(app: Application):
+    create_prefetch()
+    for name, job_info in jobs.items():
+        if job_info.get("daily"):
+            app.job_queue.run_daily(job_info["func"], time=job_info["daily"], name=name)
+        elif job_info.get("interval"):
+            app.job_queue.run_repeating(
+                job_info["func"], interval=job_info["interval"], name=name
+            )
+        else:
+            app.job_queue.run_once(job_info["func"], when=job_info["when"], name=name)
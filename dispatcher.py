@@ -0,0 +1,183 @@
+"""텔레그램 웹훅을 받아 채팅별로 워커에 나눠 주는 디스패처
+
+[telegram] mode = workers 일 때 main.py 가 실행합니다. [workers] count 개의
+worker.py 를 띄우고, 웹훅으로 받은 업데이트를 채팅 ID 기준으로 항상 같은 워커에
+넘깁니다. 같은 채팅의 메시지 순서와 채팅별 전송 한도가 워커 하나 안에서 지켜집니다.
+워커가 응답하지 않으면 502 를 돌려줘서 Telegram 이 다시 보내게 합니다.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import ssl
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from telegram import Bot
+from tornado import web
+
+# 채팅/사용자 정보가 들어 있는 업데이트 필드들
+UPDATE_FIELDS = (
+    "message",
+    "edited_message",
+    "channel_post",
+    "edited_channel_post",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+)
+WORKER_RESTART_DELAY = 3.0
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+
+def routing_key(update: Dict) -> int:
+    """업데이트를 보낼 워커를 고를 때 쓰는 키(채팅 ID, 없으면 사용자 ID)"""
+    for field in UPDATE_FIELDS:
+        if not (payload := update.get(field)):
+            continue
+        if chat := payload.get("chat") or (payload.get("message") or {}).get("chat"):
+            return chat["id"]
+        if user := payload.get("from"):
+            return user["id"]
+    return update.get("update_id", 0)
+
+
+class WebhookHandler(web.RequestHandler):
+    def initialize(self, dispatcher: "Dispatcher"):
+        self.dispatcher = dispatcher
+
+    async def post(self):
+        secret = self.dispatcher.secret_token
+        if (
+            secret
+            and self.request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret
+        ):
+            self.set_status(403)
+            return
+
+        try:
+            update = json.loads(self.request.body)
+        except ValueError:
+            self.set_status(400)
+            return
+
+        if not await self.dispatcher.forward(update, self.request.body):
+            self.set_status(502)
+
+
+class Dispatcher:
+    def __init__(self, config):
+        self.config = config
+        self.count = config["workers"].getint("count", 2)
+        self.base_port = config["workers"].getint("base_port", 8600)
+        self.secret_token = config["webhook"].get("secret_token") or None
+        self._client = httpx.AsyncClient(timeout=5.0)
+        self._processes: List[Optional[asyncio.subprocess.Process]] = [
+            None
+        ] * self.count
+        self._stopping = False
+
+    def worker_url(self, index: int) -> str:
+        return f"http://127.0.0.1:{self.base_port + index}/update"
+
+    async def forward(self, update: Dict, body: bytes) -> bool:
+        index = routing_key(update) % self.count
+        try:
+            response = await self._client.post(
+                self.worker_url(index),
+                content=body,
+                headers={"Content-Type": "application/json"},
+            )
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            logging.error(f"Failed to forward update to worker {index}: {str(e)}")
+            return False
+
+    async def supervise(self, index: int) -> None:
+        """워커를 실행하고, 비정상 종료되면 다시 실행합니다."""
+        while not self._stopping:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, WORKER_SCRIPT, "--index", str(index)
+            )
+            self._processes[index] = process
+            code = await process.wait()
+            if self._stopping:
+                return
+            logging.error(f"Worker {index} exited with {code}, restarting")
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+
+    async def set_webhook(self) -> None:
+        section = self.config["webhook"]
+        url_path = section.get("url_path", "telegram").strip("/")
+        webhook_url = section.get("url", "")
+        if not webhook_url:
+            raise ValueError("Webhook url is empty in config.ini")
+
+        cert = section.get("cert")
+        bot = Bot(
+            self.config["telegram"]["token"],
+            base_url=self.config["telegram"].get("base_url")
+            or "https://api.telegram.org/bot",
+        )
+        async with bot:
+            await bot.set_webhook(
+                url=f"{webhook_url.rstrip('/')}/{url_path}",
+                certificate=Path(cert).read_bytes() if cert else None,
+                max_connections=section.getint("max_connections", 40),
+                drop_pending_updates=section.getboolean("drop_pending_updates", False),
+                secret_token=self.secret_token,
+            )
+
+    async def run(self) -> None:
+        section = self.config["webhook"]
+        url_path = section.get("url_path", "telegram").strip("/")
+
+        ssl_context = None
+        if section.get("cert") and section.get("key"):
+            ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            ssl_context.load_cert_chain(section["cert"], section["key"])
+
+        supervisors = [
+            asyncio.create_task(self.supervise(index)) for index in range(self.count)
+        ]
+        app = web.Application([(rf"/{url_path}", WebhookHandler, {"dispatcher": self})])
+        server = app.listen(
+            section.getint("port", 8443),
+            address=section.get("listen", "0.0.0.0"),
+            ssl_options=ssl_context,
+        )
+        await self.set_webhook()
+        logging.info(f"Dispatching updates to {self.count} workers")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+
+        self._stopping = True
+        server.stop()
+        for process in self._processes:
+            if process and process.returncode is None:
+                process.terminate()
+        await asyncio.gather(*supervisors)
+        await self._client.aclose()
+
+
+def run(config) -> None:
+    if not config.has_section("webhook"):
+        raise ValueError("[webhook] section is missing in config.ini")
+    backend = (
+        config["shared"].get("backend", "") if config.has_section("shared") else ""
+    )
+    if backend in ("", "none"):
+        logging.warning("[shared] backend is none, workers will not share caches")
+
+    asyncio.run(Dispatcher(config).run())
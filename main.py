@@ -1,16 +1,30 @@
 import logging
 
-from commands.commands import CommandHandler
-from config import build_application, get_configuration
-from create_commands import create_commands
+from commands.boot import boot_timer
+
+with boot_timer.phase("import modules"):
+    from commands.commands import CommandHandler
+    from config import build_application, get_configuration, get_mode, run_application
+    from create_commands import create_commands, create_jobs
 
 if __name__ == "__main__":
     config = get_configuration()
     logging_level = config["telegram"].get("logging_level", "INFO")
     logging.basicConfig(level=logging._nameToLevel[logging_level])
 
-    if app := build_application():
-        command_handler = CommandHandler(app, config)
-        create_commands(command_handler)
+    if get_mode(config) == "workers":
+        import dispatcher
+
+        dispatcher.run(config)
+        exit()
+
+    with boot_timer.phase("build application"):
+        app = build_application(config)
+
+    if app:
+        with boot_timer.phase("register commands"):
+            command_handler = CommandHandler(app, config)
+            create_commands(command_handler)
+            create_jobs(app)
 
-    app.run_polling()
+    run_application(app, config)
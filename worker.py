@@ -0,0 +1,111 @@
+"""웹훅 디스패처 뒤에서 도는 봇 워커
+
+dispatcher.py 가 [workers] count 개만큼 실행하며, 각 워커는
+127.0.0.1:<base_port + index>/update 로 디스패처가 넘겨주는 업데이트를 처리합니다.
+시세/차트 캐시와 Robinhood 토큰은 [shared] 저장소로 다른 워커와 공유합니다.
+
+    python worker.py --index 0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+
+from telegram import Update
+from telegram.ext import Application
+from tornado import web
+
+from commands.commands import CommandHandler
+from commands.metrics import metrics
+from config import build_application, get_configuration
+from create_commands import create_commands, create_jobs
+
+
+class UpdateHandler(web.RequestHandler):
+    """디스패처가 넘겨준 업데이트를 Application 의 update_queue 에 넣습니다."""
+
+    def initialize(self, bot_app: Application):
+        self.bot_app = bot_app
+
+    async def post(self):
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            self.set_status(400)
+            return
+        await self.bot_app.update_queue.put(Update.de_json(data, self.bot_app.bot))
+
+
+def worker_config(config, index: int):
+    """워커마다 달라야 하는 설정을 조정합니다."""
+    count = config["workers"].getint("count", 2)
+
+    # Telegram 전체 전송 한도는 봇 단위이므로 워커 수만큼 나눠 씁니다.
+    if not config.has_section("outbound"):
+        config.add_section("outbound")
+    global_rate = config["outbound"].getfloat("global_rate", 30.0)
+    config["outbound"]["global_rate"] = str(global_rate / count)
+
+    if config.has_section("metrics") and (
+        path := config["metrics"].get("prometheus_file")
+    ):
+        stem, ext = os.path.splitext(path)
+        config["metrics"]["prometheus_file"] = f"{stem}.worker{index}{ext}"
+
+    # 미리 가져오기와 알림 확인은 첫 번째 워커만 합니다. 미리 가져온 시세는
+    # 공유 저장소로, 알림은 같은 alerts.db 로 다른 워커와 나눕니다.
+    if index > 0:
+        for section in ("prefetch", "alerts"):
+            if not config.has_section(section):
+                config.add_section(section)
+            config[section]["enabled"] = "false"
+    return config
+
+
+async def serve(config, index: int) -> None:
+    port = config["workers"].getint("base_port", 8600) + index
+    app = build_application(worker_config(config, index), updater=False)
+    metrics.worker = str(index)
+    create_commands(CommandHandler(app, config))
+    create_jobs(app)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with app:
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        server = web.Application([(r"/update", UpdateHandler, {"bot_app": app})])
+        http_server = server.listen(port, address="127.0.0.1")
+        logging.info(f"Worker {index} listening on 127.0.0.1:{port}")
+
+        await stop.wait()
+
+        http_server.stop()
+        await app.stop()
+    if app.post_shutdown:
+        await app.post_shutdown(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index", type=int, required=True, help="워커 번호")
+    args = parser.parse_args()
+
+    config = get_configuration()
+    logging_level = config["telegram"].get("logging_level", "INFO")
+    logging.basicConfig(
+        level=logging._nameToLevel[logging_level],
+        format=f"[worker {args.index}] %(levelname)s:%(name)s:%(message)s",
+    )
+    asyncio.run(serve(config, args.index))
+
+
+if __name__ == "__main__":
+    main()